@@ -0,0 +1,65 @@
+"""
+基准测试基线
+
+按实例规格保存各基准测试的基线结果 (JSON文件，默认 bench_baselines.json)，
+并计算本次结果相对基线的劣化百分比。
+
+实例规格优先取 INSTANCE_TYPE 环境变量，其次查询阿里云实例元数据服务，
+都取不到时使用 "unknown-<核数>c<内存GB>g" 作为规格名。
+"""
+
+import json
+import os
+
+from config import Config
+
+METADATA_INSTANCE_TYPE_URL = "http://100.100.100.200/latest/meta-data/instance/instance-type"
+METADATA_TIMEOUT = 1
+
+
+def detect_instance_type():
+    if Config.INSTANCE_TYPE:
+        return Config.INSTANCE_TYPE
+
+    import urllib.request
+    try:
+        with urllib.request.urlopen(METADATA_INSTANCE_TYPE_URL, timeout=METADATA_TIMEOUT) as response:
+            instance_type = response.read().decode("utf-8").strip()
+            if instance_type:
+                return instance_type
+    except (OSError, ValueError):
+        pass
+
+    import psutil
+    memory_gb = round(psutil.virtual_memory().total / (1024 ** 3))
+    return f"unknown-{os.cpu_count()}c{memory_gb}g"
+
+
+def load_baselines(path=None):
+    path = path or Config.BENCH_BASELINE_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_baseline(suite, instance_type, path=None):
+    """返回 指标名 -> 基线值，没有该规格的基线时返回空字典"""
+    return load_baselines(path).get(suite, {}).get(instance_type, {})
+
+
+def save_baseline(suite, instance_type, values, path=None):
+    """将本次结果记录为该规格的基线，覆盖同名指标"""
+    path = path or Config.BENCH_BASELINE_FILE
+    baselines = load_baselines(path)
+    baselines.setdefault(suite, {}).setdefault(instance_type, {}).update(values)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def deviation_percent(value, baseline, higher_is_better=True):
+    """相对基线的劣化百分比，正数表示比基线差"""
+    if higher_is_better:
+        return (baseline - value) / baseline * 100
+    return (value - baseline) / baseline * 100
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+原生探测与子进程探测的微基准测试
+
+对每一项探测分别计时: probes.py 直接读取/proc文件并解析，与启动对应命令
+(cat、uptime、ip等) 并解析其输出。命令不存在时跳过该项的子进程计时。
+
+使用示例:
+  python3 bench_probes.py
+  python3 bench_probes.py --iterations 500
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import probes
+
+
+def run_command(command):
+    return subprocess.run(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    ).stdout
+
+
+def load_from_uptime():
+    output = run_command(["uptime"])
+    return [float(value) for value in output.split("load average:")[1].split(",")[:3]]
+
+
+def default_route_from_ip():
+    return "default" in run_command(["ip", "route", "show"])
+
+
+def interfaces_from_ip():
+    return [line.split(":")[1].strip() for line in run_command(["ip", "-o", "link", "show"]).splitlines()]
+
+
+# (名称, 原生探测, 子进程探测, 子进程依赖的命令)
+BENCHMARKS = [
+    ("os-release", probes.read_os_release, lambda: run_command(["cat", "/etc/os-release"]), "cat"),
+    ("内核版本", probes.read_kernel_release, lambda: run_command(["uname", "-r"]), "uname"),
+    ("运行时间", probes.read_uptime, lambda: run_command(["uptime", "-p"]), "uptime"),
+    ("系统负载", probes.read_loadavg, load_from_uptime, "uptime"),
+    ("网络接口", probes.read_interfaces, interfaces_from_ip, "ip"),
+    ("路由表", probes.read_routes, default_route_from_ip, "ip"),
+]
+
+
+def measure(func, iterations):
+    """返回单次调用的平均耗时 (微秒)"""
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def command_available(name):
+    try:
+        subprocess.run([name, "--version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="原生探测与子进程探测的微基准测试")
+    parser.add_argument("--iterations", type=int, default=200, help="每项探测的重复次数 (默认: 200)")
+    args = parser.parse_args()
+
+    print(f"{'探测项':<10} {'原生(μs)':>10} {'子进程(μs)':>12} {'加速比':>8}")
+    for name, native, command, binary in BENCHMARKS:
+        native_us = measure(native, args.iterations)
+        if command_available(binary):
+            command_us = measure(command, args.iterations)
+            print(f"{name:<10} {native_us:>10.1f} {command_us:>12.1f} {command_us / native_us:>7.0f}x")
+        else:
+            print(f"{name:<10} {native_us:>10.1f} {'(无' + binary + ')':>12} {'-':>8}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
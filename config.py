@@ -26,6 +26,12 @@ class Config:
         "/usr": 8
     }
 
+    MIN_FREE_INODES_PERCENT = 10  # 必需挂载点的最低空闲inode比例
+    # 必需挂载点须使用其中一种atime策略 (不允许strictatime)
+    ALLOWED_ATIME_OPTIONS = ["noatime", "relatime"]
+    # 挂载点 -> 必须包含的挂载选项，例如 {"/tmp": ["nodev", "nosuid"]}
+    REQUIRED_MOUNT_OPTIONS = {}
+
     # 服务配置
     REQUIRED_SERVICES = [
         "sshd",
@@ -41,19 +47,139 @@ class Config:
         "/etc/sudoers": 0o440
     }
 
+    # 全文件系统安全扫描 (全局可写、SUID/SGID文件)，默认不运行
+    SECURITY_FULL_SCAN = os.getenv("SECURITY_FULL_SCAN", "false").lower() == "true"
+    SECURITY_SCAN_EXCLUDES = ["/proc", "/sys", "/dev", "/run"]
+    SECURITY_SCAN_CACHE = os.getenv("SECURITY_SCAN_CACHE", "/var/tmp/vm_security_scan_cache.json")
+    SECURITY_SCAN_CACHE_MAX_AGE = int(os.getenv("SECURITY_SCAN_CACHE_MAX_AGE", "86400"))  # 秒
+    SECURITY_SCAN_WORKERS = int(os.getenv("SECURITY_SCAN_WORKERS", "8"))
+    # 允许存在的SUID/SGID程序
+    ALLOWED_SUID_SGID = [
+        "/usr/bin/passwd",
+        "/usr/bin/sudo",
+        "/usr/bin/su",
+        "/usr/bin/chage",
+        "/usr/bin/gpasswd",
+        "/usr/bin/newgrp",
+        "/usr/bin/mount",
+        "/usr/bin/umount",
+        "/usr/bin/crontab",
+        "/usr/bin/pkexec",
+        "/usr/bin/write",
+        "/usr/sbin/pam_timestamp_check",
+        "/usr/sbin/unix_chkpwd",
+        "/usr/sbin/userhelper",
+        "/usr/libexec/openssh/ssh-keysign",
+        "/usr/libexec/utempter/utempter",
+        "/usr/lib/polkit-1/polkit-agent-helper-1"
+    ]
+
     # 硬件要求
     MIN_MEMORY_GB = 1
     MIN_CPU_CORES = 1
 
+    # 持续监控 (run_tests.py --watch): 采样间隔、环形缓冲区容量与报告间隔
+    WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "1"))  # 秒
+    WATCH_BUFFER_SIZE = int(os.getenv("WATCH_BUFFER_SIZE", "3600"))  # 保留的样本数
+    WATCH_REPORT_INTERVAL = float(os.getenv("WATCH_REPORT_INTERVAL", "60"))  # 秒
+    # 滑动窗口检查: (指标, 窗口秒数, 百分位, 上限)
+    WATCH_CHECKS = [
+        ("cpu_percent", 300, 95, 90.0),
+        ("memory_percent", 300, 95, 95.0),
+        ("swap_percent", 300, 95, 80.0),
+        ("cpu_percent", 60, 50, 80.0)
+    ]
+
     # 测试超时设置
     NETWORK_TIMEOUT = 10
     SERVICE_CHECK_TIMEOUT = 5
+    PACKAGE_CHECK_TIMEOUT = 30  # 包管理器检查可能需要更长时间
+
+    # 全局时间预算 (run_tests.py --budget): 关键检查最先运行，各项超时不超过剩余预算
+    TEST_BUDGET = float(os.getenv("TEST_BUDGET", "0")) or None  # 秒，未设置时不限时
+    BUDGET_MIN_TEST_SECONDS = float(os.getenv("BUDGET_MIN_TEST_SECONDS", "0.5"))  # 剩余预算低于此值不再开始新测试
+
+    # 异步网络探测: 全部目标共用一个截止时间，按p50/p95延迟阈值断言 (毫秒)
+    NETWORK_PROBE_DEADLINE = float(os.getenv("NETWORK_PROBE_DEADLINE", str(NETWORK_TIMEOUT)))
+    HTTP_PROBE_SAMPLES = int(os.getenv("HTTP_PROBE_SAMPLES", "3"))  # 每个URL的请求次数
+    DNS_LATENCY_P50_MS = float(os.getenv("DNS_LATENCY_P50_MS", "100"))
+    DNS_LATENCY_P95_MS = float(os.getenv("DNS_LATENCY_P95_MS", "500"))
+    HTTP_CONNECT_P95_MS = float(os.getenv("HTTP_CONNECT_P95_MS", "500"))
+    HTTP_TLS_P95_MS = float(os.getenv("HTTP_TLS_P95_MS", "1000"))
+    HTTP_FIRST_BYTE_P50_MS = float(os.getenv("HTTP_FIRST_BYTE_P50_MS", "500"))
+    HTTP_FIRST_BYTE_P95_MS = float(os.getenv("HTTP_FIRST_BYTE_P95_MS", "2000"))
+
+    # 基准测试 (benchmark标记) 默认不运行，设置RUN_BENCHMARKS=true或 -m benchmark 时运行
+    RUN_BENCHMARKS = os.getenv("RUN_BENCHMARKS", "false").lower() == "true"
+
+    # 回环网络基准: 消息大小(字节) -> 最低吞吐量(MB/s)，为Python客户端下的保守下限
+    NET_BENCH_MIN_TCP_MBPS = {
+        64: 0.5,
+        1024: 10,
+        65536: 200
+    }
+    NET_BENCH_MIN_UDP_MBPS = {
+        64: 0.5,
+        1024: 10,
+        65507: 200
+    }
+    NET_BENCH_MIN_CONN_RATE = float(os.getenv("NET_BENCH_MIN_CONN_RATE", "100"))  # 每秒建连数
+    NET_BENCH_STREAMS = int(os.getenv("NET_BENCH_STREAMS", "4"))  # 并行流数
+    NET_BENCH_DURATION = float(os.getenv("NET_BENCH_DURATION", "1.0"))  # 每项测量秒数
+
+    # 基准测试基线: 按实例规格保存，劣化超过阈值百分比时判定失败
+    INSTANCE_TYPE = os.getenv("INSTANCE_TYPE")  # 未设置时查询实例元数据
+    BENCH_BASELINE_FILE = os.getenv(
+        "BENCH_BASELINE_FILE",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines.json")
+    )
+    BENCH_MAX_DEVIATION_PERCENT = float(os.getenv("BENCH_MAX_DEVIATION_PERCENT", "20"))
+
+    # CPU与内存微基准
+    CPU_BENCH_TIME_BUDGET = float(os.getenv("CPU_BENCH_TIME_BUDGET", "30"))  # 整套测试的秒数上限
+    CPU_BENCH_BUFFER_MB = int(os.getenv("CPU_BENCH_BUFFER_MB", "256"))  # 内存带宽测试的缓冲区大小 (受可用内存限制)
+    CPU_BENCH_CHASE_MB = int(os.getenv("CPU_BENCH_CHASE_MB", "16"))  # 指针追逐链表大小 (解释器受限的追逐延迟)
+
+    # 存储I/O基准: 每个挂载点的临时文件大小与时间预算
+    DISK_BENCH_FILE_MB = int(os.getenv("DISK_BENCH_FILE_MB", "64"))
+    DISK_BENCH_TIME_BUDGET = float(os.getenv("DISK_BENCH_TIME_BUDGET", "8"))
+    # (阶段, 指标) -> 阈值: mbps/iops为最低值，*_ms为最高延迟
+    DISK_BENCH_THRESHOLDS = {
+        ("seq_write", "mbps"): 50,
+        ("seq_read", "mbps"): 50,
+        ("rand_read", "iops"): 500,
+        ("rand_write", "iops"): 300,
+        ("rand_read", "p95_ms"): 20,
+        ("rand_write", "p95_ms"): 50
+    }
 
     # 测试环境变量
     TEST_MODE = os.getenv("TEST_MODE", "local")  # local, remote
     REMOTE_HOST = os.getenv("REMOTE_HOST", "localhost")
     REMOTE_USER = os.getenv("REMOTE_USER", "root")
     SSH_KEY_PATH = os.getenv("SSH_KEY_PATH", "~/.ssh/id_rsa")
+    REMOTE_PORT = int(os.getenv("REMOTE_PORT", "22"))
+    REMOTE_PASSWORD = os.getenv("REMOTE_PASSWORD")  # 未配置密钥时使用
+
+    # 主机事实快照
+    HOST_FACTS_WORKERS = int(os.getenv("HOST_FACTS_WORKERS", "8"))  # 并发采集线程数
+    HOST_FACTS_EXPORT = os.getenv("HOST_FACTS_EXPORT")  # 采集后导出JSON快照的路径
+    HOST_FACTS_REPLAY = os.getenv("HOST_FACTS_REPLAY")  # 从JSON快照回放，不访问主机
+
+    # JSON Lines结果流: 每个测试结束时追加一行 (run_tests.py --jsonl)
+    RESULTS_JSONL = os.getenv("RESULTS_JSONL")
+
+    # 测试耗时历史 (SQLite)，设为空字符串时不记录；趋势报告 run_tests.py --trend
+    TIMING_DB = os.getenv("TIMING_DB", "/var/tmp/vm_test_timings.sqlite3")
+    TIMING_TREND_SAMPLES = int(os.getenv("TIMING_TREND_SAMPLES", "20"))  # 每个测试统计最近的次数
+    TIMING_RECENT_SAMPLES = int(os.getenv("TIMING_RECENT_SAMPLES", "3"))  # 与之前各次比较的最近次数
+    # 最近中位数比之前的中位数慢超过该百分比，且至少慢TIMING_REGRESSION_MIN_MS毫秒时判定为回归
+    TIMING_REGRESSION_PERCENT = float(os.getenv("TIMING_REGRESSION_PERCENT", "50"))
+    TIMING_REGRESSION_MIN_MS = float(os.getenv("TIMING_REGRESSION_MIN_MS", "100"))
+
+    # 增量测试结果缓存: 声明了输入的测试在输入不变时复用上次结果 (pytest --no-cache 关闭)
+    RESULT_CACHE = os.getenv("RESULT_CACHE", "false").lower() == "true"
+    RESULT_CACHE_FILE = os.getenv("RESULT_CACHE_FILE", "/var/tmp/vm_test_result_cache.json")
 
     # venv虚拟环境配置
     VENV_PATH = os.getenv("VENV_PATH", "/opt/test_env")  # 默认venv路径
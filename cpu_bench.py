@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+CPU与内存微基准测试
+
+- 单核/全核整数、浮点吞吐量 (每秒操作数)，全核使用多进程
+- 内存带宽: 大缓冲区整块复制 (memoryview切片赋值，底层为memcpy)
+- 内存延迟: 在随机单环链表上做指针追逐，每一跳都依赖上一跳的结果。追逐循环由解释器执行，
+  每跳的耗时以字节码开销为主，结果是"解释器受限的追逐延迟"，只适合与同规格基线比较，
+  不等于硬件的访存延迟
+
+整个测试套件受时间预算约束，预算平均分配给各项，预算用尽后剩余项目不再运行；
+建链等准备工作 (SETUP) 在预算开始计时之前完成。
+结果按实例规格与基线 (baselines.py) 比较，劣化超过阈值的主机会被标记。
+
+使用示例:
+  python3 cpu_bench.py                 # 运行并与本规格基线比较
+  python3 cpu_bench.py --budget 60
+  python3 cpu_bench.py --record        # 将本次结果记录为本规格的基线
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+from baselines import deviation_percent, detect_instance_type, get_baseline, save_baseline
+from config import Config
+
+SUITE = "cpu_memory"
+# 每次调用计算内核的迭代次数，计时按批次进行
+KERNEL_BATCH = 100000
+# 指针追逐每批的跳数
+CHASE_BATCH = 100000
+# 内存带宽测试的源与目标缓冲区合计不超过可用内存的这一比例，小规格实例上不至于触发OOM
+BANDWIDTH_MEMORY_FRACTION = 1 / 8
+
+Measurement = namedtuple("Measurement", "name value unit higher_is_better")
+
+
+def _int_kernel(iterations):
+    x = 0
+    for i in range(iterations):
+        x = (x + i * 7) & 0xFFFFFFFF
+    return x
+
+
+def _float_kernel(iterations):
+    x = 0.0
+    for _ in range(iterations):
+        x = x * 0.999999 + 1.000001
+    return x
+
+
+KERNELS = {"int": _int_kernel, "float": _float_kernel}
+
+
+def _timed_ops(kind, duration):
+    """在duration秒内反复运行内核，返回每秒操作数"""
+    kernel = KERNELS[kind]
+    operations = 0
+    start = time.perf_counter()
+    while True:
+        kernel(KERNEL_BATCH)
+        operations += KERNEL_BATCH
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return operations / elapsed
+
+
+def single_core(kind, duration):
+    return Measurement(f"{kind}_single", _timed_ops(kind, duration), "ops/s", True)
+
+
+def all_core(kind, duration):
+    """每个CPU一个进程同时运行内核，返回各进程速率之和"""
+    import multiprocessing
+    processes = os.cpu_count() or 1
+    with multiprocessing.Pool(processes) as pool:
+        rates = pool.starmap(_timed_ops, [(kind, duration)] * processes)
+    return Measurement(f"{kind}_all", sum(rates), "ops/s", True)
+
+
+def _bandwidth_buffer_size(size_mb=None):
+    """单个缓冲区的字节数: 取配置值，但两块合计不超过可用内存的BANDWIDTH_MEMORY_FRACTION"""
+    import psutil
+    size = (size_mb or Config.CPU_BENCH_BUFFER_MB) * 1024 * 1024
+    limit = int(psutil.virtual_memory().available * BANDWIDTH_MEMORY_FRACTION / 2)
+    # 按MB取整，至少1MB
+    return max(1024 * 1024, min(size, limit) // (1024 * 1024) * (1024 * 1024))
+
+
+def _filled_buffer(size):
+    """随机内容的缓冲区: 先写入1KB随机数据，再按倍增方式原地复制，不产生与缓冲区等大的临时对象"""
+    buffer = memoryview(bytearray(size))
+    filled = min(1024, size)
+    buffer[:filled] = os.urandom(filled)
+    while filled < size:
+        count = min(filled, size - filled)
+        buffer[filled:filled + count] = buffer[:count]
+        filled += count
+    return buffer
+
+
+def memory_bandwidth(duration, size_mb=None):
+    size = _bandwidth_buffer_size(size_mb)
+    source = _filled_buffer(size)
+    target = memoryview(bytearray(size))
+
+    copied = 0
+    start = time.perf_counter()
+    while True:
+        target[:] = source
+        copied += size
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+    return Measurement("mem_bandwidth", copied / elapsed / 1e6, "MB/s", True)
+
+
+def _build_chain(entries):
+    """把随机打乱的顺序首尾相接成一个环: 从任意位置出发都要走完全部元素才回到起点"""
+    order = list(range(entries))
+    random.shuffle(order)
+    chain = array("q", bytes(8 * entries))
+    for index in range(entries):
+        chain[order[index]] = order[(index + 1) % entries]
+    return chain
+
+
+def _chase_entries(size_mb=None):
+    return (size_mb or Config.CPU_BENCH_CHASE_MB) * 1024 * 1024 // 8
+
+
+def memory_latency(duration, chain=None):
+    """每跳平均纳秒数 (解释器受限的追逐延迟)，chain为None时现场建链"""
+    if chain is None:
+        chain = _build_chain(_chase_entries())
+
+    position = 0
+    hops = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(CHASE_BATCH):
+            position = chain[position]
+        hops += CHASE_BATCH
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+    return Measurement("mem_latency", elapsed / hops * 1e9, "ns/hop", False)
+
+
+# 测试项名称 -> 运行函数 (参数为分配到的秒数)
+BENCHMARKS = [
+    ("int_single", lambda duration: single_core("int", duration)),
+    ("float_single", lambda duration: single_core("float", duration)),
+    ("int_all", lambda duration: all_core("int", duration)),
+    ("float_all", lambda duration: all_core("float", duration)),
+    ("mem_bandwidth", memory_bandwidth),
+    ("mem_latency", memory_latency),
+]
+
+# 测试项名称 -> 准备函数，在时间预算开始计时之前运行，返回值作为运行函数的第二个参数
+SETUP = {
+    "mem_latency": lambda: _build_chain(_chase_entries()),
+}
+
+
+def run_suite(budget=None):
+    """在时间预算内依次运行各项，返回 名称 -> Measurement (预算用尽的项目不在其中)"""
+    budget = budget or Config.CPU_BENCH_TIME_BUDGET
+    prepared = {name: setup() for name, setup in SETUP.items()}
+
+    deadline = time.perf_counter() + budget
+    # 为启动进程等开销预留一半时间
+    duration = budget / len(BENCHMARKS) / 2
+
+    results = {}
+    for name, benchmark in BENCHMARKS:
+        if time.perf_counter() + duration > deadline:
+            break
+        if name in prepared:
+            results[name] = benchmark(duration, prepared[name])
+        else:
+            results[name] = benchmark(duration)
+    return results
+
+
+def compare(results, baseline):
+    """返回 名称 -> (Measurement, 基线值, 劣化百分比)，没有基线的项目基线与劣化为None"""
+    comparison = {}
+    for name, measurement in results.items():
+        reference = baseline.get(name)
+        deviation = None
+        if reference:
+            deviation = deviation_percent(measurement.value, reference, measurement.higher_is_better)
+        comparison[name] = (measurement, reference, deviation)
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU与内存微基准测试")
+    parser.add_argument("--budget", type=float, default=Config.CPU_BENCH_TIME_BUDGET,
+                        help=f"总时间预算秒数 (默认: {Config.CPU_BENCH_TIME_BUDGET})")
+    parser.add_argument("--record", action="store_true", help="将本次结果记录为本实例规格的基线")
+    args = parser.parse_args()
+
+    instance_type = detect_instance_type()
+    print(f"实例规格: {instance_type}  CPU数: {os.cpu_count()}  时间预算: {args.budget}秒")
+
+    results = run_suite(args.budget)
+    comparison = compare(results, get_baseline(SUITE, instance_type))
+
+    flagged = []
+    for name, (measurement, reference, deviation) in comparison.items():
+        line = f"  {name:<14} {measurement.value:>16,.1f} {measurement.unit}"
+        if deviation is not None:
+            line += f"  基线 {reference:,.1f}  劣化 {deviation:+.1f}%"
+            if deviation > Config.BENCH_MAX_DEVIATION_PERCENT:
+                flagged.append(name)
+                line += "  ✗"
+        print(line)
+
+    skipped = [name for name, _ in BENCHMARKS if name not in results]
+    if skipped:
+        print(f"超出时间预算未运行: {', '.join(skipped)}")
+
+    if args.record:
+        save_baseline(SUITE, instance_type, {name: m.value for name, m in results.items()})
+        print(f"已记录基线: {Config.BENCH_BASELINE_FILE}")
+    elif flagged:
+        print(f"劣化超过 {Config.BENCH_MAX_DEVIATION_PERCENT}% 的项目: {', '.join(flagged)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+全局时间预算
+
+--budget 模式下整个pytest会话共享一个截止时间: 各项探测的超时取其默认超时与剩余预算中
+较小的一个，剩余预算不足的测试标记为因预算跳过。未设置预算时所有函数都保持原有超时。
+"""
+
+import time
+
+from config import Config
+
+# 超时的下限，避免剩余预算很少时传入0或负数
+MIN_TIMEOUT = 0.1
+
+_deadline = None
+
+
+class BudgetExceeded(BaseException):
+    """测试运行中预算耗尽，由conftest转换为跳过
+
+    继承BaseException，探测代码中的 except Exception 不会吞掉它。
+    """
+
+
+def start(budget=None):
+    """从现在开始计时，budget为None时使用Config.TEST_BUDGET，两者都未设置时不限时
+
+    未指定budget且已在计时 (run_tests在同一进程中启动pytest) 时保留原截止时间，
+    不丢弃已经消耗的预算。
+    """
+    global _deadline
+    if budget is None and _deadline is not None:
+        return
+    budget = budget if budget is not None else Config.TEST_BUDGET
+    _deadline = time.monotonic() + budget if budget else None
+
+
+def remaining():
+    """剩余秒数，不限时时返回None"""
+    if _deadline is None:
+        return None
+    return max(0.0, _deadline - time.monotonic())
+
+
+def timeout(default):
+    """默认超时与剩余预算中较小的一个"""
+    left = remaining()
+    if left is None:
+        return default
+    return max(min(default, left), MIN_TIMEOUT)
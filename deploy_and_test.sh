@@ -16,6 +16,59 @@ log() {
     echo "[$(date '+%Y-%m-%d %H:%M:%S')] $1"
 }
 
+# 环境包候选 (按优先级): zstd解压速度远快于gzip，旧的 .tar.gz 仍然支持
+ENV_PACKAGE_CANDIDATES="test_env.tar.zst test_env.tar.gz"
+
+# 选择要部署的环境包: 优先zstd；若低优先级的包更新，说明高优先级的是旧版本残留
+select_env_package() {
+    local selected=""
+    local candidate
+    for candidate in $ENV_PACKAGE_CANDIDATES; do
+        if [ -f "$candidate" ]; then
+            if [ -z "$selected" ] || [ "$candidate" -nt "$selected" ]; then
+                selected="$candidate"
+            fi
+        fi
+    done
+    echo "$selected"
+}
+
+# 解压缩命令: 解压缩与tar拆包在管道两端的不同进程中并行执行；
+# gzip优先使用pigz (读取、写出、校验各用独立线程)
+decompress_command() {
+    case "$1" in
+        *.zst)
+            echo "zstd -dc"
+            ;;
+        *)
+            if command -v pigz >/dev/null 2>&1; then
+                echo "pigz -dc -p $(nproc)"
+            else
+                echo "gzip -dc"
+            fi
+            ;;
+    esac
+}
+
+# 内容寻址存储目录: .store/<sha256>/ 下保存制品及其解压结果
+STORE_DIR_NAME=".store"
+
+# 获取制品的内容哈希
+# 上传工具会把制品替换为指向 .store/<sha256>/ 的符号链接，直接取目录名；
+# 手工拷贝的普通文件则现场计算
+artifact_hash() {
+    local target
+    target=$(readlink -f "$1")
+    case "$target" in
+        */${STORE_DIR_NAME}/*/*)
+            basename "$(dirname "$target")"
+            ;;
+        *)
+            sha256sum "$1" | awk '{print $1}'
+            ;;
+    esac
+}
+
 # 主函数
 main() {
     log "开始 Alibaba Cloud Linux 3.21.04 测试环境部署和测试流程"
@@ -31,15 +84,47 @@ main() {
 
     # 步骤2: 解压虚拟环境包
     print_separator
-    log "步骤2: 解压虚拟环境包 test_env.tar.gz"
-    if [ ! -f "test_env.tar.gz" ]; then
-        log "错误: test_env.tar.gz 文件不存在"
+    ENV_PACKAGE=$(select_env_package)
+    log "步骤2: 解压虚拟环境包 ${ENV_PACKAGE:-test_env.tar.gz}"
+    if [ -z "$ENV_PACKAGE" ]; then
+        log "错误: 环境包不存在 (候选: $ENV_PACKAGE_CANDIDATES)"
         exit 1
     fi
 
-    log "开始解压文件..."
-    tar -xzf "test_env.tar.gz"
-    log "虚拟环境解压完成"
+    ENV_HASH=$(artifact_hash "$ENV_PACKAGE")
+    STORE_DIR="${STORE_DIR_NAME}/${ENV_HASH}"
+    log "环境包内容哈希: $ENV_HASH"
+
+    EXTRACT_START=$(date +%s.%N)
+    if [ -f "$STORE_DIR/.extracted" ] && [ -d "$STORE_DIR/tree/test_env" ]; then
+        EXTRACT_METHOD="存储中已有解压结果，跳过解压"
+        log "$EXTRACT_METHOD"
+    else
+        DECOMPRESS=$(decompress_command "$ENV_PACKAGE")
+        if ! command -v ${DECOMPRESS%% *} >/dev/null 2>&1; then
+            log "错误: 解压 $ENV_PACKAGE 需要 ${DECOMPRESS%% *} 命令"
+            exit 1
+        fi
+        EXTRACT_METHOD="$DECOMPRESS | tar -x"
+        log "开始解压文件 ($EXTRACT_METHOD, CPU核数: $(nproc))..."
+        # 先解压到临时目录，完成后再改名，中断不会留下半成品
+        rm -rf "$STORE_DIR/tree.tmp"
+        mkdir -p "$STORE_DIR/tree.tmp"
+        (set -o pipefail; $DECOMPRESS < "$ENV_PACKAGE" | tar -xf - -C "$STORE_DIR/tree.tmp")
+        rm -rf "$STORE_DIR/tree"
+        mv "$STORE_DIR/tree.tmp" "$STORE_DIR/tree"
+        touch "$STORE_DIR/.extracted"
+        log "虚拟环境解压完成"
+    fi
+    EXTRACT_SECONDS=$(awk -v start="$EXTRACT_START" -v end="$(date +%s.%N)" \
+        'BEGIN { printf "%.2f", end - start }')
+    log "解压耗时: ${EXTRACT_SECONDS}秒"
+
+    # test_env 指向存储中的解压结果 (旧版本部署留下的真实目录先移除)
+    if [ -d "test_env" ] && [ ! -L "test_env" ]; then
+        rm -rf "test_env"
+    fi
+    ln -sfn "$STORE_DIR/tree/test_env" "test_env"
 
     # 验证解压结果
     if [ ! -d "test_env" ]; then
@@ -54,6 +139,9 @@ main() {
     source test_env/bin/activate
     log "虚拟环境已激活: $VIRTUAL_ENV"
 
+    # 预编译项目脚本与测试用例 (上传时不包含__pycache__)，首次运行不再编译
+    python -m compileall -q -j 0 ./*.py tests >/dev/null || log "警告: 预编译失败，首次运行时再编译"
+
     # 验证Python版本
     PYTHON_VERSION=$(python --version 2>&1)
     log "Python版本: $PYTHON_VERSION"
@@ -78,13 +166,15 @@ main() {
     # 步骤5: 运行完整测试
     print_separator
     log "步骤5: 运行完整测试套件"
-    log "执行命令: python run_tests.py"
+    log "执行命令: python -u run_tests.py --jsonl <结果文件>"
 
     # 创建测试报告文件名（带时间戳）
     TIMESTAMP=$(date '+%Y%m%d_%H%M%S')
     REPORT_FILE="test_report_${TIMESTAMP}.txt"
+    RESULTS_FILE="test_results_${TIMESTAMP}.jsonl"
 
     log "测试报告将保存到: $REPORT_FILE"
+    log "逐项测试结果将写入: $RESULTS_FILE"
 
     # 执行完整测试并同时输出到屏幕和文件
     {
@@ -92,14 +182,16 @@ main() {
         echo "生成时间: $(date '+%Y-%m-%d %H:%M:%S')"
         echo "执行环境: $VIRTUAL_ENV"
         echo "Python版本: $PYTHON_VERSION"
+        echo "环境包: $ENV_PACKAGE ($ENV_HASH)"
+        echo "环境包解压耗时: ${EXTRACT_SECONDS}秒 ($EXTRACT_METHOD)"
         echo ""
         print_separator
         echo "测试执行结果:"
         print_separator
     } > "$REPORT_FILE"
 
-    # 执行测试并将输出同时发送到屏幕和文件
-    python run_tests.py 2>&1 | tee -a "$REPORT_FILE"
+    # 执行测试并将输出实时发送到屏幕和文件 (-u: 输出经管道时不缓冲)
+    python -u run_tests.py --jsonl "$RESULTS_FILE" 2>&1 | tee -a "$REPORT_FILE"
 
     TEST_EXIT_CODE=${PIPESTATUS[0]}
 
@@ -109,6 +201,7 @@ main() {
         echo "测试执行完成"
         echo "退出码: $TEST_EXIT_CODE"
         echo "报告文件: $REPORT_FILE"
+        echo "结果文件: $RESULTS_FILE"
         echo "完成时间: $(date '+%Y-%m-%d %H:%M:%S')"
     } >> "$REPORT_FILE"
 
@@ -134,7 +227,7 @@ show_help() {
     echo ""
     echo "此脚本按顺序执行以下步骤:"
     echo "  1. 切换到 /opt/test_project 目录"
-    echo "  2. 解压 test_env.tar.gz 虚拟环境包"
+    echo "  2. 解压虚拟环境包 test_env.tar.zst 或 test_env.tar.gz (.store 中已有相同内容时跳过)"
     echo "  3. 激活Python虚拟环境"
     echo "  4. 运行环境完整性检查"
     echo "  5. 运行完整测试套件"
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+存储I/O基准测试
+
+在指定挂载点下创建临时文件，依次测量:
+- seq_write / seq_read: 1MB块顺序写/读
+- rand_read / rand_write: 4KB块随机读/写
+
+优先使用O_DIRECT绕过页缓存 (缓冲区用mmap分配以满足对齐要求)；文件系统不支持时
+(如tmpfs) 回退为缓冲I/O: 写入使用O_DSYNC，读取前用posix_fadvise丢弃页缓存。
+每个挂载点受总时间预算约束，预算平均分配给四个阶段，结束后删除临时文件。
+
+使用示例:
+  python3 disk_bench.py                # 测试Config.REQUIRED_MOUNT_POINTS
+  python3 disk_bench.py /data --budget 30
+"""
+
+import argparse
+import errno
+import mmap
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+from config import Config
+from stats import percentile
+
+SEQ_BLOCK = 1024 * 1024
+RAND_BLOCK = 4096
+SCRATCH_PREFIX = ".vm_disk_bench_"
+
+PhaseResult = namedtuple("PhaseResult", "name block_size operations iops mbps "
+                                        "p50_ms p95_ms p99_ms")
+MountResult = namedtuple("MountResult", "mount direct file_size phases")
+
+
+def _open_scratch(path):
+    """打开临时文件，返回 (文件描述符, 是否为O_DIRECT)"""
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL
+    if hasattr(os, "O_DIRECT"):
+        try:
+            return os.open(path, flags | os.O_DIRECT, 0o600), True
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+            # 部分内核 (如6.6之前的tmpfs、5.10) 在创建文件之后才拒绝O_DIRECT，
+            # 文件已存在时O_EXCL重试会失败，先删除再以缓冲I/O重新创建
+            _remove(path)
+    return os.open(path, flags | os.O_DSYNC, 0o600), False
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _drop_cache(fd):
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _run_phase(name, fd, buffer, offsets, write, duration):
+    """按offsets依次执行I/O直到用完或超时，返回PhaseResult"""
+    latencies = []
+    io = os.write if write else (lambda fd, buf: os.readv(fd, [buf]))
+    start = time.perf_counter()
+    deadline = start + duration
+    for offset in offsets:
+        op_start = time.perf_counter()
+        if op_start >= deadline:
+            break
+        os.lseek(fd, offset, os.SEEK_SET)
+        io(fd, buffer)
+        latencies.append(time.perf_counter() - op_start)
+    elapsed = time.perf_counter() - start
+
+    block_size = len(buffer)
+    operations = len(latencies)
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return PhaseResult(
+        name, block_size, operations,
+        operations / elapsed if elapsed else 0.0,
+        operations * block_size / elapsed / 1e6 if elapsed else 0.0,
+        percentile(latencies_ms, 50), percentile(latencies_ms, 95), percentile(latencies_ms, 99)
+    )
+
+
+def _random_offsets(file_size, count):
+    blocks = file_size // RAND_BLOCK
+    return (random.randrange(blocks) * RAND_BLOCK for _ in range(count))
+
+
+def bench_mount(mount, file_mb=None, budget=None):
+    """对一个挂载点运行四个阶段，返回MountResult"""
+    file_size = (file_mb or Config.DISK_BENCH_FILE_MB) * 1024 * 1024
+    duration = (budget or Config.DISK_BENCH_TIME_BUDGET) / 4
+    path = os.path.join(mount, f"{SCRATCH_PREFIX}{os.getpid()}")
+
+    stat = os.statvfs(mount)
+    if stat.f_bavail * stat.f_frsize < file_size * 2:
+        raise OSError(errno.ENOSPC, f"可用空间不足以创建 {file_size // (1024 * 1024)}MB 临时文件", mount)
+
+    # mmap分配的缓冲区按页对齐，满足O_DIRECT的要求
+    seq_buffer = mmap.mmap(-1, SEQ_BLOCK)
+    seq_buffer.write(os.urandom(SEQ_BLOCK))
+    rand_buffer = mmap.mmap(-1, RAND_BLOCK)
+    rand_buffer.write(os.urandom(RAND_BLOCK))
+
+    fd = None
+    try:
+        fd, direct = _open_scratch(path)
+        phases = {}
+        phases["seq_write"] = _run_phase("seq_write", fd, seq_buffer,
+                                         range(0, file_size, SEQ_BLOCK), True, duration)
+        os.fsync(fd)
+        # 预算内没写完时，后续阶段只使用已写入的部分
+        written = max(phases["seq_write"].operations * SEQ_BLOCK, RAND_BLOCK)
+
+        _drop_cache(fd)
+        phases["seq_read"] = _run_phase("seq_read", fd, seq_buffer,
+                                        range(0, written, SEQ_BLOCK), False, duration)
+        _drop_cache(fd)
+        phases["rand_read"] = _run_phase("rand_read", fd, rand_buffer,
+                                         _random_offsets(written, sys.maxsize), False, duration)
+        phases["rand_write"] = _run_phase("rand_write", fd, rand_buffer,
+                                          _random_offsets(written, sys.maxsize), True, duration)
+        return MountResult(mount, direct, written, phases)
+    finally:
+        if fd is not None:
+            os.close(fd)
+        _remove(path)
+        seq_buffer.close()
+        rand_buffer.close()
+
+
+def check_thresholds(result):
+    """返回未达到Config.DISK_BENCH_THRESHOLDS的项目描述列表"""
+    violations = []
+    for (phase, metric), limit in sorted(Config.DISK_BENCH_THRESHOLDS.items()):
+        value = getattr(result.phases[phase], metric)
+        if value is None:
+            continue
+        too_slow = value > limit if metric.endswith("_ms") else value < limit
+        if too_slow:
+            relation = ">" if metric.endswith("_ms") else "<"
+            violations.append(f"{phase}.{metric} = {value:.2f} {relation} {limit}")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="存储I/O基准测试")
+    parser.add_argument("mounts", nargs="*", default=Config.REQUIRED_MOUNT_POINTS,
+                        help="测试的挂载点 (默认: Config.REQUIRED_MOUNT_POINTS)")
+    parser.add_argument("--budget", type=float, default=Config.DISK_BENCH_TIME_BUDGET,
+                        help=f"每个挂载点的时间预算秒数 (默认: {Config.DISK_BENCH_TIME_BUDGET})")
+    parser.add_argument("--file-mb", type=int, default=Config.DISK_BENCH_FILE_MB,
+                        help=f"临时文件大小MB (默认: {Config.DISK_BENCH_FILE_MB})")
+    args = parser.parse_args()
+
+    failed = False
+    for mount in args.mounts:
+        result = bench_mount(mount, args.file_mb, args.budget)
+        print(f"\n{mount}  ({'O_DIRECT' if result.direct else '缓冲I/O'}, "
+              f"{result.file_size // (1024 * 1024)}MB)")
+        for phase in result.phases.values():
+            if not phase.operations:
+                print(f"  {phase.name:<10} 超出时间预算，未完成任何操作")
+                continue
+            print(f"  {phase.name:<10} {phase.iops:>10.0f} IOPS {phase.mbps:>9.1f} MB/s  "
+                  f"p50 {phase.p50_ms:.2f}ms  p95 {phase.p95_ms:.2f}ms  p99 {phase.p99_ms:.2f}ms")
+        for violation in check_thresholds(result):
+            failed = True
+            print(f"  ✗ {violation}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
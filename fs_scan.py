@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+文件系统安全扫描
+
+查找全局可写的文件、未设置粘滞位的全局可写目录，以及SUID/SGID文件。
+每个顶层目录由一个线程用 os.scandir 遍历 (不跨越文件系统)，多个顶层目录并行扫描。
+
+扫描结果按目录缓存 (inode + mtime)。再次扫描时，目录本身未变化的直接复用缓存中
+该目录的结果，只需stat一次目录。目录mtime只反映条目的增删改名，不反映已有文件的
+chmod，因此缓存超过 SECURITY_SCAN_CACHE_MAX_AGE 后会做一次完整扫描。
+
+使用示例:
+  python3 fs_scan.py             # 使用缓存增量扫描
+  python3 fs_scan.py --full      # 忽略缓存完整扫描
+"""
+
+import argparse
+import json
+import os
+import stat
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+WORLD_WRITABLE = "world_writable"
+WORLD_WRITABLE_DIR = "world_writable_dir"
+SUID = "suid"
+SGID = "sgid"
+
+Finding = namedtuple("Finding", "path kind mode")
+ScanResult = namedtuple("ScanResult", "findings directories rescanned elapsed full")
+
+CACHE_VERSION = 1
+
+
+def _classify(path, st):
+    """返回该条目的发现列表"""
+    mode = st.st_mode
+    findings = []
+    if stat.S_ISREG(mode):
+        if mode & stat.S_IWOTH:
+            findings.append(Finding(path, WORLD_WRITABLE, stat.S_IMODE(mode)))
+        if mode & stat.S_ISUID:
+            findings.append(Finding(path, SUID, stat.S_IMODE(mode)))
+        if mode & stat.S_ISGID:
+            findings.append(Finding(path, SGID, stat.S_IMODE(mode)))
+    elif stat.S_ISDIR(mode) and mode & stat.S_IWOTH and not mode & stat.S_ISVTX:
+        findings.append(Finding(path, WORLD_WRITABLE_DIR, stat.S_IMODE(mode)))
+    return findings
+
+
+def _scan_directory(path):
+    """扫描单个目录的直接条目，返回 (发现列表, 子目录名列表)"""
+    findings = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                findings.extend(_classify(entry.path, st))
+                if stat.S_ISDIR(st.st_mode):
+                    subdirs.append(entry.name)
+    except OSError:
+        pass
+    return findings, subdirs
+
+
+def _walk(root, cache, excludes):
+    """遍历一个顶层目录 (不跨越文件系统)，返回 (发现列表, 新缓存, 目录数, 重新扫描的目录数)"""
+    try:
+        root_dev = os.lstat(root).st_dev
+    except OSError:
+        return [], {}, 0, 0
+
+    findings = []
+    new_cache = {}
+    directories = rescanned = 0
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+        if st.st_dev != root_dev or path in excludes:
+            continue
+
+        directories += 1
+        cached = cache.get(path)
+        if cached and cached["ino"] == st.st_ino and cached["mtime_ns"] == st.st_mtime_ns:
+            dir_findings = [Finding(*finding) for finding in cached["findings"]]
+            subdirs = cached["subdirs"]
+        else:
+            dir_findings, subdirs = _scan_directory(path)
+            rescanned += 1
+
+        new_cache[path] = {
+            "ino": st.st_ino,
+            "mtime_ns": st.st_mtime_ns,
+            "findings": [list(finding) for finding in dir_findings],
+            "subdirs": subdirs
+        }
+        findings.extend(dir_findings)
+        stack.extend(os.path.join(path, name) for name in subdirs)
+
+    return findings, new_cache, directories, rescanned
+
+
+def load_cache(path):
+    """读取扫描缓存，不存在、版本不符或过期时返回空字典"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    if time.time() - data.get("created", 0) > Config.SECURITY_SCAN_CACHE_MAX_AGE:
+        return {}
+    return data
+
+
+def save_cache(path, directories, created):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "created": created, "directories": directories}, f)
+    os.replace(tmp_path, path)
+
+
+def scan(root="/", excludes=None, cache_path=None, full=False, workers=None):
+    """并行扫描root下的各顶层目录，返回ScanResult"""
+    excludes = set(excludes if excludes is not None else Config.SECURITY_SCAN_EXCLUDES)
+    cache_path = cache_path or Config.SECURITY_SCAN_CACHE
+    start = time.time()
+
+    cache_data = {} if full else load_cache(cache_path)
+    cache = cache_data.get("directories", {})
+    # 完整扫描时重新计时缓存有效期，增量扫描沿用上次完整扫描的时间
+    created = cache_data.get("created", start)
+
+    # 根目录本身的条目在当前线程处理，每个顶层子目录交给一个遍历线程
+    findings, top_dirs = _scan_directory(root)
+    top_paths = [os.path.join(root, name) for name in sorted(top_dirs)]
+    top_paths = [path for path in top_paths if path not in excludes]
+
+    new_cache = {}
+    directories = rescanned = 0
+    with ThreadPoolExecutor(max_workers=workers or Config.SECURITY_SCAN_WORKERS) as pool:
+        for dir_findings, dir_cache, count, changed in pool.map(
+                lambda path: _walk(path, cache, excludes), top_paths):
+            findings.extend(dir_findings)
+            new_cache.update(dir_cache)
+            directories += count
+            rescanned += changed
+
+    try:
+        save_cache(cache_path, new_cache, created)
+    except OSError:
+        pass  # 缓存不可写时只影响下次扫描速度
+
+    findings.sort()
+    return ScanResult(findings, directories, rescanned, time.time() - start, not cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全局可写文件与SUID/SGID文件扫描")
+    parser.add_argument("root", nargs="?", default="/", help="扫描根目录 (默认: /)")
+    parser.add_argument("--full", action="store_true", help="忽略缓存完整扫描")
+    args = parser.parse_args()
+
+    result = scan(args.root, full=args.full)
+    for finding in result.findings:
+        print(f"{finding.kind:<20} {finding.mode:04o}  {finding.path}")
+    print(f"\n{'完整' if result.full else '增量'}扫描: {result.directories} 个目录, "
+          f"重新扫描 {result.rescanned} 个, 发现 {len(result.findings)} 项, 耗时 {result.elapsed:.2f}秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
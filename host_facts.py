@@ -0,0 +1,406 @@
+"""
+主机事实快照
+
+会话开始时并发执行一次全部探测命令，结果保存为不可变快照供各测试断言，
+避免不同测试重复执行同一条命令 (uptime、ip、systemctl is-active等)。
+
+文件类事实 (/proc、/etc/os-release) 在本地模式下直接读取，不启动子进程；
+远程模式下经SSH cat取回，两种模式使用相同的解析函数 (probes.py)。
+
+快照可以导出为JSON，之后通过 HOST_FACTS_REPLAY 离线回放失败的测试运行。
+"""
+
+import json
+import shlex
+import socket
+import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+import deadline
+import probes
+from config import Config
+from remote_exec import get_executor, run_probe
+
+# 探测失败的原因
+TIMEOUT = "timeout"
+NOT_FOUND = "not_found"
+
+# 除Config.REQUIRED_SERVICES外，测试中还会检查的服务
+EXTRA_SERVICES = ["firewalld", "crond", "cron", "rsyslog", "NetworkManager", "network"]
+
+# 需要检查存在性的配置文件
+CHECKED_FILES = [
+    "/etc/resolv.conf",
+    "/etc/hosts",
+    "/etc/sysconfig/network",
+    "/etc/ssh/sshd_config"
+]
+
+# 一次shell调用检查全部文件，每行输出 "1 路径" 或 "0 路径"
+FILE_CHECK_SCRIPT = 'for f do if [ -f "$f" ]; then echo "1 $f"; else echo "0 $f"; fi; done'
+
+
+def probed_services():
+    """快照中查询状态的全部服务 (去重并保持顺序)"""
+    services = []
+    for service in Config.REQUIRED_SERVICES + EXTRA_SERVICES:
+        if service not in services:
+            services.append(service)
+    return services
+
+
+# 事实名称 -> 文件路径 (路径列表表示依次尝试，取第一个存在的文件)
+FACT_FILES = {
+    "os_release": probes.OS_RELEASE_PATHS,
+    "kernel": probes.PROC_KERNEL_RELEASE,
+    "uptime": probes.PROC_UPTIME,
+    "loadavg": probes.PROC_LOADAVG,
+    "interfaces": probes.PROC_NET_DEV,
+    "routes": probes.PROC_NET_ROUTE,
+    "mountinfo": probes.PROC_MOUNTINFO
+}
+
+# 远程模式下在靶机上对全部挂载点做一次statvfs，输出格式与本地一致
+STATVFS_SCRIPT = (
+    "import json, os, sys\n"
+    "table = {}\n"
+    "for path in sys.argv[1:]:\n"
+    "    try:\n"
+    "        st = os.statvfs(path)\n"
+    "    except OSError:\n"
+    "        table[path] = None\n"
+    "        continue\n"
+    "    table[path] = [st.f_blocks * st.f_frsize, st.f_bfree * st.f_frsize,\n"
+    "                   st.f_bavail * st.f_frsize, st.f_files, st.f_favail,\n"
+    "                   bool(st.f_flag & os.ST_RDONLY)]\n"
+    "print(json.dumps(table))\n"
+)
+
+# 批量stat权限检查的文件，输出 路径 -> [权限位, uid, gid]
+FILE_STAT_SCRIPT = (
+    "import json, os, sys\n"
+    "table = {}\n"
+    "for path in sys.argv[1:]:\n"
+    "    try:\n"
+    "        st = os.stat(path)\n"
+    "    except OSError:\n"
+    "        table[path] = None\n"
+    "        continue\n"
+    "    table[path] = [st.st_mode & 0o7777, st.st_uid, st.st_gid]\n"
+    "print(json.dumps(table))\n"
+)
+
+# 结果缓存的输入指纹: 路径 -> [修改时间ns, 大小, SHA-256]
+FILE_DIGEST_SCRIPT = (
+    "import hashlib, json, os, sys\n"
+    "table = {}\n"
+    "for path in sys.argv[1:]:\n"
+    "    try:\n"
+    "        st = os.stat(path)\n"
+    "        with open(path, 'rb') as f:\n"
+    "            digest = hashlib.sha256(f.read()).hexdigest()\n"
+    "    except OSError:\n"
+    "        table[path] = None\n"
+    "        continue\n"
+    "    table[path] = [st.st_mtime_ns, st.st_size, digest]\n"
+    "print(json.dumps(table))\n"
+)
+
+
+def fact_commands():
+    """事实名称 -> 探测命令"""
+    return {
+        "selinux": ["sestatus"],
+        "listening_ports": ["ss", "-tuln"],
+        "processes": ["ps", "aux"],
+        "cpu_info": ["lscpu"],
+        "system_state": ["systemctl", "is-system-running"],
+        # 一次systemctl show查询全部服务的状态
+        "services": probes.systemctl_show_command(probed_services()),
+        "files": ["sh", "-c", FILE_CHECK_SCRIPT, "sh"] + CHECKED_FILES,
+        "sshd_config_check": ["sshd", "-t"],
+        # which只输出找到的命令路径
+        "package_managers": ["which", "yum", "dnf"]
+    }
+
+
+# 结果缓存的输入: 路径 -> probes.FileDigest，单元名 -> probes.UnitState，内核版本
+CacheInputs = namedtuple("CacheInputs", "digests units kernel")
+
+
+class ProbeResult(namedtuple("ProbeResult",
+                             "command returncode stdout stderr error duration")):
+    """单条探测命令的结果，error为None、TIMEOUT或NOT_FOUND"""
+
+    __slots__ = ()
+
+    @property
+    def timed_out(self):
+        return self.error == TIMEOUT
+
+    @property
+    def not_found(self):
+        return self.error == NOT_FOUND
+
+    @property
+    def ok(self):
+        return self.error is None and self.returncode == 0
+
+
+def run_fact(command):
+    """执行一条探测命令并转换为ProbeResult"""
+    command = tuple(command)
+    start = time.time()
+    try:
+        result = run_probe(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            timeout=deadline.timeout(Config.SERVICE_CHECK_TIMEOUT)
+        )
+        return ProbeResult(command, result.returncode, result.stdout, result.stderr,
+                           None, time.time() - start)
+    except subprocess.TimeoutExpired:
+        return ProbeResult(command, None, "", "", TIMEOUT, time.time() - start)
+    except FileNotFoundError:
+        return ProbeResult(command, None, "", "", NOT_FOUND, time.time() - start)
+
+
+def read_fact_file(path):
+    """读取文件类事实: 本地直接读取，远程模式经cat取回，结果格式一致
+
+    path为路径列表时依次尝试，返回第一个存在的文件 (如/etc/os-release缺失时的/usr/lib/os-release)。
+    """
+    paths = [path] if isinstance(path, str) else list(path)
+    if get_executor().mode == "remote":
+        if len(paths) == 1:
+            return run_fact(["cat", paths[0]])
+        # 只有最后一个候选的错误输出保留下来
+        script = " || ".join([f"cat {shlex.quote(p)} 2>/dev/null" for p in paths[:-1]]
+                             + [f"cat {shlex.quote(paths[-1])}"])
+        return run_fact(["sh", "-c", script])
+
+    start = time.time()
+    for candidate in paths:
+        try:
+            text = probes.read_text(candidate)
+        except FileNotFoundError as e:
+            error = e
+            continue
+        except OSError as e:
+            error = e
+            break
+        return ProbeResult(("cat", candidate), 0, text, "", None, time.time() - start)
+    return ProbeResult(("cat", candidate), 1, "", f"cat: {candidate}: {error.strerror}\n",
+                       None, time.time() - start)
+
+
+def collect_table(script, table_func, paths):
+    """对一组路径批量执行statvfs/stat: 本地直接调用table_func，远程模式在靶机上运行script
+
+    两种模式的输出都是 路径 -> 字段列表 的JSON，字段顺序与probes中的记录一致 (不含路径)。
+    """
+    command = ("python3", "-c", script) + tuple(paths)
+    if get_executor().mode == "remote":
+        return run_fact(command)
+
+    start = time.time()
+    table = {
+        path: list(record[1:]) if record else None
+        for path, record in table_func(paths).items()
+    }
+    return ProbeResult(command, 0, json.dumps(table) + "\n", "", None, time.time() - start)
+
+
+class HostFacts:
+    """不可变的主机事实快照"""
+
+    __slots__ = ("_host", "_mode", "_collected_at", "_results", "_parsed")
+
+    def __init__(self, host, mode, collected_at, results):
+        object.__setattr__(self, "_host", host)
+        object.__setattr__(self, "_mode", mode)
+        object.__setattr__(self, "_collected_at", collected_at)
+        object.__setattr__(self, "_results", MappingProxyType(dict(results)))
+        # 解析结果缓存，会话内其他测试复用
+        object.__setattr__(self, "_parsed", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("HostFacts快照不可修改")
+
+    @property
+    def host(self):
+        return self._host
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def collected_at(self):
+        return self._collected_at
+
+    def __getitem__(self, name):
+        return self._results[name]
+
+    def __contains__(self, name):
+        return name in self._results
+
+    def names(self):
+        return list(self._results)
+
+    def _cached(self, key, parse):
+        if key not in self._parsed:
+            self._parsed[key] = parse()
+        return self._parsed[key]
+
+    def os_release(self):
+        return probes.parse_os_release(self._results["os_release"].stdout)
+
+    def kernel_release(self):
+        return self._results["kernel"].stdout.strip()
+
+    def uptime(self):
+        return probes.parse_uptime(self._results["uptime"].stdout)
+
+    def load_average(self):
+        return probes.parse_loadavg(self._results["loadavg"].stdout)
+
+    def interfaces(self):
+        return probes.parse_net_dev(self._results["interfaces"].stdout)
+
+    def routes(self):
+        return probes.parse_net_route(self._results["routes"].stdout)
+
+    def mounts(self):
+        """挂载点 -> probes.MountInfo"""
+        return self._cached("mounts", lambda: probes.parse_mountinfo(self._results["mountinfo"].stdout))
+
+    def _table(self, name, record_type):
+        def parse():
+            result = self._results[name]
+            if not result.ok:
+                return {}
+            return {
+                path: record_type(path, *values) if values else None
+                for path, values in json.loads(result.stdout).items()
+            }
+        return self._cached(name, parse)
+
+    def fs_usage(self):
+        """路径 -> probes.FsUsage (路径不存在时为None)，覆盖Config.REQUIRED_MOUNT_POINTS"""
+        return self._table("statvfs", probes.FsUsage)
+
+    def file_modes(self):
+        """路径 -> probes.FileStat (路径不存在时为None)，覆盖Config.REQUIRED_SECURE_PERMISSIONS"""
+        return self._table("file_modes", probes.FileStat)
+
+    def units(self):
+        """服务名 -> probes.UnitState，未采集到时为空"""
+        result = self._results["services"]
+        if result.error:
+            return {}
+        return self._cached("units", lambda: probes.parse_systemctl_show(result.stdout, result.command[3:]))
+
+    def unit(self, service):
+        """单个服务的UnitState，未采集到时返回None"""
+        return self.units().get(service)
+
+    def service_state(self, service):
+        """服务的ActiveState (active、inactive等)，未采集到时返回None"""
+        unit = self.unit(service)
+        return unit.active_state if unit else None
+
+    def file_exists(self, path):
+        """配置文件是否存在，未采集到时返回None"""
+        result = self._results["files"]
+        if result.error:
+            return None
+        for line in result.stdout.splitlines():
+            flag, _, checked = line.partition(" ")
+            if checked == path:
+                return flag == "1"
+        return None
+
+    def package_managers(self):
+        """可用的包管理器命令名称列表"""
+        result = self._results["package_managers"]
+        return [line.strip().rsplit("/", 1)[-1] for line in result.stdout.splitlines() if line.strip()]
+
+    def to_dict(self):
+        return {
+            "host": self._host,
+            "mode": self._mode,
+            "collected_at": self._collected_at,
+            "facts": {name: result._asdict() for name, result in self._results.items()}
+        }
+
+    def export(self, path):
+        """导出为JSON文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """从导出的JSON文件加载快照"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        results = {}
+        for name, fact in data["facts"].items():
+            fact["command"] = tuple(fact["command"])
+            results[name] = ProbeResult(**fact)
+        return cls(data["host"], data["mode"], data["collected_at"], results)
+
+
+def file_digests(paths):
+    """路径 -> probes.FileDigest (不存在或不可读时为None)，远程模式下只调用一次python3"""
+    result = collect_table(FILE_DIGEST_SCRIPT, probes.digest_table, paths)
+    if not result.ok:
+        return {}
+    return {
+        path: probes.FileDigest(path, *values) if values else None
+        for path, values in json.loads(result.stdout).items()
+    }
+
+
+def unit_states(units):
+    """单元名 -> probes.UnitState，只查询给定的单元，未采集到时为空"""
+    result = run_fact(probes.systemctl_show_command(units))
+    if result.error:
+        return {}
+    return probes.parse_systemctl_show(result.stdout, units)
+
+
+def collect_cache_inputs(files, units, kernel):
+    """结果缓存的输入探测: 只采集测试声明的文件摘要、单元状态和内核版本，不执行完整的事实采集"""
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        digests = pool.submit(file_digests, sorted(files)) if files else None
+        states = pool.submit(unit_states, sorted(units)) if units else None
+        release = pool.submit(read_fact_file, FACT_FILES["kernel"]) if kernel else None
+        return CacheInputs(
+            digests.result() if digests else {},
+            states.result() if states else {},
+            release.result().stdout.strip() if release else None
+        )
+
+
+def collect_host_facts(workers=None):
+    """并发执行全部探测命令，返回HostFacts快照"""
+    executor = get_executor()
+    host = Config.REMOTE_HOST if executor.mode == "remote" else socket.gethostname()
+    commands = fact_commands()
+
+    with ThreadPoolExecutor(max_workers=workers or Config.HOST_FACTS_WORKERS) as pool:
+        futures = {name: pool.submit(run_fact, command) for name, command in commands.items()}
+        futures.update((name, pool.submit(read_fact_file, path)) for name, path in FACT_FILES.items())
+        futures["statvfs"] = pool.submit(collect_table, STATVFS_SCRIPT, probes.statvfs_table,
+                                         Config.REQUIRED_MOUNT_POINTS)
+        futures["file_modes"] = pool.submit(collect_table, FILE_STAT_SCRIPT, probes.stat_table,
+                                            list(Config.REQUIRED_SECURE_PERMISSIONS))
+        results = {name: future.result() for name, future in futures.items()}
+
+    return HostFacts(host, executor.mode, time.time(), results)
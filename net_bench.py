@@ -0,0 +1,188 @@
+"""
+本机回环网络基准测试
+
+自带TCP/UDP回显服务端，在127.0.0.1上测量:
+- TCP吞吐量: 每个流发送固定大小的消息并等待完整回显
+- UDP吞吐量: 每个流发送数据报并等待回显，超时未收到的计为丢包
+- TCP建连速率: 反复建立并关闭连接
+
+吞吐量为单方向有效载荷 (MB/s)，多个流在各自线程中并行运行。
+"""
+
+import socket
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+LOOPBACK = "127.0.0.1"
+# 服务端轮询停止标志的间隔
+POLL_INTERVAL = 0.2
+UDP_REPLY_TIMEOUT = 0.5
+MAX_UDP_PAYLOAD = 65507
+
+BenchResult = namedtuple("BenchResult", "name size streams value unit operations lost")
+
+
+class TcpEchoServer:
+    """TCP回显服务端，每个连接一个线程"""
+
+    def __init__(self, host=LOOPBACK):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, 0))
+        self.sock.listen(128)
+        self.sock.settimeout(POLL_INTERVAL)
+        self.port = self.sock.getsockname()[1]
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=self._echo, args=(conn,), daemon=True).start()
+
+    def _echo(self, conn):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.settimeout(POLL_INTERVAL)
+        with conn:
+            while not self._stopped.is_set():
+                try:
+                    data = conn.recv(262144)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+                if not data:
+                    return
+                conn.sendall(data)
+
+
+class UdpEchoServer:
+    """UDP回显服务端"""
+
+    def __init__(self, host=LOOPBACK):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        self.sock.settimeout(POLL_INTERVAL)
+        self.port = self.sock.getsockname()[1]
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            try:
+                data, address = self.sock.recvfrom(MAX_UDP_PAYLOAD)
+            except socket.timeout:
+                continue
+            self.sock.sendto(data, address)
+
+
+def _recv_exact(sock, size):
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 262144))
+        if not chunk:
+            raise ConnectionError("回显服务端提前关闭连接")
+        remaining -= len(chunk)
+
+
+def _run_streams(worker, streams):
+    """并行运行streams个worker，返回 (各worker结果列表, 总耗时)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=streams) as pool:
+        results = list(pool.map(lambda _: worker(), range(streams)))
+    return results, time.perf_counter() - start
+
+
+def tcp_throughput(port, size, streams=1, duration=1.0):
+    payload = b"x" * size
+
+    def worker():
+        sent = 0
+        with socket.create_connection((LOOPBACK, port)) as sock:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                sock.sendall(payload)
+                _recv_exact(sock, size)
+                sent += 1
+        return sent
+
+    counts, elapsed = _run_streams(worker, streams)
+    messages = sum(counts)
+    return BenchResult("tcp_throughput", size, streams, messages * size / elapsed / 1e6,
+                       "MB/s", messages, 0)
+
+
+def udp_throughput(port, size, streams=1, duration=1.0):
+    payload = b"x" * min(size, MAX_UDP_PAYLOAD)
+
+    def worker():
+        received = lost = 0
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(UDP_REPLY_TIMEOUT)
+            sock.connect((LOOPBACK, port))
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                sock.send(payload)
+                try:
+                    sock.recv(MAX_UDP_PAYLOAD)
+                    received += 1
+                except socket.timeout:
+                    lost += 1
+        return received, lost
+
+    counts, elapsed = _run_streams(worker, streams)
+    received = sum(count for count, _ in counts)
+    return BenchResult("udp_throughput", len(payload), streams,
+                       received * len(payload) / elapsed / 1e6, "MB/s",
+                       received, sum(lost for _, lost in counts))
+
+
+def tcp_connection_rate(port, streams=1, duration=1.0):
+    def worker():
+        connections = 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            socket.create_connection((LOOPBACK, port)).close()
+            connections += 1
+        return connections
+
+    counts, elapsed = _run_streams(worker, streams)
+    connections = sum(counts)
+    return BenchResult("tcp_connection_rate", 0, streams, connections / elapsed,
+                       "conn/s", connections, 0)
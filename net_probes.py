@@ -0,0 +1,240 @@
+"""
+异步网络探测
+
+基于asyncio同时解析全部域名、请求全部URL，整体受一个截止时间约束，
+最坏耗时不再是各目标超时之和。HTTP请求复用连接池中的keep-alive连接。
+
+每个目标记录DNS、TCP连接、TLS握手和首字节耗时 (毫秒)，供测试按p50/p95阈值断言。
+仅使用标准库，兼容Python 3.6 (不使用asyncio.run)。
+"""
+
+import asyncio
+import socket
+import ssl
+from collections import namedtuple
+from urllib.parse import urljoin, urlsplit
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+USER_AGENT = "vm-validation-probe/1.0"
+
+DnsTiming = namedtuple("DnsTiming", "host addresses dns_ms error")
+
+# dns_ms/connect_ms/tls_ms在复用连接时为0，total_ms包含重定向在内的全部耗时
+HttpTiming = namedtuple("HttpTiming", "url status dns_ms connect_ms tls_ms first_byte_ms "
+                                      "total_ms reused redirects error")
+
+
+def _elapsed_ms(loop, start):
+    return (loop.time() - start) * 1000
+
+
+class ConnectionPool:
+    """按 (协议, 主机, 端口) 缓存空闲的keep-alive连接"""
+
+    def __init__(self, ssl_context):
+        self.ssl_context = ssl_context
+        self._idle = {}
+
+    def acquire(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def release(self, key, connection):
+        self._idle.setdefault(key, []).append(connection)
+
+    def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+async def _read_body(reader, headers):
+    """读取响应体，返回连接是否可以复用"""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # 跳过trailer直到空行
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            await reader.readexactly(size + 2)
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return False
+    return headers.get("connection", "").lower() != "close"
+
+
+async def _request(loop, pool, url):
+    """发送一次GET请求，返回 (HttpTiming, Location头)"""
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    host = parts.hostname
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    key = (parts.scheme, host, port)
+
+    start = loop.time()
+    dns_ms = connect_ms = tls_ms = 0.0
+    connection = pool.acquire(key)
+    reused = connection is not None
+
+    if connection is None:
+        phase = loop.time()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        dns_ms = _elapsed_ms(loop, phase)
+
+        family, sock_type, proto, _, address = infos[0]
+        sock = socket.socket(family, sock_type, proto)
+        sock.setblocking(False)
+        phase = loop.time()
+        try:
+            await loop.sock_connect(sock, address)
+        except Exception:
+            sock.close()
+            raise
+        connect_ms = _elapsed_ms(loop, phase)
+
+        phase = loop.time()
+        if secure:
+            connection = await asyncio.open_connection(sock=sock, ssl=pool.ssl_context,
+                                                       server_hostname=host)
+            tls_ms = _elapsed_ms(loop, phase)
+        else:
+            connection = await asyncio.open_connection(sock=sock)
+
+    reader, writer = connection
+    try:
+        writer.write((
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            "Accept: */*\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("ascii"))
+
+        phase = loop.time()
+        status_line = await reader.readline()
+        first_byte_ms = _elapsed_ms(loop, phase)
+        if not status_line:
+            raise ConnectionError("服务器未返回响应")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if await _read_body(reader, headers):
+            pool.release(key, connection)
+        else:
+            writer.close()
+    except BaseException:
+        # 请求中途失败或被取消 (超过整体截止时间) 时连接状态未知，直接关闭
+        writer.close()
+        raise
+
+    timing = HttpTiming(url, status, dns_ms, connect_ms, tls_ms, first_byte_ms,
+                        _elapsed_ms(loop, start), reused, 0, None)
+    return timing, headers.get("location")
+
+
+async def fetch(loop, pool, url):
+    """请求URL并跟随重定向，返回最后一跳的HttpTiming"""
+    start = loop.time()
+    redirects = 0
+    try:
+        while True:
+            timing, location = await _request(loop, pool, url)
+            if timing.status in REDIRECT_STATUSES and location and redirects < MAX_REDIRECTS:
+                url = urljoin(url, location)
+                redirects += 1
+                continue
+            return timing._replace(total_ms=_elapsed_ms(loop, start), redirects=redirects)
+    except Exception as e:
+        return HttpTiming(url, None, 0.0, 0.0, 0.0, 0.0, _elapsed_ms(loop, start),
+                          False, redirects, f"{type(e).__name__}: {e}")
+
+
+async def resolve(loop, host):
+    start = loop.time()
+    try:
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        return DnsTiming(host, [], _elapsed_ms(loop, start), str(e))
+    addresses = sorted(set(info[4][0] for info in infos))
+    return DnsTiming(host, addresses, _elapsed_ms(loop, start), None)
+
+
+async def _fetch_samples(loop, pool, url, samples):
+    # 同一URL的多次请求依次进行，第一次之后复用连接池中的连接
+    return [await fetch(loop, pool, url) for _ in range(samples)]
+
+
+def _make_ssl_context(verify):
+    context = ssl.create_default_context()
+    if not verify:
+        # 测试环境中可能没有证书
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def _succeeded(task):
+    # 被取消的任务可能以CancelledError以外的异常结束，此时没有可用结果
+    return task.done() and not task.cancelled() and task.exception() is None
+
+
+async def _probe_all(loop, hosts, urls, samples, deadline, verify):
+    pool = ConnectionPool(_make_ssl_context(verify))
+    dns_tasks = [loop.create_task(resolve(loop, host)) for host in hosts]
+    http_tasks = [loop.create_task(_fetch_samples(loop, pool, url, samples)) for url in urls]
+
+    try:
+        _, pending = await asyncio.wait(dns_tasks + http_tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        # 等待被取消的任务真正结束，连接在关闭连接池之前释放，也不会留下未取回的异常
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        pool.close()
+
+    error = f"超过整体截止时间 {deadline}秒"
+    dns_results = [
+        task.result() if _succeeded(task)
+        else DnsTiming(host, [], deadline * 1000, error)
+        for host, task in zip(hosts, dns_tasks)
+    ]
+    http_results = []
+    for url, task in zip(urls, http_tasks):
+        if _succeeded(task):
+            http_results.extend(task.result())
+        else:
+            http_results.append(HttpTiming(url, None, 0.0, 0.0, 0.0, 0.0, deadline * 1000,
+                                           False, 0, error))
+    return dns_results, http_results
+
+
+def probe_network(hosts=(), urls=(), samples=1, deadline=10.0, verify=True):
+    """同时解析hosts、请求urls (每个URL请求samples次)，返回 (DnsTiming列表, HttpTiming列表)"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(
+            _probe_all(loop, list(hosts), list(urls), samples, deadline, verify))
+    finally:
+        loop.close()
@@ -0,0 +1,328 @@
+"""
+原生系统探测
+
+直接读取 /proc、/etc 下的文件并解析为类型化记录，不再启动 cat、uptime、ip 等子进程，
+也不依赖命令输出的人类可读格式。只读取普通用户可读的文件，无需特权。
+
+解析函数与读取函数分开: 远程模式下同样的文件经SSH cat取回后用相同的解析函数处理。
+多单元 systemctl show 的输出也在这里解析，一次调用即可取得全部服务状态。
+挂载信息来自 /proc/self/mountinfo 与 os.statvfs，不调用 df、mount。
+"""
+
+import hashlib
+import os
+import re
+import socket
+import struct
+from collections import namedtuple
+
+OS_RELEASE_PATHS = ["/etc/os-release", "/usr/lib/os-release"]
+PROC_UPTIME = "/proc/uptime"
+PROC_LOADAVG = "/proc/loadavg"
+PROC_KERNEL_RELEASE = "/proc/sys/kernel/osrelease"
+PROC_NET_DEV = "/proc/net/dev"
+PROC_NET_ROUTE = "/proc/net/route"
+PROC_MOUNTINFO = "/proc/self/mountinfo"
+
+# /proc/net/route 的路由标志位
+RTF_UP = 0x0001
+RTF_GATEWAY = 0x0002
+
+
+class OsRelease(namedtuple("OsRelease", "id name version_id pretty_name fields")):
+    """/etc/os-release 内容，fields为全部键值"""
+
+    __slots__ = ()
+
+
+Uptime = namedtuple("Uptime", "seconds idle_seconds")
+
+LoadAverage = namedtuple("LoadAverage", "load1 load5 load15 running total last_pid")
+
+Interface = namedtuple("Interface", "name rx_bytes rx_packets tx_bytes tx_packets")
+
+
+class UnitState(namedtuple("UnitState", "name load_state active_state sub_state "
+                                         "active_enter_timestamp state_change_timestamp")):
+    """systemd单元状态，时间戳为systemctl输出的原始字符串 (未启动过时为空)"""
+
+    __slots__ = ()
+
+    @property
+    def exists(self):
+        return self.load_state not in ("", "not-found")
+
+    @property
+    def is_active(self):
+        return self.active_state == "active"
+
+
+class MountInfo(namedtuple("MountInfo", "mount_id parent_id device root mount_point options "
+                                         "fs_type source super_options")):
+    """/proc/self/mountinfo 的一行，options为单次挂载的选项 (ro、noatime等)"""
+
+    __slots__ = ()
+
+    @property
+    def read_only(self):
+        return "ro" in self.options
+
+
+class FsUsage(namedtuple("FsUsage", "mount total_bytes free_bytes avail_bytes "
+                                    "total_inodes free_inodes read_only")):
+    """os.statvfs结果，avail_bytes为普通用户可用的空间"""
+
+    __slots__ = ()
+
+    @property
+    def free_inodes_percent(self):
+        if not self.total_inodes:
+            return None
+        return self.free_inodes / self.total_inodes * 100
+
+
+FileStat = namedtuple("FileStat", "path mode uid gid")
+FileDigest = namedtuple("FileDigest", "path mtime_ns size sha256")
+
+
+class Route(namedtuple("Route", "interface destination gateway mask flags metric")):
+    """IPv4路由表项，地址均为点分十进制字符串"""
+
+    __slots__ = ()
+
+    @property
+    def is_default(self):
+        return self.destination == "0.0.0.0" and self.mask == "0.0.0.0"
+
+    @property
+    def is_up(self):
+        return bool(self.flags & RTF_UP)
+
+
+def read_text(path):
+    """读取文本文件内容"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def parse_os_release(text):
+    fields = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        fields[key.strip()] = value
+    return OsRelease(fields.get("ID", ""), fields.get("NAME", ""), fields.get("VERSION_ID", ""),
+                     fields.get("PRETTY_NAME", ""), fields)
+
+
+def parse_uptime(text):
+    seconds, idle_seconds = text.split()[:2]
+    return Uptime(float(seconds), float(idle_seconds))
+
+
+def parse_loadavg(text):
+    load1, load5, load15, tasks, last_pid = text.split()[:5]
+    running, total = tasks.split("/")
+    return LoadAverage(float(load1), float(load5), float(load15),
+                       int(running), int(total), int(last_pid))
+
+
+def parse_net_dev(text):
+    """解析 /proc/net/dev，前两行为表头"""
+    interfaces = []
+    for line in text.splitlines()[2:]:
+        if ":" not in line:
+            continue
+        name, _, counters = line.partition(":")
+        values = counters.split()
+        interfaces.append(Interface(name.strip(), int(values[0]), int(values[1]),
+                                    int(values[8]), int(values[9])))
+    return interfaces
+
+
+# mountinfo中空格、制表符、换行和反斜杠以 \\ooo 八进制转义，其他字节 (包括UTF-8多字节字符) 原样输出
+_MOUNT_ESCAPE = re.compile(rb"\\([0-7]{3})")
+
+
+def _unescape_mount_path(path):
+    if "\\" not in path:
+        return path
+    raw = path.encode("utf-8", "surrogateescape")
+    raw = _MOUNT_ESCAPE.sub(lambda match: bytes([int(match.group(1), 8)]), raw)
+    return raw.decode("utf-8", "surrogateescape")
+
+
+def parse_mountinfo(text):
+    """解析 /proc/self/mountinfo，返回 挂载点 -> MountInfo
+
+    同一挂载点被多次挂载时保留最后一条，即当前可见的挂载。
+    """
+    mounts = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if "-" not in fields:
+            continue
+        # 第7列起为可选字段，以单独的 "-" 结束
+        separator = fields.index("-")
+        mount_point = _unescape_mount_path(fields[4])
+        mounts[mount_point] = MountInfo(
+            int(fields[0]), int(fields[1]), fields[2], _unescape_mount_path(fields[3]),
+            mount_point, tuple(fields[5].split(",")), fields[separator + 1],
+            fields[separator + 2], tuple(fields[separator + 3].split(","))
+        )
+    return mounts
+
+
+def statvfs_table(paths):
+    """对每个路径调用一次os.statvfs，返回 路径 -> FsUsage (路径不存在时为None)"""
+    table = {}
+    for path in paths:
+        try:
+            st = os.statvfs(path)
+        except OSError:
+            table[path] = None
+            continue
+        table[path] = FsUsage(path, st.f_blocks * st.f_frsize, st.f_bfree * st.f_frsize,
+                              st.f_bavail * st.f_frsize, st.f_files, st.f_favail,
+                              bool(st.f_flag & os.ST_RDONLY))
+    return table
+
+
+def stat_table(paths):
+    """对每个路径调用一次os.stat，返回 路径 -> FileStat (路径不存在时为None)"""
+    table = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            table[path] = None
+            continue
+        table[path] = FileStat(path, st.st_mode & 0o7777, st.st_uid, st.st_gid)
+    return table
+
+
+def digest_table(paths):
+    """对每个文件计算 修改时间+大小+SHA-256，返回 路径 -> FileDigest (不存在或不可读时为None)"""
+    table = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    digest.update(chunk)
+        except OSError:
+            table[path] = None
+            continue
+        table[path] = FileDigest(path, st.st_mtime_ns, st.st_size, digest.hexdigest())
+    return table
+
+
+# 批量查询单元状态时读取的属性
+UNIT_PROPERTIES = ["Id", "Names", "LoadState", "ActiveState", "SubState",
+                   "ActiveEnterTimestamp", "StateChangeTimestamp"]
+
+
+def systemctl_show_command(units):
+    """一次查询多个单元状态的systemctl命令"""
+    return ["systemctl", "show", "--property=" + ",".join(UNIT_PROPERTIES)] + list(units)
+
+
+def _unit_names(unit):
+    # 不带类型后缀的单元名由systemctl按.service处理
+    if "." in unit:
+        return [unit]
+    return [unit, unit + ".service"]
+
+
+def parse_systemctl_show(text, units):
+    """解析多单元 systemctl show 输出
+
+    每个单元输出一段 "键=值"，段之间以空行分隔。单元名无效时systemctl不输出该段，
+    因此按段中的Id和Names (包括别名) 对应到调用时传入的单元，而不是按位置。
+    返回 单元名 -> UnitState，单元名为调用时传入的名称，没有对应段的单元不出现在结果中。
+    """
+    blocks = []
+    current = {}
+    for line in text.splitlines():
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition("=")
+        current[key] = value
+    if current:
+        blocks.append(current)
+
+    by_name = {}
+    for block in blocks:
+        for name in [block.get("Id", "")] + block.get("Names", "").split():
+            if name:
+                by_name.setdefault(name, block)
+
+    states = {}
+    for unit in units:
+        block = next((by_name[name] for name in _unit_names(unit) if name in by_name), None)
+        if block is None:
+            continue
+        states[unit] = UnitState(unit, block.get("LoadState", ""), block.get("ActiveState", ""),
+                                 block.get("SubState", ""), block.get("ActiveEnterTimestamp", ""),
+                                 block.get("StateChangeTimestamp", ""))
+    return states
+
+
+def _hex_to_ipv4(value):
+    # /proc/net/route 中的地址按主机字节序输出为十六进制 (x86与ARM上为小端)
+    return socket.inet_ntoa(struct.pack("=L", int(value, 16)))
+
+
+def parse_net_route(text):
+    """解析 /proc/net/route，首行为表头"""
+    routes = []
+    for line in text.splitlines()[1:]:
+        columns = line.split()
+        if len(columns) < 8:
+            continue
+        routes.append(Route(columns[0], _hex_to_ipv4(columns[1]), _hex_to_ipv4(columns[2]),
+                            _hex_to_ipv4(columns[7]), int(columns[3], 16), int(columns[6])))
+    return routes
+
+
+def read_os_release():
+    """读取发行版信息，/etc/os-release不存在时回退到/usr/lib/os-release"""
+    for path in OS_RELEASE_PATHS:
+        try:
+            return parse_os_release(read_text(path))
+        except FileNotFoundError:
+            continue
+    raise FileNotFoundError(OS_RELEASE_PATHS[0])
+
+
+def read_uptime():
+    return parse_uptime(read_text(PROC_UPTIME))
+
+
+def read_loadavg():
+    return parse_loadavg(read_text(PROC_LOADAVG))
+
+
+def read_kernel_release():
+    return read_text(PROC_KERNEL_RELEASE).strip()
+
+
+def read_interfaces():
+    return parse_net_dev(read_text(PROC_NET_DEV))
+
+
+def read_routes():
+    return parse_net_route(read_text(PROC_NET_ROUTE))
+
+
+def read_mountinfo():
+    return parse_mountinfo(read_text(PROC_MOUNTINFO))
@@ -0,0 +1,196 @@
+"""
+探测命令执行器
+
+测试用例中的探测命令统一经 run_probe() 执行，接口与 subprocess.run 一致:
+- TEST_MODE=local  在本机执行
+- TEST_MODE=remote 在 REMOTE_HOST 上执行，整个pytest会话共用连接池 (ssh_pool.py) 中的
+  一条SSH连接，每条命令是该连接上的一个独立通道 (多路复用)，连接断开时自动重连
+
+远程模式下记录每条探测命令的耗时，会话结束时由conftest输出汇总。
+Python层面的探测 (psutil、socket等) 仍在本机执行。
+"""
+
+import errno
+import logging
+import os
+import shlex
+import socket
+import subprocess
+import threading
+import time
+
+import deadline
+from config import Config
+from stats import percentile
+
+logger = logging.getLogger("remote_exec")
+
+# 远程命令不存在时shell的退出码，映射为与本地一致的FileNotFoundError
+COMMAND_NOT_FOUND = 127
+
+
+class LocalExecutor:
+    """本机执行器，直接调用subprocess.run"""
+
+    mode = "local"
+
+    def __init__(self):
+        self.records = []
+
+    def run(self, args, **kwargs):
+        return subprocess.run(args, **kwargs)
+
+    def close(self):
+        pass
+
+
+class RemoteExecutor:
+    """远程执行器: 连接池中的一条持久SSH连接，每条命令一个通道"""
+
+    mode = "remote"
+
+    def __init__(self, hostname, username, key_filename=None, port=22, password=None):
+        self.hostname = hostname
+        self.username = username
+        self.key_filename = key_filename
+        self.port = port
+        self.password = password
+        self.connection = None
+        # (命令, 耗时秒, 退出码)，退出码为None表示超时
+        self.records = []
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """从连接池取得会话级SSH连接"""
+        # 连接池依赖paramiko，只在远程模式下导入
+        from ssh_pool import default_pool
+
+        connect_kwargs = {"timeout": deadline.timeout(Config.NETWORK_TIMEOUT)}
+        key_path = os.path.expanduser(self.key_filename) if self.key_filename else None
+        if key_path and os.path.exists(key_path):
+            connect_kwargs["key_filename"] = key_path
+        if self.password:
+            connect_kwargs["password"] = self.password
+
+        start = time.time()
+        self.connection = default_pool.get(self.hostname, self.port, self.username, **connect_kwargs)
+        logger.info("SSH连接已建立 %s@%s:%s (%.1fms)", self.username, self.hostname,
+                    self.port, (time.time() - start) * 1000)
+        return self
+
+    def run(self, args, input=None, stdout=None, stderr=None, capture_output=False,
+            universal_newlines=False, text=False, timeout=None, check=False, **kwargs):
+        """在远程主机上执行命令，返回subprocess.CompletedProcess
+
+        支持subprocess.run的input、capture_output、check参数，其他参数 (stdin、cwd、env等)
+        无法在远程通道上等价实现，传入时抛出TypeError。
+        超时抛出subprocess.TimeoutExpired，命令不存在抛出FileNotFoundError，
+        check为真且退出码非0时抛出subprocess.CalledProcessError，与本地执行的异常保持一致。
+        """
+        if kwargs:
+            raise TypeError(f"远程执行不支持参数: {', '.join(sorted(kwargs))}")
+        if capture_output:
+            if stdout is not None or stderr is not None:
+                raise ValueError("stdout和stderr参数不能与capture_output同时使用")
+            stdout = stderr = subprocess.PIPE
+
+        command = args if isinstance(args, str) else " ".join(shlex.quote(a) for a in args)
+        text = universal_newlines or text
+        if isinstance(input, str):
+            input = input.encode("utf-8")
+
+        start = time.time()
+        try:
+            returncode, out, err, seconds = self.connection.run(
+                command, stdin=input, timeout=timeout,
+                combine_stderr=stderr == subprocess.STDOUT)
+        except socket.timeout:
+            self._record(command, time.time() - start, None)
+            raise subprocess.TimeoutExpired(args, timeout)
+
+        self._record(command, seconds, returncode)
+
+        if returncode == COMMAND_NOT_FOUND:
+            name = args.split()[0] if isinstance(args, str) else args[0]
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), name)
+
+        if stderr == subprocess.STDOUT:
+            err = stderr = None
+        if text:
+            out = out.decode("utf-8", "replace")
+            err = err.decode("utf-8", "replace") if err is not None else None
+        result = subprocess.CompletedProcess(
+            args, returncode,
+            out if stdout is not None else None,
+            err if stderr is not None else None
+        )
+        if check:
+            result.check_returncode()
+        return result
+
+    def _record(self, command, seconds, returncode):
+        with self._lock:
+            self.records.append((command, seconds, returncode))
+        logger.info("探测 %-40s %8.1fms 退出码=%s", command[:40], seconds * 1000, returncode)
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """返回会话级执行器，按Config.TEST_MODE选择本地或远程，远程模式首次调用时建立连接"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if Config.TEST_MODE == "remote":
+                _executor = RemoteExecutor(
+                    Config.REMOTE_HOST,
+                    Config.REMOTE_USER,
+                    key_filename=Config.SSH_KEY_PATH,
+                    port=Config.REMOTE_PORT,
+                    password=Config.REMOTE_PASSWORD
+                ).connect()
+            else:
+                _executor = LocalExecutor()
+        return _executor
+
+
+def close_executor():
+    """关闭会话级执行器，返回其探测耗时记录"""
+    global _executor
+    with _executor_lock:
+        records = []
+        if _executor is not None:
+            records = _executor.records
+            _executor.close()
+            _executor = None
+        return records
+
+
+def target_host():
+    """被测主机的标识: 远程模式为REMOTE_HOST，本地模式为本机主机名"""
+    if Config.TEST_MODE == "remote":
+        return Config.REMOTE_HOST
+    return socket.gethostname()
+
+
+def run_probe(args, **kwargs):
+    """执行探测命令，参数与subprocess.run相同"""
+    return get_executor().run(args, **kwargs)
+
+
+def latency_summary(records):
+    """汇总探测耗时: 返回 (次数, 总耗时, p50, p95, 最慢的若干条)"""
+    durations = [seconds for _, seconds, _ in records]
+    if not durations:
+        return None
+
+    slowest = sorted(records, key=lambda record: record[1], reverse=True)[:5]
+    return (len(durations), sum(durations), percentile(durations, 50), percentile(durations, 95),
+            slowest)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+资源持续监控
+
+后台线程按固定间隔采样CPU、内存、交换空间、磁盘与网络计数器 (磁盘/网络换算为每秒速率)，
+样本写入固定容量的环形缓冲区: 每个指标一个 array('d')，写满后覆盖最旧的样本，
+无论运行多久内存占用都不变。检查在滑动窗口上进行，如 "5分钟内CPU使用率p95 < 90%"。
+
+使用示例:
+  python3 resource_monitor.py               # 持续监控，Ctrl+C结束
+  python3 resource_monitor.py --duration 600
+"""
+
+import argparse
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+import psutil
+
+from config import Config
+from stats import percentile
+
+METRICS = ("timestamp", "cpu_percent", "memory_percent", "swap_percent",
+           "disk_read_bps", "disk_write_bps", "net_rx_bps", "net_tx_bps")
+
+Sample = namedtuple("Sample", METRICS)
+WindowCheck = namedtuple("WindowCheck", "metric window percentile limit")
+CheckResult = namedtuple("CheckResult", "check value samples ok")
+
+
+class RingBuffer:
+    """定长环形缓冲区，按指标分列存放样本"""
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._columns = {metric: array("d", bytes(8 * self.capacity)) for metric in METRICS}
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, sample):
+        with self._lock:
+            for metric, value in zip(METRICS, sample):
+                self._columns[metric][self._next] = value
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def _indexes(self):
+        """按时间顺序 (从旧到新) 返回有效样本的下标"""
+        start = (self._next - self._size) % self.capacity
+        return [(start + offset) % self.capacity for offset in range(self._size)]
+
+    def window(self, metric, seconds, now=None):
+        """返回最近seconds秒内该指标的样本值 (从旧到新)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            timestamps = self._columns["timestamp"]
+            values = self._columns[metric]
+            return [values[index] for index in self._indexes()
+                    if timestamps[index] >= now - seconds]
+
+    def latest(self):
+        """最新的一个样本，缓冲区为空时返回None"""
+        with self._lock:
+            if not self._size:
+                return None
+            index = (self._next - 1) % self.capacity
+            return Sample(*(self._columns[metric][index] for metric in METRICS))
+
+
+def _rate(current, previous, field, elapsed):
+    if current is None or previous is None or elapsed <= 0:
+        return 0.0
+    return max(0, getattr(current, field) - getattr(previous, field)) / elapsed
+
+
+class ResourceSampler(threading.Thread):
+    """后台采样线程，按固定节拍采样 (不因采样本身的耗时而漂移)"""
+
+    def __init__(self, interval=None, capacity=None):
+        super().__init__(name="resource-sampler", daemon=True)
+        self.interval = interval or Config.WATCH_INTERVAL
+        self.buffer = RingBuffer(capacity or Config.WATCH_BUFFER_SIZE)
+        self._stop_event = threading.Event()
+        self._previous = None
+
+    def _counters(self):
+        # 容器等环境中可能没有磁盘计数器，此时返回None
+        return time.time(), psutil.disk_io_counters(), psutil.net_io_counters()
+
+    def sample(self):
+        """采集一个样本并写入缓冲区"""
+        now, disk, net = self._counters()
+        if self._previous is None:
+            elapsed, previous_disk, previous_net = 0, None, None
+        else:
+            elapsed = now - self._previous[0]
+            previous_disk, previous_net = self._previous[1:]
+        self._previous = (now, disk, net)
+
+        sample = Sample(
+            now,
+            psutil.cpu_percent(interval=None),
+            psutil.virtual_memory().percent,
+            psutil.swap_memory().percent,
+            _rate(disk, previous_disk, "read_bytes", elapsed),
+            _rate(disk, previous_disk, "write_bytes", elapsed),
+            _rate(net, previous_net, "bytes_recv", elapsed),
+            _rate(net, previous_net, "bytes_sent", elapsed)
+        )
+        self.buffer.append(sample)
+        return sample
+
+    def run(self):
+        # 第一次调用cpu_percent只建立基准，返回值无意义
+        psutil.cpu_percent(interval=None)
+        self._previous = self._counters()
+        next_tick = time.monotonic() + self.interval
+        while not self._stop_event.wait(max(0, next_tick - time.monotonic())):
+            self.sample()
+            next_tick += self.interval
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def evaluate(buffer, checks=None, now=None):
+    """对每个滑动窗口检查计算百分位数，窗口内没有样本时value为None且视为通过"""
+    results = []
+    for check in (checks or Config.WATCH_CHECKS):
+        check = WindowCheck(*check)
+        values = buffer.window(check.metric, check.window, now)
+        value = percentile(values, check.percentile)
+        results.append(CheckResult(check, value, len(values), value is None or value < check.limit))
+    return results
+
+
+def format_check(result):
+    check = result.check
+    label = f"{check.metric} p{check.percentile} ({check.window}秒)"
+    if result.value is None:
+        return f"  - {label:<32} 无样本"
+    status = "✓" if result.ok else "✗"
+    return f"  {status} {label:<32} {result.value:>7.1f} (上限 {check.limit}, {result.samples}个样本)"
+
+
+def format_sample(sample):
+    return (f"CPU {sample.cpu_percent:5.1f}%  内存 {sample.memory_percent:5.1f}%  "
+            f"交换 {sample.swap_percent:5.1f}%  "
+            f"磁盘 读{sample.disk_read_bps / 1e6:.1f}/写{sample.disk_write_bps / 1e6:.1f} MB/s  "
+            f"网络 收{sample.net_rx_bps / 1e6:.1f}/发{sample.net_tx_bps / 1e6:.1f} MB/s")
+
+
+def watch(duration=None, interval=None, report_interval=None):
+    """启动采样线程并定期报告窗口检查结果，返回最后一次检查是否全部通过
+
+    duration为None时一直运行到Ctrl+C。
+    """
+    report_interval = report_interval or Config.WATCH_REPORT_INTERVAL
+    sampler = ResourceSampler(interval)
+    sampler.start()
+    print(f"开始监控: 采样间隔 {sampler.interval}秒, 缓冲区 {sampler.buffer.capacity} 个样本, "
+          f"每 {report_interval}秒 报告一次 (Ctrl+C结束)")
+
+    deadline = time.monotonic() + duration if duration else None
+    results = []
+    try:
+        while True:
+            wait = report_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+            if wait > 0:
+                time.sleep(wait)
+
+            results = evaluate(sampler.buffer)
+            latest = sampler.buffer.latest()
+            print(f"\n[{time.strftime('%H:%M:%S')}] " + (format_sample(latest) if latest else "等待样本"))
+            for result in results:
+                print(format_check(result))
+
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    except KeyboardInterrupt:
+        print("\n监控已停止")
+        results = evaluate(sampler.buffer)
+    finally:
+        sampler.stop()
+
+    return all(result.ok for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源持续监控")
+    parser.add_argument("--duration", type=float, help="监控秒数 (默认: 一直运行到Ctrl+C)")
+    parser.add_argument("--interval", type=float, default=Config.WATCH_INTERVAL,
+                        help=f"采样间隔秒数 (默认: {Config.WATCH_INTERVAL})")
+    parser.add_argument("--report-interval", type=float, default=Config.WATCH_REPORT_INTERVAL,
+                        help=f"报告间隔秒数 (默认: {Config.WATCH_REPORT_INTERVAL})")
+    args = parser.parse_args()
+
+    return 0 if watch(args.duration, args.interval, args.report_interval) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+增量测试结果缓存
+
+测试用 @pytest.mark.inputs(files=[...], units=[...], kernel=True) 声明自己的输入。
+启用缓存 (RESULT_CACHE=true) 后，每个声明了输入的测试在运行后保存输入指纹与结果:
+- 文件: 修改时间、大小、SHA-256
+- systemd单元: 加载/运行状态及状态变化时间 (重启会使指纹变化)
+- 内核版本
+- 主机名、测试文件与config.py的内容
+
+再次运行时指纹一致的测试不执行测试体，直接报告上次的结果并标记为cached。
+没有声明输入的测试总是正常运行。并行分组共用同一个缓存文件，写入时加文件锁并合并。
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+CACHE_VERSION = 1
+
+CachedResult = namedtuple("CachedResult", "outcome message")
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def fingerprint(inputs, host, sources, probed):
+    """计算一个测试的输入指纹
+
+    inputs为inputs标记的参数字典，sources为 源文件路径 -> SHA-256 (测试文件与config.py)，
+    probed为host_facts.CacheInputs (声明的文件摘要、单元状态与内核版本)。
+    """
+    payload = {
+        "host": host,
+        "sources": sources,
+        "files": {},
+        "units": {},
+        "kernel": probed.kernel if inputs.get("kernel") else None
+    }
+    for path in inputs.get("files", ()):
+        digest = probed.digests.get(path)
+        payload["files"][path] = list(digest[1:]) if digest else None
+    for name in inputs.get("units", ()):
+        unit = probed.units.get(name)
+        payload["units"][name] = list(unit[1:]) if unit else None
+
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """测试ID -> (指纹, 结果) 的JSON缓存"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = self._load()
+        self._updates = {}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("results", {})
+
+    def lookup(self, nodeid, digest):
+        """指纹一致时返回CachedResult，否则返回None"""
+        entry = self.entries.get(nodeid)
+        if entry is None or entry["fingerprint"] != digest:
+            return None
+        return CachedResult(entry["outcome"], entry["message"])
+
+    def record(self, nodeid, digest, outcome, message=""):
+        self._updates[nodeid] = {"fingerprint": digest, "outcome": outcome, "message": message}
+
+    def save(self):
+        """与磁盘上的最新内容合并后原子替换 (并行分组可能同时写入)"""
+        if not self._updates:
+            return
+
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            results = self._load()
+            results.update(self._updates)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "results": results}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        self.entries.update(self._updates)
+        self._updates = {}
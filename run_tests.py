@@ -8,44 +8,98 @@
 import subprocess
 import sys
 import argparse
+import faulthandler
+import glob
+import importlib.util
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
-
-
-def run_command(command, description):
-    """执行命令并返回结果"""
+import re
+
+# 可并行执行的测试标记分组
+TEST_GROUPS = ['system', 'network', 'service', 'hardware', 'security']
+# 需要单独执行的测试标记 (如CPU使用率采样，不能与其他测试同时运行)
+ISOLATED_MARKER = 'isolated'
+# pytest退出码: 没有收集到测试
+PYTEST_NO_TESTS = 5
+# 单条命令的超时秒数
+COMMAND_TIMEOUT = 300
+# 时间预算模式下，pytest子进程在剩余预算之外留给解释器启动与会话收尾的秒数
+BUDGET_GRACE = 30
+# -X importtime 的输出行: "import time: 自身微秒 | 累计微秒 | 缩进+模块名"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def print_command_header(command, description):
     print(f"\n{'='*60}")
     print(f"执行: {description}")
     print(f"命令: {' '.join(command)}")
     print(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print('='*60)
 
+
+def command_timeout():
+    """测试运行的整体超时: 时间预算模式下为剩余预算加上收尾时间，且不超过COMMAND_TIMEOUT"""
+    import deadline
+    left = deadline.remaining()
+    if left is None:
+        return COMMAND_TIMEOUT
+    return min(COMMAND_TIMEOUT, left + BUDGET_GRACE)
+
+
+def run_command(command, description, timeout=COMMAND_TIMEOUT):
+    """执行命令并返回结果"""
+    print_command_header(command, description)
+
+    # 子进程输出逐行转发，不在内存中累积；子进程的Python输出不经缓冲
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
     try:
-        result = subprocess.run(
+        process = subprocess.Popen(
             command,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             universal_newlines=True,
-            timeout=300  # 5分钟超时
+            env=env,
+            start_new_session=True
         )
+        timed_out = threading.Event()
+
+        def kill():
+            # 结束整个进程组，否则仍持有输出管道的孙进程会让读取一直阻塞
+            timed_out.set()
+            os.killpg(process.pid, signal.SIGKILL)
 
-        if result.returncode == 0:
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            for line in process.stdout:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            # 子进程在独立会话中收不到终端的Ctrl+C，中断时由这里结束
+            if process.poll() is None:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+
+        if timed_out.is_set():
+            print("✗ 执行超时")
+            return False
+        if returncode == 0:
             print("✓ 执行成功")
-            if result.stdout:
-                print("输出:")
-                print(result.stdout)
         else:
             print("✗ 执行失败")
-            print(f"错误码: {result.returncode}")
-            if result.stderr:
-                print("错误信息:")
-                print(result.stderr)
+            print(f"错误码: {returncode}")
 
-        return result.returncode == 0
+        return returncode == 0
 
-    except subprocess.TimeoutExpired:
-        print("✗ 执行超时")
-        return False
     except Exception as e:
         print(f"✗ 执行异常: {e}")
         return False
@@ -91,15 +145,10 @@ def check_environment():
     except:
         print("✗ 无法读取操作系统信息")
 
-    # 检查关键依赖包
+    # 检查关键依赖包: 只查找模块位置，不实际导入 (导入requests等包本身就要几十毫秒)
     required_packages = ['pytest', 'psutil', 'requests']
-    missing_packages = []
-
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    missing_packages = [package for package in required_packages
+                        if importlib.util.find_spec(package) is None]
 
     if missing_packages:
         print(f"✗ 缺少必要的依赖包: {', '.join(missing_packages)}")
@@ -121,6 +170,34 @@ def check_environment():
     return True
 
 
+def run_pytest_in_process(args, description, timeout=COMMAND_TIMEOUT):
+    """在当前解释器中运行pytest，省去再启动一个解释器并重新导入pytest的开销
+
+    与子进程方式一样受整体超时限制: 超时后输出全部线程的调用栈并以退出码1结束进程。
+    看门狗由faulthandler的C线程执行，卡在SSH读取等阻塞调用中时同样有效。
+    """
+    print_command_header(['pytest'] + args, description)
+    print(f"整体超时: {timeout:.0f}秒")
+    sys.stdout.flush()
+
+    import pytest
+    # pytest在测试期间捕获文件描述符2，调用栈写到原stderr的副本上才能显示出来
+    stderr = os.fdopen(os.dup(sys.stderr.fileno()), 'w')
+    faulthandler.dump_traceback_later(timeout, exit=True, file=stderr)
+    try:
+        returncode = int(pytest.main(args))
+    finally:
+        faulthandler.cancel_dump_traceback_later()
+        stderr.close()
+
+    if returncode == 0:
+        print("✓ 执行成功")
+    else:
+        print("✗ 执行失败")
+        print(f"错误码: {returncode}")
+    return returncode == 0
+
+
 def install_dependencies():
     """安装测试依赖"""
     print("\n安装测试依赖...")
@@ -138,9 +215,10 @@ def install_dependencies():
     return True
 
 
-def run_tests(test_type=None, verbose=False, html_report=False):
-    """运行测试"""
+def run_tests(test_type=None, verbose=False, html_report=False, pytest_args=(), in_process=True):
+    """运行测试: 默认在当前进程内运行pytest，in_process为False时启动子进程，两种方式都受command_timeout()限制"""
     command = ['python3', '-m', 'pytest']
+    command.extend(pytest_args)
 
     if test_type:
         if test_type == 'all':
@@ -159,7 +237,239 @@ def run_tests(test_type=None, verbose=False, html_report=False):
     # 设置测试路径
     command.append('tests/')
 
-    return run_command(command, f'运行{test_type or "所有"}测试')
+    description = f'运行{test_type or "所有"}测试'
+    if in_process:
+        return run_pytest_in_process(command[3:], description, timeout=command_timeout())
+    return run_command(command, description, timeout=command_timeout())
+
+
+def profile_startup(test_type=None, top=20):
+    """以 -X importtime 运行一次只收集测试的pytest，输出各模块的导入耗时"""
+    if sys.version_info < (3, 7):
+        print("✗ --profile-startup 需要Python 3.7+ (-X importtime)")
+        return False
+
+    # -s: 收集阶段不捕获stderr，否则测试模块的导入耗时会被pytest吞掉
+    command = [sys.executable, '-X', 'importtime', '-m', 'pytest', '--collect-only', '-q', '-s']
+    if test_type:
+        command.extend(['-m', test_type])
+    command.append('tests/')
+
+    start = time.time()
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            universal_newlines=True, timeout=COMMAND_TIMEOUT)
+    wall_time = time.time() - start
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+
+    project_modules = {os.path.splitext(os.path.basename(path))[0]
+                       for path in glob.glob('*.py') + glob.glob('tests/*.py')}
+
+    print(f"\n{'='*60}")
+    print(f"启动耗时分析: {' '.join(command[1:])}")
+    print('='*60)
+    print(f"启动到收集完成: {wall_time * 1000:.0f}ms，"
+          f"导入 {len(imports)} 个模块合计 {sum(item[1] for item in imports) / 1000:.0f}ms")
+
+    print(f"\n顶层导入 (按累计耗时，前{top}个):")
+    top_level = sorted((item for item in imports if item[3] == 0), key=lambda item: -item[2])
+    for name, self_us, cumulative_us, _ in top_level[:top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  (自身 {self_us / 1000:6.1f}ms)  {name}")
+
+    print("\n项目模块:")
+    for name, self_us, cumulative_us, depth in imports:
+        if name in project_modules or name.startswith('tests.'):
+            print(f"  {cumulative_us / 1000:8.1f}ms  (自身 {self_us / 1000:6.1f}ms)  {'  ' * depth}{name}")
+
+    return result.returncode in (0, PYTEST_NO_TESTS)
+
+
+def print_trend(host=None):
+    """输出耗时历史的趋势报告，返回是否没有回归"""
+    from config import Config
+    from remote_exec import target_host
+    from timing_store import trend
+
+    host = host or target_host()
+    rows = trend(host)
+    print(f"\n{'='*60}")
+    print(f"测试耗时趋势: {host} (每个测试最近 {Config.TIMING_TREND_SAMPLES} 次，"
+          f"最近 {Config.TIMING_RECENT_SAMPLES} 次与之前比较)")
+    print('='*60)
+    if not rows:
+        print(f"没有耗时记录: {Config.TIMING_DB}")
+        return True
+
+    print(f"  {'p50':>9} {'p95':>9} {'最近一次':>9} {'最近/之前p50':>17} {'次数':>4}  测试")
+    for row in rows:
+        change = '-'
+        if row.recent_p50 is not None:
+            change = f"{row.recent_p50 * 1000:.0f}/{row.baseline_p50 * 1000:.0f}ms"
+        print(f"{'✗' if row.regressed else ' '} {row.p50 * 1000:7.1f}ms {row.p95 * 1000:7.1f}ms "
+              f"{row.latest * 1000:7.1f}ms {change:>17} {row.samples:>4}  {row.nodeid}")
+
+    regressed = [row for row in rows if row.regressed]
+    if regressed:
+        print(f"\n✗ {len(regressed)} 个测试耗时回归 (慢于之前中位数 {Config.TIMING_REGRESSION_PERCENT:.0f}% "
+              f"且至少 {Config.TIMING_REGRESSION_MIN_MS:.0f}ms)")
+    else:
+        print("\n✓ 没有耗时回归")
+    return not regressed
+
+
+def run_pytest_unit(label, marker_expr, workdir, verbose=False, env=None, pytest_args=()):
+    """执行一个pytest单元，捕获输出并生成JUnit XML，返回执行结果"""
+    junit_path = os.path.join(workdir, f"{label}.xml")
+    command = ['python3', '-m', 'pytest', '-m', marker_expr, f'--junitxml={junit_path}']
+    command.extend(pytest_args)
+    if verbose:
+        command.append('-v')
+    command.append('tests/')
+
+    # 时间预算模式下每个单元只获得启动时剩余的预算
+    import deadline
+    left = deadline.remaining()
+    if left is not None:
+        budget = max(left, deadline.MIN_TIMEOUT)
+        env = dict(env if env is not None else os.environ, TEST_BUDGET=f"{budget:.1f}")
+
+    # 输出直接写入日志文件，不在内存中保存
+    log_path = os.path.join(workdir, f"{label}.log")
+    start = time.time()
+    with open(log_path, 'w') as log:
+        try:
+            returncode = subprocess.run(
+                command,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env=env,
+                timeout=command_timeout()
+            ).returncode
+        except subprocess.TimeoutExpired:
+            returncode = None
+            log.write('\n执行超时\n')
+
+    return {
+        'label': label,
+        'command': command,
+        'returncode': returncode,
+        'log_path': log_path,
+        'elapsed': time.time() - start,
+        'junit_path': junit_path
+    }
+
+
+def print_log(path):
+    with open(path) as f:
+        shutil.copyfileobj(f, sys.stdout)
+
+
+def load_junit_cases(junit_path):
+    """读取JUnit XML中的测试用例结果"""
+    if not os.path.exists(junit_path):
+        return []
+
+    cases = []
+    for case in ET.parse(junit_path).getroot().iter('testcase'):
+        outcome, message = 'passed', ''
+        for tag in ('failure', 'error', 'skipped'):
+            node = case.find(tag)
+            if node is not None:
+                outcome = {'failure': 'failed', 'error': 'error', 'skipped': 'skipped'}[tag]
+                message = node.get('message', '')
+                break
+        cached = any(prop.get('name') == 'cached' and prop.get('value') == 'true'
+                     for prop in case.iter('property'))
+        cases.append({
+            'classname': case.get('classname', ''),
+            'name': case.get('name', ''),
+            'time': float(case.get('time', 0) or 0),
+            'outcome': outcome,
+            'message': message,
+            'cached': cached
+        })
+    return cases
+
+
+def print_merged_report(results, wall_time):
+    """合并各单元的结果，按测试用例名称排序输出，与执行先后无关"""
+    cases = []
+    for result in results:
+        cases.extend(load_junit_cases(result['junit_path']))
+    cases.sort(key=lambda case: (case['classname'], case['name']))
+
+    symbols = {'passed': '✓', 'failed': '✗', 'error': '✗', 'skipped': '-'}
+    print(f"\n{'='*60}")
+    print("合并测试报告")
+    print('='*60)
+    for case in cases:
+        line = f"{symbols[case['outcome']]} {case['classname']}::{case['name']} ({case['time']:.2f}s)"
+        if case['cached']:
+            line += " [cached]"
+        if case['outcome'] in ('failed', 'error') and case['message']:
+            line += f"\n    {case['message'].splitlines()[0]}"
+        print(line)
+
+    counts = {}
+    for case in cases:
+        counts[case['outcome']] = counts.get(case['outcome'], 0) + 1
+    serial_time = sum(result['elapsed'] for result in results)
+    print(f"\n共 {len(cases)} 个测试: " + ", ".join(
+        f"{outcome} {counts.get(outcome, 0)}" for outcome in ('passed', 'failed', 'error', 'skipped')))
+    cached = sum(1 for case in cases if case['cached'])
+    if cached:
+        print(f"其中 {cached} 个测试的结果来自缓存 (--no-cache 重新运行)")
+    print(f"总耗时 {wall_time:.1f}秒 (各单元累计 {serial_time:.1f}秒)")
+
+
+def run_tests_parallel(test_type=None, verbose=False, jobs=2, pytest_args=()):
+    """按标记分组并行运行测试，标记为isolated的测试在并行阶段结束后单独运行"""
+    groups = [test_type] if test_type else TEST_GROUPS
+    workdir = tempfile.mkdtemp(prefix='run_tests_')
+    env = dict(os.environ)
+
+    try:
+        # 主机事实只采集一次，各分组回放同一份快照
+        from host_facts import collect_host_facts
+        from remote_exec import close_executor
+
+        facts_path = os.path.join(workdir, 'host_facts.json')
+        collect_host_facts().export(facts_path)
+        close_executor()
+        env['HOST_FACTS_REPLAY'] = facts_path
+
+        print(f"\n并行运行 {len(groups)} 个测试分组 (并发数: {jobs})")
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(run_pytest_unit, group, f"{group} and not {ISOLATED_MARKER}",
+                            workdir, verbose, env, pytest_args)
+                for group in groups
+            ]
+            results = [future.result() for future in futures]
+
+        # 需要隔离的测试在并行阶段之后单独运行
+        isolated_expr = f"({' or '.join(groups)}) and {ISOLATED_MARKER}"
+        results.append(run_pytest_unit(ISOLATED_MARKER, isolated_expr, workdir, verbose, env,
+                                       pytest_args))
+        wall_time = time.time() - start
+
+        for result in results:
+            status = '✓' if result['returncode'] in (0, PYTEST_NO_TESTS) else '✗'
+            print(f"{status} {result['label']:<10} 耗时 {result['elapsed']:.1f}秒  退出码 {result['returncode']}")
+            if verbose or result['returncode'] not in (0, 1, PYTEST_NO_TESTS):
+                print_log(result['log_path'])
+
+        print_merged_report(results, wall_time)
+        return all(result['returncode'] in (0, PYTEST_NO_TESTS) for result in results)
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
 
 
 def main():
@@ -172,13 +482,21 @@ def main():
   %(prog)s -t system         # 只运行系统测试
   %(prog)s -v                # 详细输出
   %(prog)s --html            # 生成HTML报告
+  %(prog)s -j 4              # 按标记分组并行运行
+  %(prog)s -t benchmark      # 只运行性能基准测试
+  %(prog)s --watch           # 持续监控资源使用，Ctrl+C结束
+  %(prog)s --cache           # 输入未变化的测试复用上次结果
+  %(prog)s --jsonl results.jsonl  # 逐个测试写入JSON Lines结果流
+  %(prog)s --profile-startup # 输出启动阶段各模块的导入耗时
+  %(prog)s --trend           # 各测试历史耗时的p50/p95及回归
+  %(prog)s --budget 120      # 120秒内完成，关键检查最先运行，放不下的测试跳过
   %(prog)s --install-deps    # 安装依赖后运行测试
         '''
     )
 
     parser.add_argument(
         '-t', '--test-type',
-        choices=['all', 'system', 'network', 'service', 'hardware'],
+        choices=['all', 'system', 'network', 'service', 'hardware', 'security', 'benchmark'],
         default='all',
         help='测试类型 (默认: all)'
     )
@@ -195,6 +513,75 @@ def main():
         help='生成HTML测试报告'
     )
 
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='并行运行的测试分组数 (默认: 1，串行)'
+    )
+
+    parser.add_argument(
+        '--subprocess',
+        action='store_true',
+        help='串行运行时在子进程中运行pytest (默认在当前进程内运行，省去解释器启动开销)'
+    )
+
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='只收集测试，按模块输出启动阶段的导入耗时'
+    )
+
+    parser.add_argument(
+        '--trend',
+        action='store_true',
+        help='输出测试耗时历史的趋势报告，有回归时退出码为1 (不运行测试)'
+    )
+
+    parser.add_argument(
+        '--trend-host',
+        metavar='HOST',
+        help='--trend 报告的主机 (默认: 当前被测主机)'
+    )
+
+    parser.add_argument(
+        '--budget',
+        type=float,
+        metavar='SECONDS',
+        help='整次测试的时间预算: 关键检查 (sshd、systemd、磁盘) 最先运行，'
+             '各项超时不超过剩余预算，预计放不下的测试标记为因预算跳过'
+    )
+
+    parser.add_argument(
+        '--jsonl',
+        metavar='PATH',
+        help='将每个测试的结果 (结果、耗时、标记、失败信息) 逐行写入JSON Lines文件'
+    )
+
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='启用测试结果缓存 (等同RESULT_CACHE=true)'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不使用测试结果缓存，全部测试重新运行'
+    )
+
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='持续监控CPU/内存/交换空间/磁盘/网络，按滑动窗口检查 (不运行测试)'
+    )
+
+    parser.add_argument(
+        '--watch-duration',
+        type=float,
+        help='--watch 模式的监控秒数 (默认: 一直运行到Ctrl+C)'
+    )
+
     parser.add_argument(
         '--install-deps',
         action='store_true',
@@ -226,15 +613,53 @@ def main():
         if not install_dependencies():
             print("\n✗ 依赖安装失败")
             sys.exit(1)
+        # 刚安装的包要在当前进程内的pytest中可以导入
+        importlib.invalidate_caches()
+
+    if args.trend:
+        sys.exit(0 if print_trend(args.trend_host) else 1)
+
+    if args.profile_startup:
+        success = profile_startup(None if args.test_type == 'all' else args.test_type)
+        sys.exit(0 if success else 1)
+
+    if args.watch:
+        from resource_monitor import watch
+        sys.exit(0 if watch(duration=args.watch_duration) else 1)
+
+    if args.cache:
+        os.environ['RESULT_CACHE'] = 'true'
+    if args.jsonl:
+        # 各pytest进程向同一文件追加，本次运行开始前清空
+        os.environ['RESULTS_JSONL'] = os.path.abspath(args.jsonl)
+        open(args.jsonl, 'w').close()
+    if args.budget:
+        # 预算从这里开始计算，pytest会话和并行分组都只使用剩余的部分
+        os.environ['TEST_BUDGET'] = str(args.budget)
+        import deadline
+        deadline.start(args.budget)
+    pytest_args = ['--no-cache'] if args.no_cache else []
 
     # 运行测试
     print(f"\n开始运行{args.test_type}测试...")
 
-    success = run_tests(
-        test_type=None if args.test_type == 'all' else args.test_type,
-        verbose=args.verbose,
-        html_report=args.html
-    )
+    if args.jobs > 1:
+        if args.html:
+            print("⚠ 并行模式不生成HTML报告，结果见合并测试报告")
+        success = run_tests_parallel(
+            test_type=None if args.test_type == 'all' else args.test_type,
+            verbose=args.verbose,
+            jobs=args.jobs,
+            pytest_args=pytest_args
+        )
+    else:
+        success = run_tests(
+            test_type=None if args.test_type == 'all' else args.test_type,
+            verbose=args.verbose,
+            html_report=args.html,
+            pytest_args=pytest_args,
+            in_process=not args.subprocess
+        )
 
     if success:
         print("\n✓ 所有测试执行完成")
@@ -0,0 +1,196 @@
+"""
+SSH连接池
+
+按 (主机, 端口, 用户) 保持已建立的SSH连接，供上传工具 (upload/upload_project.py) 与
+远程测试模式 (remote_exec.py) 共用:
+- 连接开启keepalive与TCP_NODELAY，transport断开后下一次使用时自动重连
+- 每条命令在同一transport上打开一个独立通道，不为每条命令重新建立连接
+- run_many() 把相互独立的命令作为并发通道同时执行，总耗时约等于最慢的一条而不是各条之和
+"""
+
+import select
+import socket
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+SSH_KEEPALIVE_INTERVAL = 30
+# 同一transport上同时打开的通道数上限 (OpenSSH默认MaxSessions为10)
+MAX_CONCURRENT_CHANNELS = 8
+# 打开通道时遇到这些异常说明transport已不可用，重连后重试一次
+CONNECTION_ERRORS = (paramiko.SSHException, EOFError, OSError)
+# 读取命令输出时单次recv的字节数
+RECV_SIZE = 32768
+# 等待通道数据的最长间隔: 通道被另一线程关闭时select收不到通知，按此间隔重新检查
+DRAIN_POLL_INTERVAL = 1.0
+
+CommandResult = namedtuple("CommandResult", "returncode stdout stderr seconds")
+
+
+def drain_channel(channel, timeout=None):
+    """同时读取通道的stdout和stderr直到EOF或通道关闭，返回 (stdout, stderr)
+
+    两者共用通道的流控窗口: 先把stdout读到EOF再读stderr时，命令的stderr输出一旦写满窗口，
+    命令就阻塞在写stderr上，stdout也永远等不到EOF。向命令stdin发送数据期间也可在另一线程中
+    调用，此时由发送方关闭通道来结束读取。
+    """
+    out, err = [], []
+    limit = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        while channel.recv_ready():
+            out.append(channel.recv(RECV_SIZE))
+        while channel.recv_stderr_ready():
+            err.append(channel.recv_stderr(RECV_SIZE))
+        if channel.eof_received or channel.closed:
+            # EOF之后不再有新数据，读出缓冲区中剩余的部分
+            out.extend(iter(lambda: channel.recv(RECV_SIZE), b""))
+            err.extend(iter(lambda: channel.recv_stderr(RECV_SIZE), b""))
+            return b"".join(out), b"".join(err)
+
+        wait = DRAIN_POLL_INTERVAL if limit is None else limit - time.monotonic()
+        if wait <= 0:
+            raise socket.timeout()
+        # 通道的fileno在stdout或stderr有数据、收到EOF时可读
+        select.select([channel], [], [], min(wait, DRAIN_POLL_INTERVAL))
+
+
+class PooledConnection:
+    """到一台主机的长连接，transport断开后自动重连"""
+
+    def __init__(self, connect_kwargs, keepalive=SSH_KEEPALIVE_INTERVAL):
+        self.connect_kwargs = connect_kwargs
+        self.keepalive = keepalive
+        self.client = None
+        # 建立连接的次数 (包括重连)
+        self.connects = 0
+        self._lock = threading.Lock()
+
+    def is_active(self):
+        transport = self.client.get_transport() if self.client else None
+        return transport is not None and transport.is_active()
+
+    def ensure(self):
+        """返回可用的SSHClient，尚未连接或transport已断开时重新连接"""
+        with self._lock:
+            if not self.is_active():
+                self._connect()
+            return self.client
+
+    def _connect(self):
+        if self.client:
+            self.client.close()
+            self.client = None
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(**self.connect_kwargs)
+
+        transport = client.get_transport()
+        transport.set_keepalive(self.keepalive)
+        # 关闭Nagle算法: 短命令和逐文件确认的小包否则会与延迟ACK叠加，每次多等数十毫秒
+        transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.client = client
+        self.connects += 1
+
+    @property
+    def transport(self):
+        return self.ensure().get_transport()
+
+    def open_session(self, timeout=None):
+        """在transport上打开一个新通道，transport已断开时重连一次后重试"""
+        try:
+            return self.transport.open_session(timeout=timeout)
+        except CONNECTION_ERRORS:
+            self.close()
+            return self.transport.open_session(timeout=timeout)
+
+    def run(self, command, stdin=None, timeout=None, combine_stderr=False):
+        """在新通道上执行命令，返回CommandResult (输出为bytes)，超时抛出socket.timeout
+
+        timeout为整条命令的秒数上限。combine_stderr为真时stderr并入stdout并保持输出的先后顺序，
+        结果中stderr为空。
+        """
+        start = time.time()
+        channel = self.open_session(timeout)
+        try:
+            channel.settimeout(timeout)
+            channel.set_combine_stderr(combine_stderr)
+            channel.exec_command(command)
+            if stdin is not None:
+                channel.sendall(stdin)
+                channel.shutdown_write()
+            out, err = drain_channel(channel, timeout)
+            returncode = channel.recv_exit_status()
+        finally:
+            channel.close()
+        return CommandResult(returncode, out, err, time.time() - start)
+
+    def run_many(self, commands, timeout=None):
+        """把相互独立的命令作为同一transport上的并发通道执行，按输入顺序返回结果
+
+        某条命令出错时 (连接异常、超时或其他任何异常) 该位置为异常对象，不影响其他命令。
+        """
+        if not commands:
+            return []
+        self.ensure()
+
+        workers = min(len(commands), MAX_CONCURRENT_CHANNELS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.run, command, timeout=timeout) for command in commands]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        with self._lock:
+            if self.client:
+                self.client.close()
+                self.client = None
+
+
+class SSHConnectionPool:
+    """按 (主机, 端口, 用户) 复用PooledConnection，同一主机的多个使用者共享一条transport"""
+
+    def __init__(self, keepalive=SSH_KEEPALIVE_INTERVAL):
+        self.keepalive = keepalive
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def get(self, hostname, port=22, username=None, **connect_kwargs):
+        """返回到该主机的连接，首次使用时建立；connect_kwargs为paramiko.SSHClient.connect的其他参数
+
+        已有连接沿用首次建立时的认证参数。
+        """
+        key = (hostname, port, username)
+        with self._lock:
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = PooledConnection(
+                    dict(connect_kwargs, hostname=hostname, port=port, username=username),
+                    self.keepalive
+                )
+                self._connections[key] = connection
+
+        # 建立连接在池锁之外进行，连接较慢的主机不阻塞其他主机
+        connection.ensure()
+        return connection
+
+    def close_all(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+
+
+# 进程内共享的连接池
+default_pool = SSHConnectionPool()
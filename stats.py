@@ -0,0 +1,24 @@
+"""
+统计工具
+
+基准测试、资源监控与耗时历史共用的百分位数与中位数计算，仅使用标准库。
+"""
+
+
+def percentile(values, p):
+    """最近秩法百分位数，values为空时返回None"""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def median(values):
+    """中位数，偶数个值时取中间两个的平均，values为空时返回None"""
+    values = sorted(values)
+    if not values:
+        return None
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
@@ -0,0 +1,55 @@
+"""
+存储I/O基准测试的单元测试
+
+模拟创建文件之后才拒绝O_DIRECT的内核，验证回退到缓冲I/O且不遗留临时文件
+"""
+
+import errno
+import os
+
+import pytest
+
+import disk_bench
+
+
+@pytest.fixture
+def reject_direct_after_create(monkeypatch):
+    """O_DIRECT打开时先创建文件再返回EINVAL (6.6之前的tmpfs与5.10内核的行为)"""
+    real_open = os.open
+
+    def fake_open(path, flags, mode=0o777):
+        if flags & getattr(os, "O_DIRECT", 0):
+            os.close(real_open(path, flags & ~os.O_DIRECT, mode))
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), path)
+        return real_open(path, flags, mode)
+
+    monkeypatch.setattr(disk_bench.os, "O_DIRECT", 0o40000, raising=False)
+    monkeypatch.setattr(disk_bench.os, "open", fake_open)
+
+
+def scratch_files(directory):
+    return [name for name in os.listdir(str(directory))
+            if name.startswith(disk_bench.SCRATCH_PREFIX)]
+
+
+def test_falls_back_to_buffered_io(tmp_path, reject_direct_after_create):
+    result = disk_bench.bench_mount(str(tmp_path), file_mb=1, budget=0.2)
+
+    assert not result.direct
+    assert result.phases["seq_write"].operations > 0
+    assert scratch_files(tmp_path) == []
+
+
+def test_scratch_file_removed_when_open_fails(tmp_path, monkeypatch):
+    """打开失败 (文件已被创建) 时同样删除临时文件"""
+    real_open = os.open
+
+    def failing_open(path, flags, mode=0o777):
+        os.close(real_open(path, flags & ~getattr(os, "O_DIRECT", 0), mode))
+        raise OSError(errno.EACCES, os.strerror(errno.EACCES), path)
+
+    monkeypatch.setattr(disk_bench.os, "open", failing_open)
+
+    with pytest.raises(PermissionError):
+        disk_bench.bench_mount(str(tmp_path), file_mb=1, budget=0.2)
+    assert scratch_files(tmp_path) == []
@@ -0,0 +1,55 @@
+"""
+探测输出解析测试
+
+用固定的命令输出验证probes中的解析函数，不依赖被测主机
+"""
+
+from probes import parse_mountinfo, parse_systemctl_show
+
+
+class TestParseSystemctlShow:
+    """systemctl show 多单元输出解析测试"""
+
+    def test_invalid_unit_in_middle(self):
+        """无效的单元名不输出段，其后的单元不能错位"""
+        text = (
+            "Id=sshd.service\nNames=sshd.service\nLoadState=loaded\nActiveState=active\n"
+            "SubState=running\n\n"
+            "Id=chronyd.service\nNames=chronyd.service\nLoadState=loaded\n"
+            "ActiveState=inactive\nSubState=dead\n"
+        )
+
+        states = parse_systemctl_show(text, ["sshd", "bad/name", "chronyd"])
+
+        assert set(states) == {"sshd", "chronyd"}
+        assert states["sshd"].active_state == "active"
+        assert states["chronyd"].active_state == "inactive"
+
+    def test_unknown_unit_and_alias(self):
+        """不存在的单元输出not-found段；别名按Names对应到实际单元"""
+        text = (
+            "Id=nosuch.service\nNames=nosuch.service\nLoadState=not-found\n"
+            "ActiveState=inactive\nSubState=dead\n\n"
+            "Id=ssh.service\nNames=ssh.service sshd.service\nLoadState=loaded\n"
+            "ActiveState=active\nSubState=running\n"
+        )
+
+        states = parse_systemctl_show(text, ["nosuch", "sshd"])
+
+        assert states["nosuch"].load_state == "not-found"
+        assert states["sshd"].active_state == "active"
+
+
+class TestParseMountinfo:
+    """/proc/self/mountinfo 解析测试"""
+
+    def test_non_ascii_path_with_escaped_space(self):
+        """中文目录名按UTF-8原样保留，只还原 \\ooo 转义"""
+        text = ("36 25 8:1 / /data/数据\\040目录 rw,relatime shared:1 - ext4 /dev/vda1 rw\n"
+                "37 25 8:2 / /mnt/back\\134slash rw - xfs /dev/vdb1 rw\n")
+
+        mounts = parse_mountinfo(text)
+
+        assert "/data/数据 目录" in mounts
+        assert mounts["/data/数据 目录"].fs_type == "ext4"
+        assert "/mnt/back\\slash" in mounts
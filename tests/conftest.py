@@ -1,10 +1,57 @@
 """
 pytest配置文件
-注册自定义测试标记
+注册自定义测试标记，管理会话级探测执行器
 """
 
+import json
+import os
+import signal
+import threading
+import time
+
 import pytest
 
+import config as config_module
+import deadline
+from config import Config
+from host_facts import HostFacts, collect_cache_inputs, collect_host_facts
+from remote_exec import close_executor, get_executor, latency_summary, target_host
+from result_cache import ResultCache, file_sha256, fingerprint
+
+# 会话结束时保存的探测耗时记录，供终端汇总使用
+_probe_records = []
+
+# 测试结果缓存: 未启用时为None
+_result_cache = None
+# 测试ID -> 本次计算的输入指纹 (只包含声明了输入的测试)
+_fingerprints = {}
+# 测试ID -> 命中缓存的结果
+_cache_hits = {}
+# 声明了输入的测试所涉及的全部文件、单元和是否需要内核版本，会话内一次探测
+_input_files = set()
+_input_units = set()
+_input_kernel = False
+_cache_inputs = None
+_source_digests = {}
+
+# 测试ID -> [结果, 累计秒数]，会话结束时一次写入耗时历史库
+_timings = {}
+_session_started = None
+
+# 时间预算模式: 测试ID -> 历史耗时中位数；因预算跳过或中断的测试ID
+_estimates = {}
+_budget_skipped = []
+
+# 写入JSON Lines结果流时记录的测试标记
+RESULT_MARKERS = ("system", "network", "service", "hardware", "security", "isolated", "benchmark")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--no-cache", action="store_true", default=False,
+        help="不使用测试结果缓存，全部测试重新运行 (RESULT_CACHE=true时有效)"
+    )
+
 # 注册自定义测试标记
 def pytest_configure(config):
     """注册自定义pytest标记"""
@@ -23,3 +70,324 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "security: 安全配置测试"
     )
+    config.addinivalue_line(
+        "markers", "isolated: 需要单独运行的测试 (并行模式下不与其他测试同时执行)"
+    )
+    config.addinivalue_line(
+        "markers", "benchmark: 性能基准测试 (默认跳过)"
+    )
+    config.addinivalue_line(
+        "markers", "inputs(files, units, kernel): 测试的输入，启用结果缓存时输入不变则复用上次结果"
+    )
+    config.addinivalue_line(
+        "markers", "critical: 关键检查 (sshd、systemd、磁盘)，时间预算模式下最先运行"
+    )
+
+    global _result_cache
+    if Config.RESULT_CACHE and not config.getoption("no_cache", default=False):
+        _result_cache = ResultCache(Config.RESULT_CACHE_FILE)
+
+
+def pytest_collection_modifyitems(config, items):
+    """未启用基准测试时跳过benchmark标记的测试"""
+    global _input_kernel
+    for item in items:
+        marker = item.get_closest_marker("inputs")
+        if marker is not None:
+            _input_files.update(marker.kwargs.get("files", ()))
+            _input_units.update(marker.kwargs.get("units", ()))
+            _input_kernel = _input_kernel or bool(marker.kwargs.get("kernel"))
+
+    if Config.TEST_BUDGET:
+        _schedule_for_budget(items)
+
+    if Config.RUN_BENCHMARKS or "benchmark" in (config.getoption("markexpr") or ""):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason="基准测试默认不运行，设置RUN_BENCHMARKS=true或使用 -m benchmark 启用")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+def _schedule_for_budget(items):
+    """时间预算模式: critical标记的测试最先运行，其余保持原有顺序；读取历史耗时用于预估"""
+    items[:] = ([item for item in items if "critical" in item.keywords]
+                + [item for item in items if "critical" not in item.keywords])
+
+    if Config.TIMING_DB and os.path.exists(Config.TIMING_DB):
+        import sqlite3
+        from timing_store import estimates
+        try:
+            _estimates.update(estimates(target_host()))
+        except sqlite3.Error:
+            pass  # 没有历史耗时时只按最短剩余时间判断
+
+
+@pytest.fixture(autouse=True)
+def budget_guard(request):
+    """时间预算模式: 预计无法在剩余预算内完成的测试直接跳过"""
+    left = deadline.remaining()
+    if left is None:
+        return
+
+    nodeid = request.node.nodeid
+    estimate = _estimates.get(nodeid)
+    if left < max(estimate or 0.0, Config.BUDGET_MIN_TEST_SECONDS):
+        _budget_skipped.append(nodeid)
+        needed = f", 预计需要 {estimate:.1f}秒" if estimate is not None else ""
+        pytest.skip(f"超出时间预算: 剩余 {left:.1f}秒{needed}")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """时间预算模式: 只在测试体运行期间设置闹钟，预算耗尽时抛出deadline.BudgetExceeded
+
+    闹钟不覆盖fixture的建立与清理，会话级fixture (SSH连接、主机快照) 不会被中途打断；
+    异常在报告阶段转换为跳过，信号处理函数本身不调用pytest.skip。
+    """
+    left = deadline.remaining()
+    # 只有主线程能设置信号处理，其他线程中运行时只依赖各处的超时
+    if left is None or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def budget_exhausted(signum, frame):
+        raise deadline.BudgetExceeded(f"运行中超出时间预算 ({Config.TEST_BUDGET:g}秒)")
+
+    previous = signal.signal(signal.SIGALRM, budget_exhausted)
+    signal.setitimer(signal.ITIMER_REAL, max(left, deadline.MIN_TIMEOUT))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def probe_executor():
+    """会话级探测执行器: 远程模式下整个会话只建立一条SSH连接，回放快照时不连接主机"""
+    if not Config.HOST_FACTS_REPLAY:
+        get_executor()
+    yield
+    _probe_records.extend(close_executor())
+
+
+@pytest.fixture(scope="session")
+def host_facts_snapshot(probe_executor):
+    """会话级主机事实快照: 整个会话只采集一次"""
+    if Config.HOST_FACTS_REPLAY:
+        return HostFacts.load(Config.HOST_FACTS_REPLAY)
+
+    facts = collect_host_facts()
+    if Config.HOST_FACTS_EXPORT:
+        facts.export(Config.HOST_FACTS_EXPORT)
+    return facts
+
+
+@pytest.fixture
+def host_facts(request, result_cache_lookup):
+    """测试使用的主机事实快照；依赖缓存查询，命中缓存的测试不触发完整的事实采集"""
+    if request.node.nodeid in _cache_hits:
+        return None
+    return request.getfixturevalue("host_facts_snapshot")
+
+
+def _source_digest(path):
+    if path not in _source_digests:
+        _source_digests[path] = file_sha256(path)
+    return _source_digests[path]
+
+
+@pytest.fixture(autouse=True)
+def result_cache_lookup(request):
+    """为声明了输入的测试计算指纹并查询结果缓存"""
+    marker = request.node.get_closest_marker("inputs")
+    if _result_cache is None or marker is None:
+        return
+
+    # 只探测声明的输入，命中时无需完整的主机事实快照
+    global _cache_inputs
+    if _cache_inputs is None:
+        _cache_inputs = collect_cache_inputs(_input_files, _input_units, _input_kernel)
+
+    host = target_host()
+    sources = {os.path.basename(path): _source_digest(path)
+               for path in (request.node.module.__file__, config_module.__file__)}
+    nodeid = request.node.nodeid
+    _fingerprints[nodeid] = fingerprint(marker.kwargs, host, sources, _cache_inputs)
+
+    cached = _result_cache.lookup(nodeid, _fingerprints[nodeid])
+    if cached is not None:
+        _cache_hits[nodeid] = cached
+        request.node.user_properties.append(("cached", "true"))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """命中缓存的测试不执行测试体，直接给出上次的结果"""
+    cached = _cache_hits.get(pyfuncitem.nodeid)
+    if cached is None:
+        return None
+    if cached.outcome == "failed":
+        pytest.fail(f"[缓存] {cached.message}", pytrace=False)
+    return True
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """把预算耗尽中断的测试报告为跳过；记录实际运行的、声明了输入的测试的结果"""
+    outcome = yield
+    report = outcome.get_result()
+    if call.excinfo is not None and call.excinfo.errisinstance(deadline.BudgetExceeded):
+        _budget_skipped.append(item.nodeid)
+        report.outcome = "skipped"
+        report.longrepr = (item.location[0], item.location[1] + 1, f"Skipped: {call.excinfo.value}")
+        return
+
+    if report.when != "call" or item.nodeid not in _fingerprints or item.nodeid in _cache_hits:
+        return
+    if report.outcome not in ("passed", "failed"):
+        return
+    message = call.excinfo.exconly().splitlines()[0] if call.excinfo else ""
+    _result_cache.record(item.nodeid, _fingerprints[item.nodeid], report.outcome, message)
+
+
+def pytest_report_teststatus(report):
+    """命中缓存的测试在报告中标记为cached"""
+    if report.when == "call" and ("cached", "true") in report.user_properties:
+        if report.passed:
+            return "passed", "c", ("PASSED (cached)", {"green": True})
+        if report.failed:
+            return "failed", "C", ("FAILED (cached)", {"red": True})
+    return None
+
+
+def _write_result(record):
+    """向RESULTS_JSONL追加一行，每行一次O_APPEND写入，并行分组可写同一文件，中途终止也不留半行"""
+    if not Config.RESULTS_JSONL:
+        return
+    record["time"] = time.time()
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    fd = os.open(Config.RESULTS_JSONL, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+def _report_message(report):
+    """失败取异常的一行摘要，跳过取跳过原因"""
+    if report.passed or report.longrepr is None:
+        return ""
+    if isinstance(report.longrepr, tuple):
+        return report.longrepr[2]
+    crash = getattr(report.longrepr, "reprcrash", None)
+    if crash is not None:
+        return crash.message.splitlines()[0] if crash.message else ""
+    return str(report.longrepr).strip().splitlines()[-1]
+
+
+def pytest_sessionstart(session):
+    global _session_started
+    _session_started = time.time()
+    # run_tests已开始计时时保留原截止时间
+    deadline.start()
+    _write_result({
+        "event": "session_start",
+        "pid": os.getpid(),
+        "markexpr": session.config.getoption("markexpr") or ""
+    })
+
+
+def _record_timing(report):
+    """累计setup/call/teardown的耗时；跳过的和命中结果缓存的测试不计入耗时历史"""
+    entry = _timings.setdefault(report.nodeid, ["passed", 0.0])
+    entry[1] += report.duration
+    if report.skipped or ("cached", "true") in report.user_properties:
+        entry[0] = "skipped"
+    elif report.failed and entry[0] == "passed":
+        entry[0] = "failed" if report.when == "call" else "error"
+
+
+def pytest_runtest_logreport(report):
+    """每个测试结束时写入一条结果: 测试体的结果，或setup/teardown阶段的错误与跳过"""
+    _record_timing(report)
+
+    if report.when == "call":
+        outcome = report.outcome
+    elif report.when == "setup" and not report.passed:
+        outcome = "skipped" if report.skipped else "error"
+    elif report.when == "teardown" and report.failed:
+        outcome = "error"
+    else:
+        return
+
+    _write_result({
+        "event": "test",
+        "nodeid": report.nodeid,
+        "outcome": outcome,
+        "when": report.when,
+        "duration": round(report.duration, 6),
+        "markers": [name for name in RESULT_MARKERS if name in report.keywords],
+        "cached": ("cached", "true") in report.user_properties,
+        "message": _report_message(report)
+    })
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if _result_cache is not None:
+        try:
+            _result_cache.save()
+        except OSError:
+            pass  # 缓存不可写时只影响下次运行速度
+
+    if Config.TIMING_DB:
+        import sqlite3
+        from timing_store import TIMED_OUTCOMES, record_run
+        timings = [(nodeid, outcome, duration) for nodeid, (outcome, duration) in _timings.items()
+                   if outcome in TIMED_OUTCOMES]
+        if timings:
+            try:
+                record_run(target_host(), _session_started,
+                           session.config.getoption("markexpr") or "", int(exitstatus), timings)
+            except (sqlite3.Error, OSError) as e:  # 历史库不可写不影响测试结果
+                print(f"\n⚠ 无法写入耗时历史 {Config.TIMING_DB}: {e}")
+
+    # 没有session_finish记录的结果流说明运行被中途终止
+    _write_result({"event": "session_finish", "pid": os.getpid(), "exitstatus": int(exitstatus)})
+
+
+def pytest_terminal_summary(terminalreporter):
+    """输出结果缓存命中情况与时间预算使用情况；远程模式下输出探测命令耗时汇总"""
+    if Config.TEST_BUDGET:
+        terminalreporter.section("时间预算")
+        terminalreporter.write_line(
+            f"预算 {Config.TEST_BUDGET:g}秒, 剩余 {deadline.remaining():.1f}秒, "
+            f"{len(_budget_skipped)} 个测试因预算跳过"
+        )
+        for nodeid in _budget_skipped:
+            terminalreporter.write_line(f"  {nodeid}")
+
+    if _result_cache is not None and _fingerprints:
+        terminalreporter.section("结果缓存")
+        terminalreporter.write_line(
+            f"{len(_cache_hits)}/{len(_fingerprints)} 个声明了输入的测试命中缓存 "
+            f"(--no-cache 重新运行全部测试)"
+        )
+
+    if Config.TEST_MODE != "remote":
+        return
+
+    summary = latency_summary(_probe_records)
+    if summary is None:
+        return
+
+    count, total, p50, p95, slowest = summary
+    terminalreporter.section("远程探测耗时")
+    terminalreporter.write_line(
+        f"{Config.REMOTE_HOST}: {count} 条命令, 合计 {total:.2f}秒, "
+        f"p50 {p50 * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms"
+    )
+    for command, seconds, returncode in slowest:
+        terminalreporter.write_line(f"  {seconds * 1000:8.1f}ms  退出码={returncode}  {command}")
@@ -4,9 +4,9 @@
 验证Alibaba Cloud Linux 3.21.04系统的硬件资源状态
 """
 
-import subprocess
-import psutil
 import pytest
+import cpu_bench
+from baselines import detect_instance_type, get_baseline
 from config import Config
 
 
@@ -16,6 +16,8 @@ class TestHardwareResources:
     @pytest.mark.hardware
     def test_cpu_cores(self):
         """测试CPU核心数量"""
+        import psutil
+
         cpu_count = psutil.cpu_count()
         assert cpu_count >= Config.MIN_CPU_CORES, \
             f"CPU核心数不足: {cpu_count} < {Config.MIN_CPU_CORES}"
@@ -23,6 +25,8 @@ class TestHardwareResources:
     @pytest.mark.hardware
     def test_memory_size(self):
         """测试内存大小"""
+        import psutil
+
         memory_gb = psutil.virtual_memory().total / (1024 ** 3)
         assert memory_gb >= Config.MIN_MEMORY_GB, \
             f"内存不足: {memory_gb:.1f}GB < {Config.MIN_MEMORY_GB}GB"
@@ -30,6 +34,8 @@ class TestHardwareResources:
     @pytest.mark.hardware
     def test_memory_usage(self):
         """测试内存使用情况"""
+        import psutil
+
         memory = psutil.virtual_memory()
         memory_usage_percent = memory.percent
 
@@ -43,8 +49,11 @@ class TestHardwareResources:
             f"可用内存不足: {available_mb:.0f}MB"
 
     @pytest.mark.hardware
+    @pytest.mark.isolated
     def test_cpu_usage(self):
         """测试CPU使用情况"""
+        import psutil
+
         cpu_percent = psutil.cpu_percent(interval=1)
 
         # CPU使用率不应该持续超过90%
@@ -52,22 +61,46 @@ class TestHardwareResources:
             f"CPU使用率过高: {cpu_percent}%"
 
     @pytest.mark.hardware
-    def test_hardware_info(self):
+    def test_hardware_info(self, host_facts):
         """测试硬件基本信息"""
-        try:
-            result = subprocess.run(
-                ["lscpu"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                timeout=Config.SERVICE_CHECK_TIMEOUT
-            )
-
-            assert result.returncode == 0, "无法获取CPU信息"
-            cpu_info = result.stdout.lower()
-
-            # 验证是x86_64架构
-            assert "x86_64" in cpu_info, "不支持的CPU架构"
-
-        except subprocess.TimeoutExpired:
+        result = host_facts["cpu_info"]
+        if result.timed_out:
             pytest.fail("获取硬件信息超时")
+
+        assert result.returncode == 0, "无法获取CPU信息"
+        cpu_info = result.stdout.lower()
+
+        # 验证是x86_64架构
+        assert "x86_64" in cpu_info, "不支持的CPU架构"
+
+
+@pytest.fixture(scope="class")
+def cpu_bench_results():
+    """在时间预算内运行一次CPU与内存微基准，并与本实例规格的基线比较"""
+    instance_type = detect_instance_type()
+    results = cpu_bench.run_suite(Config.CPU_BENCH_TIME_BUDGET)
+    return instance_type, cpu_bench.compare(results, get_baseline(cpu_bench.SUITE, instance_type))
+
+
+@pytest.mark.hardware
+@pytest.mark.benchmark
+@pytest.mark.isolated
+class TestCpuMemoryBenchmark:
+    """CPU与内存微基准测试类"""
+
+    @pytest.mark.parametrize("name", [name for name, _ in cpu_bench.BENCHMARKS])
+    def test_against_baseline(self, cpu_bench_results, name):
+        """测试性能相对实例规格基线的劣化程度"""
+        instance_type, comparison = cpu_bench_results
+        if name not in comparison:
+            pytest.skip(f"超出时间预算 ({Config.CPU_BENCH_TIME_BUDGET}秒)，未运行 {name}")
+
+        measurement, baseline, deviation = comparison[name]
+        if baseline is None:
+            pytest.skip(f"实例规格 {instance_type} 没有 {name} 的基线 "
+                        f"(本次: {measurement.value:,.1f} {measurement.unit})，"
+                        f"可运行 cpu_bench.py --record 记录")
+
+        assert deviation <= Config.BENCH_MAX_DEVIATION_PERCENT, \
+            f"{name} 低于基线 {deviation:.1f}%: {measurement.value:,.1f} {measurement.unit} " \
+            f"(基线 {baseline:,.1f}，允许劣化 {Config.BENCH_MAX_DEVIATION_PERCENT}%)"
@@ -5,72 +5,91 @@
 """
 
 import socket
-import subprocess
 import pytest
-import requests
+import deadline
 from config import Config
+from net_bench import TcpEchoServer, UdpEchoServer, tcp_connection_rate, tcp_throughput, udp_throughput
+from stats import percentile
 
 
 class TestNetworkConnectivity:
     """网络连接性测试类"""
 
     @pytest.mark.network
-    def test_network_interfaces(self):
+    def test_network_interfaces(self, host_facts):
         """测试网络接口状态"""
-        try:
-            result = subprocess.run(
-                ["ip", "addr", "show"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                timeout=Config.SERVICE_CHECK_TIMEOUT
-            )
-
-            assert result.returncode == 0, "无法获取网络接口信息"
-            interface_output = result.stdout
-
-            # 检查必需的网络接口
-            for interface in Config.REQUIRED_NETWORK_INTERFACES:
-                assert interface in interface_output, \
-                    f"缺少必需的网络接口: {interface}"
-
-        except subprocess.TimeoutExpired:
+        result = host_facts["interfaces"]
+        if result.timed_out:
             pytest.fail("获取网络接口信息超时")
 
+        assert result.returncode == 0, "无法获取网络接口信息"
+        interface_names = [interface.name for interface in host_facts.interfaces()]
+
+        # 检查必需的网络接口
+        for interface in Config.REQUIRED_NETWORK_INTERFACES:
+            assert interface in interface_names, \
+                f"缺少必需的网络接口: {interface}"
+
     @pytest.mark.network
     def test_dns_resolution(self):
         """测试DNS解析功能"""
+        # 异步探测依赖asyncio与ssl，只在运行到网络探测测试时才导入
+        from net_probes import probe_network
+
         test_domains = [
             "www.aliyun.com",
             "www.baidu.com",
             "github.com"
         ]
 
-        for domain in test_domains:
-            try:
-                socket.gethostbyname(domain)
-            except socket.gaierror as e:
-                pytest.fail(f"DNS解析失败 {domain}: {e}")
+        dns_results, _ = probe_network(hosts=test_domains, deadline=deadline.timeout(Config.NETWORK_PROBE_DEADLINE))
+
+        for result in dns_results:
+            if result.error:
+                pytest.fail(f"DNS解析失败 {result.host}: {result.error}")
+
+        latencies = [result.dns_ms for result in dns_results]
+        p50, p95 = percentile(latencies, 50), percentile(latencies, 95)
+        assert p50 <= Config.DNS_LATENCY_P50_MS, \
+            f"DNS解析延迟p50过高: {p50:.1f}ms > {Config.DNS_LATENCY_P50_MS}ms"
+        assert p95 <= Config.DNS_LATENCY_P95_MS, \
+            f"DNS解析延迟p95过高: {p95:.1f}ms > {Config.DNS_LATENCY_P95_MS}ms"
 
     @pytest.mark.network
     def test_internet_connectivity(self):
         """测试互联网连接性"""
+        from net_probes import probe_network
+
         test_urls = [
             "https://www.aliyun.com",
             "https://www.baidu.com"
         ]
 
-        for url in test_urls:
-            try:
-                response = requests.get(
-                    url,
-                    timeout=Config.NETWORK_TIMEOUT,
-                    verify=False  # 在测试环境中可能没有证书
-                )
-                assert response.status_code == 200, \
-                    f"无法访问 {url}, 状态码: {response.status_code}"
-            except requests.RequestException as e:
-                pytest.fail(f"网络连接失败 {url}: {e}")
+        _, http_results = probe_network(
+            urls=test_urls,
+            samples=Config.HTTP_PROBE_SAMPLES,
+            deadline=deadline.timeout(Config.NETWORK_PROBE_DEADLINE),
+            verify=False  # 在测试环境中可能没有证书
+        )
+
+        for result in http_results:
+            if result.error:
+                pytest.fail(f"网络连接失败 {result.url}: {result.error}")
+            assert result.status == 200, \
+                f"无法访问 {result.url}, 状态码: {result.status}"
+
+        # 连接和TLS只统计新建连接，复用连接时这两项为0
+        new_connections = [result for result in http_results if not result.reused]
+        thresholds = [
+            ("TCP连接", [r.connect_ms for r in new_connections], 95, Config.HTTP_CONNECT_P95_MS),
+            ("TLS握手", [r.tls_ms for r in new_connections], 95, Config.HTTP_TLS_P95_MS),
+            ("首字节", [r.first_byte_ms for r in http_results], 50, Config.HTTP_FIRST_BYTE_P50_MS),
+            ("首字节", [r.first_byte_ms for r in http_results], 95, Config.HTTP_FIRST_BYTE_P95_MS),
+        ]
+        for phase, latencies, p, limit in thresholds:
+            value = percentile(latencies, p)
+            assert value <= limit, \
+                f"{phase}延迟p{p}过高: {value:.1f}ms > {limit}ms"
 
     @pytest.mark.network
     def test_localhost_connectivity(self):
@@ -78,7 +97,7 @@ class TestNetworkConnectivity:
         try:
             # 测试TCP连接到本地端口
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(Config.NETWORK_TIMEOUT)
+            sock.settimeout(deadline.timeout(Config.NETWORK_TIMEOUT))
 
             # 尝试连接到本地回环地址
             result = sock.connect_ex(("127.0.0.1", 22))  # SSH端口
@@ -91,7 +110,8 @@ class TestNetworkConnectivity:
             pytest.fail(f"本地连接测试失败: {e}")
 
     @pytest.mark.network
-    def test_network_configuration(self):
+    @pytest.mark.inputs(files=["/etc/resolv.conf", "/etc/hosts", "/etc/sysconfig/network"])
+    def test_network_configuration(self, host_facts):
         """测试网络配置文件"""
         config_files = [
             "/etc/resolv.conf",
@@ -99,75 +119,93 @@ class TestNetworkConnectivity:
             "/etc/sysconfig/network"
         ]
 
+        if host_facts["files"].timed_out:
+            pytest.fail("检查配置文件超时")
+
         for config_file in config_files:
-            try:
-                result = subprocess.run(
-                    ["test", "-f", config_file],
-                    timeout=Config.SERVICE_CHECK_TIMEOUT
-                )
-                assert result.returncode == 0, \
-                    f"网络配置文件不存在: {config_file}"
-            except subprocess.TimeoutExpired:
-                pytest.fail(f"检查配置文件超时: {config_file}")
+            assert host_facts.file_exists(config_file), \
+                f"网络配置文件不存在: {config_file}"
 
     @pytest.mark.network
-    def test_firewall_status(self):
+    @pytest.mark.inputs(units=["firewalld"])
+    def test_firewall_status(self, host_facts):
         """测试防火墙状态"""
-        try:
-            # 检查firewalld状态
-            result = subprocess.run(
-                ["systemctl", "is-active", "firewalld"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                timeout=Config.SERVICE_CHECK_TIMEOUT
-            )
-
-            # 防火墙可能是active或inactive，都可以接受
-            assert result.returncode in [0, 3], \
-                f"防火墙状态异常: {result.stdout.strip()}"
-
-        except subprocess.TimeoutExpired:
+        if host_facts["services"].timed_out:
             pytest.fail("检查防火墙状态超时")
 
+        # 防火墙可能是active或inactive，都可以接受
+        state = host_facts.service_state("firewalld")
+        assert state in ["active", "inactive", "failed"], \
+            f"防火墙状态异常: {state}"
+
     @pytest.mark.network
-    def test_network_routes(self):
+    def test_network_routes(self, host_facts):
         """测试网络路由配置"""
-        try:
-            result = subprocess.run(
-                ["ip", "route", "show"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                timeout=Config.SERVICE_CHECK_TIMEOUT
-            )
-
-            assert result.returncode == 0, "无法获取路由表"
-            route_output = result.stdout
+        result = host_facts["routes"]
+        if result.timed_out:
+            pytest.fail("获取路由表超时")
 
-            # 检查是否存在默认路由
-            assert "default" in route_output, "缺少默认路由"
+        assert result.returncode == 0, "无法获取路由表"
 
-        except subprocess.TimeoutExpired:
-            pytest.fail("获取路由表超时")
+        # 检查是否存在默认路由
+        assert any(route.is_default and route.is_up for route in host_facts.routes()), \
+            "缺少默认路由"
 
     @pytest.mark.network
-    def test_network_listening_ports(self):
+    def test_network_listening_ports(self, host_facts):
         """测试网络监听端口"""
-        try:
-            result = subprocess.run(
-                ["ss", "-tuln"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                timeout=Config.SERVICE_CHECK_TIMEOUT
-            )
-
-            assert result.returncode == 0, "无法获取监听端口信息"
-            port_output = result.stdout
-
-            # 检查SSH端口是否在监听
-            assert ":22 " in port_output, "SSH端口(22)未在监听"
-
-        except subprocess.TimeoutExpired:
+        result = host_facts["listening_ports"]
+        if result.timed_out:
             pytest.fail("获取监听端口信息超时")
+
+        assert result.returncode == 0, "无法获取监听端口信息"
+        port_output = result.stdout
+
+        # 检查SSH端口是否在监听
+        assert ":22 " in port_output, "SSH端口(22)未在监听"
+
+
+@pytest.fixture(scope="class")
+def echo_servers():
+    """本机TCP/UDP回显服务端，供回环基准测试使用"""
+    with TcpEchoServer() as tcp_server, UdpEchoServer() as udp_server:
+        yield tcp_server, udp_server
+
+
+@pytest.mark.network
+@pytest.mark.benchmark
+@pytest.mark.isolated
+class TestLoopbackBenchmark:
+    """回环网络性能基准测试类"""
+
+    @pytest.mark.parametrize("size", sorted(Config.NET_BENCH_MIN_TCP_MBPS))
+    def test_tcp_throughput(self, echo_servers, size):
+        """测试回环TCP吞吐量"""
+        tcp_server, _ = echo_servers
+        result = tcp_throughput(tcp_server.port, size, Config.NET_BENCH_STREAMS,
+                                Config.NET_BENCH_DURATION)
+
+        minimum = Config.NET_BENCH_MIN_TCP_MBPS[size]
+        assert result.value >= minimum, \
+            f"TCP吞吐量过低 ({size}字节 x {result.streams}流): {result.value:.1f}MB/s < {minimum}MB/s"
+
+    @pytest.mark.parametrize("size", sorted(Config.NET_BENCH_MIN_UDP_MBPS))
+    def test_udp_throughput(self, echo_servers, size):
+        """测试回环UDP吞吐量"""
+        _, udp_server = echo_servers
+        result = udp_throughput(udp_server.port, size, Config.NET_BENCH_STREAMS,
+                                Config.NET_BENCH_DURATION)
+
+        minimum = Config.NET_BENCH_MIN_UDP_MBPS[size]
+        assert result.value >= minimum, \
+            f"UDP吞吐量过低 ({size}字节 x {result.streams}流): {result.value:.1f}MB/s < {minimum}MB/s " \
+            f"(丢包 {result.lost})"
+
+    def test_tcp_connection_rate(self, echo_servers):
+        """测试回环TCP建连速率"""
+        tcp_server, _ = echo_servers
+        result = tcp_connection_rate(tcp_server.port, Config.NET_BENCH_STREAMS,
+                                     Config.NET_BENCH_DURATION)
+
+        assert result.value >= Config.NET_BENCH_MIN_CONN_RATE, \
+            f"TCP建连速率过低: {result.value:.0f}次/秒 < {Config.NET_BENCH_MIN_CONN_RATE}次/秒"
@@ -0,0 +1,60 @@
+"""
+安全测试
+
+验证Alibaba Cloud Linux 3.21.04系统关键文件的权限，以及文件系统中的全局可写与SUID/SGID文件
+"""
+
+import pytest
+from config import Config
+from fs_scan import SGID, SUID, WORLD_WRITABLE, WORLD_WRITABLE_DIR, scan
+from remote_exec import get_executor
+
+
+@pytest.mark.security
+class TestPermissions:
+    """关键文件权限测试类
+
+    文件权限来自会话级host_facts快照，全部文件只做一次批量stat。
+    """
+
+    def test_sensitive_file_permissions(self, host_facts):
+        """测试关键文件的权限位不超过要求，且属主为root"""
+        modes = host_facts.file_modes()
+        assert modes, "无法获取关键文件的权限"
+
+        for path, expected in sorted(Config.REQUIRED_SECURE_PERMISSIONS.items()):
+            info = modes.get(path)
+            assert info is not None, f"文件不存在: {path}"
+            extra = info.mode & ~expected
+            assert not extra, \
+                f"{path} 权限过宽: {info.mode:04o} (要求不超过 {expected:04o})"
+            assert info.uid == 0, f"{path} 属主不是root: uid={info.uid}"
+
+
+@pytest.fixture(scope="module")
+def scan_result():
+    """整个模块共享一次全文件系统扫描"""
+    if not Config.SECURITY_FULL_SCAN:
+        pytest.skip("全文件系统扫描未开启 (SECURITY_FULL_SCAN=true)")
+    if get_executor().mode == "remote":
+        pytest.skip("全文件系统扫描需在靶机上运行: python3 fs_scan.py")
+    return scan()
+
+
+@pytest.mark.security
+@pytest.mark.isolated
+class TestFilesystemScan:
+    """全文件系统扫描测试类 (SECURITY_FULL_SCAN=true 时运行)"""
+
+    def test_no_world_writable(self, scan_result):
+        """测试不存在全局可写文件和未设置粘滞位的全局可写目录"""
+        found = [f"{finding.mode:04o} {finding.path}" for finding in scan_result.findings
+                 if finding.kind in (WORLD_WRITABLE, WORLD_WRITABLE_DIR)]
+        assert not found, f"发现 {len(found)} 个全局可写条目:\n" + "\n".join(found)
+
+    def test_suid_sgid_allowlist(self, scan_result):
+        """测试SUID/SGID文件都在允许列表中"""
+        allowed = set(Config.ALLOWED_SUID_SGID)
+        found = [f"{finding.kind} {finding.mode:04o} {finding.path}" for finding in scan_result.findings
+                 if finding.kind in (SUID, SGID) and finding.path not in allowed]
+        assert not found, f"发现 {len(found)} 个不在允许列表中的SUID/SGID文件:\n" + "\n".join(found)
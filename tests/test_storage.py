@@ -0,0 +1,97 @@
+"""
+存储测试
+
+验证Alibaba Cloud Linux 3.21.04系统的挂载点配置、剩余空间和存储I/O性能
+"""
+
+import errno
+import pytest
+from config import Config
+
+
+class TestFilesystem:
+    """文件系统挂载与容量测试类
+
+    挂载表和statvfs结果来自会话级host_facts快照，整个会话只读取一次。
+    """
+
+    @pytest.mark.hardware
+    @pytest.mark.critical
+    def test_required_mount_points(self, host_facts):
+        """测试必需挂载点存在"""
+        mounts = host_facts.mounts()
+        assert mounts, "无法读取/proc/self/mountinfo"
+
+        missing = [mount for mount in Config.REQUIRED_MOUNT_POINTS if mount not in mounts]
+        assert not missing, f"缺少必需的挂载点: {', '.join(missing)}"
+
+    @pytest.mark.hardware
+    @pytest.mark.critical
+    def test_disk_space(self, host_facts):
+        """测试挂载点剩余空间"""
+        usage = host_facts.fs_usage()
+        assert usage, "无法获取文件系统使用情况"
+
+        for mount, min_gb in Config.MIN_DISK_SPACE_GB.items():
+            fs = usage.get(mount)
+            assert fs is not None, f"无法获取 {mount} 的使用情况"
+            avail_gb = fs.avail_bytes / (1024 ** 3)
+            assert avail_gb >= min_gb, \
+                f"{mount} 剩余空间不足: {avail_gb:.1f}GB < {min_gb}GB"
+
+    @pytest.mark.hardware
+    def test_free_inodes(self, host_facts):
+        """测试挂载点剩余inode"""
+        for mount, fs in sorted(host_facts.fs_usage().items()):
+            # tmpfs等部分文件系统不统计inode
+            if fs is None or fs.free_inodes_percent is None:
+                continue
+            assert fs.free_inodes_percent >= Config.MIN_FREE_INODES_PERCENT, \
+                f"{mount} 剩余inode不足: {fs.free_inodes_percent:.1f}% " \
+                f"< {Config.MIN_FREE_INODES_PERCENT}%"
+
+    @pytest.mark.hardware
+    def test_mount_options(self, host_facts):
+        """测试挂载选项: 必需挂载点可写、atime策略及指定的选项"""
+        mounts = host_facts.mounts()
+
+        for mount in Config.REQUIRED_MOUNT_POINTS:
+            info = mounts.get(mount)
+            if info is None:
+                continue  # 缺失的挂载点由test_required_mount_points报告
+
+            assert not info.read_only, f"{mount} 以只读方式挂载"
+            assert any(option in info.options for option in Config.ALLOWED_ATIME_OPTIONS), \
+                f"{mount} 未使用 {'/'.join(Config.ALLOWED_ATIME_OPTIONS)}: {','.join(info.options)}"
+
+        for mount, options in Config.REQUIRED_MOUNT_OPTIONS.items():
+            info = mounts.get(mount)
+            assert info is not None, f"缺少挂载点: {mount}"
+            missing = [option for option in options if option not in info.options]
+            assert not missing, f"{mount} 缺少挂载选项: {', '.join(missing)}"
+
+
+@pytest.mark.hardware
+@pytest.mark.benchmark
+@pytest.mark.isolated
+class TestStorageBenchmark:
+    """存储I/O基准测试类"""
+
+    @pytest.mark.parametrize("mount", Config.REQUIRED_MOUNT_POINTS)
+    def test_io_performance(self, mount):
+        """测试挂载点的顺序/随机读写性能"""
+        from disk_bench import bench_mount, check_thresholds
+
+        try:
+            result = bench_mount(mount)
+        except FileNotFoundError:
+            pytest.skip(f"挂载点不存在: {mount}")
+        except OSError as e:
+            if e.errno in (errno.ENOSPC, errno.EACCES, errno.EROFS):
+                pytest.skip(f"无法在 {mount} 上创建临时文件: {e}")
+            raise
+
+        violations = check_thresholds(result)
+        mode = "O_DIRECT" if result.direct else "缓冲I/O"
+        assert not violations, \
+            f"{mount} ({mode}) 存储性能未达标: " + "; ".join(violations)
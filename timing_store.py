@@ -0,0 +1,109 @@
+"""
+测试耗时历史
+
+每次pytest会话结束时，把各测试的耗时 (setup+call+teardown，包含会话级探测的采集时间)、
+结果与被测主机标识在一个事务中写入本地SQLite库。会话运行期间只在内存中累积，不访问数据库。
+
+趋势报告按主机统计每个测试最近 TIMING_TREND_SAMPLES 次的p50/p95，并比较最近
+TIMING_RECENT_SAMPLES 次与之前各次的中位数，变慢超过阈值的测试标记为回归。
+时间预算模式 (--budget) 用各测试的历史中位数预估其能否在剩余预算内完成。
+"""
+
+import sqlite3
+from collections import namedtuple
+from contextlib import closing
+
+from config import Config
+from stats import median, percentile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    started REAL NOT NULL,
+    markexpr TEXT NOT NULL,
+    exitstatus INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    nodeid TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_host ON runs(host, id);
+"""
+
+# 参与趋势统计的结果 (跳过的测试耗时没有意义)
+TIMED_OUTCOMES = ("passed", "failed", "error")
+
+TrendRow = namedtuple("TrendRow", "nodeid samples p50 p95 latest recent_p50 baseline_p50 regressed")
+
+
+def connect(path=None):
+    # 并行分组会同时写入，等待其他进程的事务结束而不是立即报错
+    db = sqlite3.connect(path or Config.TIMING_DB, timeout=30)
+    db.executescript(SCHEMA)
+    return db
+
+
+def record_run(host, started, markexpr, exitstatus, timings, path=None):
+    """一个事务写入一次会话的全部测试耗时，timings为 (测试ID, 结果, 秒数) 列表，返回run id"""
+    with closing(connect(path)) as db, db:
+        run_id = db.execute(
+            "INSERT INTO runs (host, started, markexpr, exitstatus) VALUES (?, ?, ?, ?)",
+            (host, started, markexpr, exitstatus)
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO timings (run_id, nodeid, outcome, duration) VALUES (?, ?, ?, ?)",
+            [(run_id, nodeid, outcome, duration) for nodeid, outcome, duration in timings]
+        )
+    return run_id
+
+
+def _history(host, samples, path):
+    """测试ID -> 最近samples次耗时 (从新到旧)"""
+    history = {}
+    with closing(connect(path)) as db:
+        rows = db.execute(
+            "SELECT t.nodeid, t.duration FROM timings t JOIN runs r ON r.id = t.run_id "
+            f"WHERE r.host = ? AND t.outcome IN ({', '.join('?' * len(TIMED_OUTCOMES))}) "
+            "ORDER BY t.run_id DESC",
+            (host,) + TIMED_OUTCOMES
+        )
+        for nodeid, duration in rows:
+            durations = history.setdefault(nodeid, [])
+            if len(durations) < samples:
+                durations.append(duration)
+    return history
+
+
+def estimates(host, samples=None, path=None):
+    """测试ID -> 该主机最近各次耗时的中位数，供时间预算模式预估测试能否在剩余预算内完成"""
+    history = _history(host, samples or Config.TIMING_TREND_SAMPLES, path)
+    return {nodeid: median(durations) for nodeid, durations in history.items()}
+
+
+def trend(host, samples=None, recent=None, path=None):
+    """返回该主机每个测试的TrendRow，按p95从慢到快排序"""
+    samples = samples or Config.TIMING_TREND_SAMPLES
+    recent = recent or Config.TIMING_RECENT_SAMPLES
+
+    report = []
+    for nodeid, durations in _history(host, samples, path).items():
+        recent_p50 = baseline_p50 = None
+        regressed = False
+        # 之前的样本至少与最近的样本一样多时才判断回归
+        if len(durations) >= 2 * recent:
+            recent_p50 = median(durations[:recent])
+            baseline_p50 = median(durations[recent:])
+            regressed = (
+                recent_p50 > baseline_p50 * (1 + Config.TIMING_REGRESSION_PERCENT / 100.0)
+                and (recent_p50 - baseline_p50) * 1000 >= Config.TIMING_REGRESSION_MIN_MS
+            )
+        report.append(TrendRow(
+            nodeid, len(durations), percentile(durations, 50), percentile(durations, 95),
+            durations[0], recent_p50, baseline_p50, regressed
+        ))
+
+    report.sort(key=lambda row: -row.p95)
+    return report
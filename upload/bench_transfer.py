@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录传输方式基准测试
+
+在合成的小文件目录树 (默认10000个文件) 上比较 scp 递归上传与 tar 流式上传的耗时。
+默认使用本地SSH服务替身 (sshd_standin.py)，也可以通过 --host 指向真实靶机。
+
+使用示例:
+  python bench_transfer.py                           # 本地替身, 10000个文件
+  python bench_transfer.py --files 2000 --codecs gzip,none
+  python bench_transfer.py --host 192.168.1.101 --password xxx --remote-dir /tmp/bench
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from upload_project import TAR_CODECS, ProjectUploader
+from sshd_standin import StandinSSHServer, generate_host_key
+
+
+def make_tree(root, file_count, file_size):
+    """生成合成目录树: 每个子目录100个文件，内容可压缩但互不相同"""
+    tree = Path(root) / 'tree'
+    for i in range(file_count):
+        directory = tree / f"d{i // 100:03d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        line = f"file {i} " + "x" * 32 + "\n"
+        (directory / f"f{i:05d}.txt").write_text((line * (file_size // len(line) + 1))[:file_size])
+    return tree
+
+
+def run_once(target_config, local_root, remote_base, **options):
+    """用指定传输方式上传整棵目录树，返回耗时 (秒)"""
+    project_config = {
+        'remote_base_path': remote_base,
+        'local_project_root': local_root,
+        'batches': {
+            'tree': {'name': '合成目录树', 'files': ['tree'], 'description': '基准测试'}
+        }
+    }
+    target = dict(target_config, remote_base_path=remote_base)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        uploader = ProjectUploader('bench', target_config=target,
+                                   project_config=project_config, **options)
+        uploader.prepare_local_manifest()
+        uploader.connect()
+        try:
+            start = time.time()
+            success = uploader.upload_batch('tree', project_config['batches']['tree'])
+            elapsed = time.time() - start
+        finally:
+            uploader.disconnect()
+
+    if not success:
+        raise RuntimeError(f"上传失败: {options}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='scp递归上传与tar流式上传基准测试')
+    parser.add_argument('--files', type=int, default=10000, help='合成文件数 (默认: 10000)')
+    parser.add_argument('--file-size', type=int, default=512, help='单个文件字节数 (默认: 512)')
+    parser.add_argument('--codecs', default='gzip,none',
+                        help=f"参与比较的tar压缩方式, 逗号分隔 (可选: {','.join(TAR_CODECS)})")
+    parser.add_argument('--level', type=int, default=1, help='tar流压缩级别 (默认: 1)')
+    parser.add_argument('--host', help='真实靶机地址，不指定时使用本地SSH服务替身')
+    parser.add_argument('--port', type=int, default=22)
+    parser.add_argument('--username', default='root')
+    parser.add_argument('--password')
+    parser.add_argument('--key-filename')
+    parser.add_argument('--remote-dir', default='/tmp/bench_transfer', help='真实靶机上的临时目录')
+    args = parser.parse_args()
+
+    # 替身服务端在客户端断开时会记录连接重置，基准输出中不需要
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+
+    workdir = tempfile.mkdtemp(prefix='bench_transfer_')
+    server = None
+    try:
+        print(f"生成合成目录树: {args.files} 个文件 x {args.file_size} 字节")
+        make_tree(workdir, args.files, args.file_size)
+
+        if args.host:
+            target = {
+                'hostname': args.host, 'port': args.port, 'username': args.username,
+                'password': args.password, 'key_filename': args.key_filename
+            }
+            remote_root = args.remote_dir
+        else:
+            server = StandinSSHServer(generate_host_key()).start()
+            target = {
+                'hostname': '127.0.0.1', 'port': server.port, 'username': 'bench',
+                'password': 'bench', 'key_filename': None
+            }
+            remote_root = os.path.join(workdir, 'remote')
+
+        runs = [('scp 递归', {'dir_transfer': 'scp'})]
+        for codec in args.codecs.split(','):
+            runs.append((f"tar流 {codec}", {
+                'dir_transfer': 'tar', 'tar_codec': codec, 'compression_level': args.level
+            }))
+
+        results = []
+        for index, (label, options) in enumerate(runs):
+            elapsed = run_once(target, workdir, f"{remote_root}/run{index}", **options)
+            results.append((label, elapsed))
+            print(f"  {label:<12} {elapsed:8.2f}秒  {args.files / elapsed:10.0f} 文件/秒")
+
+        baseline = results[0][1]
+        print("\n相对scp递归上传的加速比:")
+        for label, elapsed in results[1:]:
+            print(f"  {label:<12} {baseline / elapsed:6.1f}x")
+
+        if args.host:
+            print(f"\n提示: 请手动清理靶机上的临时目录 {args.remote_dir}")
+
+    finally:
+        if server:
+            server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
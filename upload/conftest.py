@@ -0,0 +1,51 @@
+"""
+上传工具测试配置
+
+基于本地SSH服务替身 (sshd_standin.py) 提供fixture，远程路径即本机临时目录。
+"""
+
+import pytest
+
+from sshd_standin import StandinSSHServer, generate_host_key
+
+
+@pytest.fixture(scope='session')
+def standin_host_key():
+    return generate_host_key()
+
+
+@pytest.fixture
+def standin_factory(standin_host_key):
+    """按需启动SSH服务替身 (可指定注入延迟)，测试结束后统一关闭"""
+    servers = []
+
+    def start(exec_latency=0.0, overrides=None):
+        server = StandinSSHServer(standin_host_key, exec_latency, overrides).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def ssh_standin(standin_factory):
+    """启动一个无延迟的SSH服务替身"""
+    return standin_factory()
+
+
+@pytest.fixture
+def standin_target():
+    """生成指向服务替身的主机配置 (格式同TARGET_HOSTS)"""
+    def make_target(server, remote_base):
+        return {
+            'hostname': '127.0.0.1',
+            'port': server.port,
+            'username': 'tester',
+            'password': 'standin',
+            'key_filename': None,
+            'description': '本地SSH服务替身',
+            'remote_base_path': str(remote_base)
+        }
+    return make_target
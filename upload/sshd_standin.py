@@ -0,0 +1,250 @@
+"""
+本地SSH服务替身
+
+用paramiko实现服务端，exec请求直接交给本机 /bin/sh 执行，sftp子系统直接操作本机文件，
+远程路径即本机目录，可在不依赖真实sshd的情况下验证和压测上传流程
+(测试与 bench_transfer.py 共用)。
+"""
+
+import os
+import socket
+import subprocess
+import threading
+import time
+
+import paramiko
+
+
+class _StandinSFTPHandle(paramiko.SFTPHandle):
+    """sftp文件句柄，读写直接落到本机文件"""
+
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        try:
+            if attr.st_size is not None:
+                self.writefile.truncate(attr.st_size)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+
+class _StandinSFTPInterface(paramiko.SFTPServerInterface):
+    """sftp子系统: 远程路径原样映射为本机路径"""
+
+    def _attempt(self, func, *args):
+        try:
+            func(*args)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(path, flags, 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+        if flags & os.O_WRONLY:
+            mode = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            mode = 'a+b' if flags & os.O_APPEND else 'r+b'
+        else:
+            mode = 'rb'
+
+        handle = _StandinSFTPHandle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def list_folder(self, path):
+        try:
+            return [
+                paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)), name)
+                for name in os.listdir(path)
+            ]
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def remove(self, path):
+        return self._attempt(os.remove, path)
+
+    def rename(self, oldpath, newpath):
+        return self._attempt(os.rename, oldpath, newpath)
+
+    def posix_rename(self, oldpath, newpath):
+        return self._attempt(os.replace, oldpath, newpath)
+
+    def mkdir(self, path, attr):
+        return self._attempt(os.mkdir, path)
+
+    def rmdir(self, path):
+        return self._attempt(os.rmdir, path)
+
+    def chattr(self, path, attr):
+        if attr.st_size is not None:
+            return self._attempt(os.truncate, path, attr.st_size)
+        return paramiko.SFTP_OK
+
+    def canonicalize(self, path):
+        return os.path.normpath(path)
+
+
+class _StandinInterface(paramiko.ServerInterface):
+    """接受任意凭据，只允许session通道、exec请求和sftp子系统"""
+
+    def __init__(self, server):
+        self.server = server
+
+    def get_allowed_auths(self, username):
+        return 'password,publickey'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        command = command.decode('utf-8')
+        self.server.record(command)
+        threading.Thread(
+            target=self.server.run_command, args=(channel, command), daemon=True
+        ).start()
+        return True
+
+
+class StandinSSHServer:
+    """本地SSH服务替身
+
+    exec_latency 为每条远程命令注入的固定延迟 (秒)，用来模拟远距离链路的往返时间；
+    overrides 中的命令前缀不真正执行，直接返回给定退出码 (例如 ping)。
+    """
+
+    def __init__(self, host_key, exec_latency=0.0, overrides=None):
+        self.host_key = host_key
+        self.exec_latency = exec_latency
+        self.overrides = overrides if overrides is not None else {'ping ': 0}
+        self.commands = []
+        self._lock = threading.Lock()
+        self._sock = None
+        self._transports = []
+
+    @property
+    def port(self):
+        return self._sock.getsockname()[1]
+
+    def record(self, command):
+        with self._lock:
+            self.commands.append(command)
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(128)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._sock.close()
+        for transport in self._transports:
+            transport.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _StandinSFTPInterface)
+            transport.start_server(server=_StandinInterface(self))
+            # 通道由exec回调处理；不调用accept，accept队列持有通道引用防止被回收关闭
+            self._transports.append(transport)
+
+    def run_command(self, channel, command):
+        """在本机执行命令，并把通道与子进程的stdin/stdout/stderr双向桥接"""
+        if self.exec_latency:
+            time.sleep(self.exec_latency)
+
+        for prefix, exit_code in self.overrides.items():
+            if command.startswith(prefix):
+                channel.send_exit_status(exit_code)
+                channel.close()
+                return
+
+        proc = subprocess.Popen(
+            ['/bin/sh', '-c', command],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+        def feed_stdin():
+            try:
+                while True:
+                    data = channel.recv(65536)
+                    if not data:
+                        break
+                    proc.stdin.write(data)
+                    proc.stdin.flush()
+            except (OSError, ValueError):
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+
+        def pump(stream, send):
+            # 客户端可能提前关闭通道，此后继续读空管道让子进程正常退出
+            while True:
+                data = os.read(stream.fileno(), 65536)
+                if not data:
+                    break
+                try:
+                    send(data)
+                except OSError:
+                    pass
+
+        threading.Thread(target=feed_stdin, daemon=True).start()
+        stderr_thread = threading.Thread(
+            target=pump, args=(proc.stderr, channel.sendall_stderr), daemon=True)
+        stderr_thread.start()
+
+        pump(proc.stdout, channel.sendall)
+        exit_code = proc.wait()
+        stderr_thread.join()
+
+        try:
+            channel.send_exit_status(exit_code)
+            channel.shutdown_write()
+            channel.close()
+        except (OSError, EOFError):
+            pass
+
+
+def generate_host_key():
+    """生成替身使用的临时主机密钥"""
+    return paramiko.RSAKey.generate(1024)
+
@@ -0,0 +1,770 @@
+"""
+上传工具测试
+
+基于本地SSH服务替身 (见 conftest.py) 验证上传流程，运行方式:
+    python -m pytest upload/
+"""
+
+import json
+import os
+import threading
+import time
+
+import paramiko
+import pytest
+
+import upload_project
+from upload_project import (
+    STORE_KEEP_PREVIOUS,
+    TAR_CODECS,
+    BudgetedChannel,
+    ByteBudget,
+    FleetUploader,
+    ProjectUploader,
+    SSHConnectionPool,
+    build_manifest,
+    find_env_package,
+    load_inventory,
+    resolve_targets,
+    zstandard
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    """构造一个小型本地项目及对应的批次配置"""
+    root = tmp_path / 'project'
+    (root / 'tests').mkdir(parents=True)
+    (root / 'tests' / 'test_sample.py').write_text('def test_ok():\n    pass\n')
+    (root / 'run_tests.py').write_text('print("run")\n')
+    (root / 'config.py').write_text('class Config:\n    pass\n')
+
+    return {
+        'remote_base_path': '/nonexistent',
+        'local_project_root': root,
+        'batches': {
+            'test_code': {
+                'name': '测试代码',
+                'files': ['tests'],
+                'description': 'pytest测试用例目录'
+            },
+            'main_scripts': {
+                'name': '主脚本',
+                'files': ['run_tests.py', 'config.py'],
+                'description': '核心运行脚本和配置文件'
+            }
+        }
+    }
+
+
+class TestProjectUploader:
+    """单主机上传测试"""
+
+    def test_upload_all(self, ssh_standin, standin_target, project, tmp_path):
+        remote = tmp_path / 'remote'
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, remote),
+            project_config=project
+        )
+
+        assert uploader.upload_all()
+        assert (remote / 'run_tests.py').read_text() == 'print("run")\n'
+        assert (remote / 'tests' / 'test_sample.py').exists()
+
+    def test_upload_all_reports_failure(self, ssh_standin, standin_target, project, tmp_path):
+        project['batches']['main_scripts']['files'].append('missing.py')
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, tmp_path / 'remote'),
+            project_config=project
+        )
+
+        assert not uploader.upload_all()
+
+    def test_batch_uses_single_round_trips(self, ssh_standin, standin_target, project, tmp_path):
+        """每个批次只有一次目录准备和一次校验远程调用，不再逐文件mkdir/ls"""
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, tmp_path / 'remote'),
+            project_config=project
+        )
+        uploader.connect()
+        try:
+            uploader.load_remote_manifest()
+            batch = project['batches']['main_scripts']
+            ssh_standin.commands.clear()
+            assert uploader.upload_batch('main_scripts', batch)
+            assert uploader.verify_upload('main_scripts', batch)
+        finally:
+            uploader.disconnect()
+
+        remote_calls = [c for c in ssh_standin.commands if c.startswith('python3 -c')]
+        assert len(remote_calls) == 2
+        assert not [c for c in ssh_standin.commands if c.startswith(('mkdir', 'ls'))]
+
+    def test_verify_detects_content_mismatch(self, ssh_standin, standin_target, project, tmp_path):
+        remote = tmp_path / 'remote'
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, remote),
+            project_config=project
+        )
+        assert uploader.upload_all()
+
+        # 大小相同但内容不同，只有哈希比对能发现
+        original = (remote / 'config.py').read_text()
+        (remote / 'config.py').write_text(original.upper())
+        uploader.connect()
+        try:
+            assert not uploader.verify_upload('main_scripts', project['batches']['main_scripts'])
+        finally:
+            uploader.disconnect()
+
+        assert 'config.py' not in uploader.remote_manifest
+
+
+class TestConnectionPool:
+    """SSH连接池测试: 连接复用、自动重连与并发通道"""
+
+    @pytest.fixture
+    def pool(self):
+        pool = SSHConnectionPool()
+        yield pool
+        pool.close_all()
+
+    def test_uploaders_share_transport(self, ssh_standin, standin_target, project, tmp_path, pool):
+        target = standin_target(ssh_standin, tmp_path / 'remote')
+        first = ProjectUploader('standin', target_config=target, project_config=project, pool=pool)
+        second = ProjectUploader('standin', target_config=target, project_config=project, pool=pool)
+
+        first.connect()
+        first.disconnect()
+        second.connect()
+        try:
+            assert second.connection is pool.get('127.0.0.1', ssh_standin.port, 'tester')
+            assert second.connection.connects == 1
+        finally:
+            second.disconnect()
+
+    def test_reconnects_after_transport_drop(self, ssh_standin, standin_target, project,
+                                             tmp_path, pool):
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, tmp_path / 'remote'),
+            project_config=project,
+            pool=pool
+        )
+        uploader.connect()
+        try:
+            dropped = uploader.ssh_client
+            dropped.get_transport().close()
+            # 操作途中不悄悄重连: ssh_client仍是断开的连接
+            assert uploader.ssh_client is dropped
+            assert uploader.connection.connects == 1
+
+            # 下一项操作开始时显式重连，SCP通道建立在新的transport上
+            uploader.ensure_connected()
+            assert uploader.connection.connects == 2
+            assert uploader.scp_client.transport is uploader.ssh_client.get_transport()
+            assert uploader.prepare_remote([str(tmp_path / 'remote')]) is not None
+        finally:
+            uploader.disconnect()
+
+    def test_deployment_checks_run_concurrently(self, standin_factory, standin_target, project,
+                                                tmp_path, pool):
+        """每条远程命令注入0.2秒延迟，4项检查串行约0.8秒，并发执行应接近单条耗时"""
+        server = standin_factory(exec_latency=0.2)
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(server, tmp_path),
+            project_config=project,
+            pool=pool
+        )
+        uploader.connect()
+        try:
+            elapsed = uploader.run_deployment_checks()
+        finally:
+            uploader.disconnect()
+
+        assert len(server.commands) == 4
+        assert elapsed < 0.5, f"部署后检查耗时 {elapsed:.2f}秒"
+
+    def test_run_drains_large_stderr(self, ssh_standin, pool):
+        """stderr输出超过通道窗口时命令仍能结束，stdout与stderr都完整"""
+        connection = pool.get('127.0.0.1', ssh_standin.port, 'tester', password='standin')
+        script = "import sys; sys.stderr.write('e' * 8000000); sys.stdout.write('done')"
+
+        result = connection.run(f'python3 -c "{script}"', timeout=20)
+
+        assert result.returncode == 0
+        assert result.stdout == b'done'
+        assert len(result.stderr) == 8000000
+
+    def test_run_many_isolates_any_exception(self, ssh_standin, pool, monkeypatch):
+        """某条命令抛出非连接类异常时只影响该位置的结果"""
+        connection = pool.get('127.0.0.1', ssh_standin.port, 'tester', password='standin')
+        run = connection.run
+
+        def flaky_run(command, stdin=None, timeout=None):
+            if command == 'bad':
+                raise ValueError('无法解析输出')
+            return run(command, stdin=stdin, timeout=timeout)
+
+        monkeypatch.setattr(connection, 'run', flaky_run)
+        results = connection.run_many(['true', 'bad', 'true'])
+
+        assert isinstance(results[1], ValueError)
+        assert [result.returncode for result in (results[0], results[2])] == [0, 0]
+
+
+class TestDeltaUpload:
+    """内容哈希清单与增量上传测试"""
+
+    @staticmethod
+    def scp_uploads(server):
+        return [command for command in server.commands if command.startswith('scp ')]
+
+    def make_uploader(self, server, standin_target, project, remote):
+        return ProjectUploader(
+            'standin',
+            target_config=standin_target(server, remote),
+            project_config=project
+        )
+
+    def test_unchanged_files_skipped(self, ssh_standin, standin_target, project, tmp_path):
+        remote = tmp_path / 'remote'
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+        assert (remote / '.upload_manifest.json').exists()
+
+        ssh_standin.commands.clear()
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+
+        # 只剩写回远程清单的一次传输
+        assert len(self.scp_uploads(ssh_standin)) == 1
+
+    def test_only_changed_file_uploaded(self, ssh_standin, standin_target, project, tmp_path):
+        remote = tmp_path / 'remote'
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+
+        root = project['local_project_root']
+        (root / 'tests' / 'test_sample.py').write_text('def test_changed():\n    pass\n')
+        ssh_standin.commands.clear()
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+
+        assert len(self.scp_uploads(ssh_standin)) == 2
+        assert 'test_changed' in (remote / 'tests' / 'test_sample.py').read_text()
+        # 目录不能被嵌套上传成 tests/tests
+        assert not (remote / 'tests' / 'tests').exists()
+
+    def test_verify_hashes_only_transferred_files(self, ssh_standin, standin_target, project,
+                                                  tmp_path, monkeypatch):
+        """只改配置时，验证阶段只在远程对本次传输的文件计算SHA-256"""
+        remote = tmp_path / 'remote'
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+
+        original = ProjectUploader.remote_batch
+        hashed = []
+
+        def remote_batch(self, mkdirs=(), stat=(), links=None, hash_files=True):
+            if stat and hash_files is not False:
+                hashed.extend(stat if hash_files is True else hash_files)
+            return original(self, mkdirs, stat, links, hash_files)
+
+        monkeypatch.setattr(ProjectUploader, 'remote_batch', remote_batch)
+        (project['local_project_root'] / 'config.py').write_text('class Config:\n    DEBUG = True\n')
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+
+        assert hashed == [f"{remote}/config.py"]
+
+    def test_verify_detects_size_change_of_skipped_file(self, ssh_standin, standin_target,
+                                                        project, tmp_path):
+        remote = tmp_path / 'remote'
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+
+        # 远程文件在两次上传之间被截断: 清单认为未变化，但大小比对仍能发现
+        (remote / 'run_tests.py').write_text('')
+        uploader = self.make_uploader(ssh_standin, standin_target, project, remote)
+        assert not uploader.upload_all()
+        assert 'run_tests.py' not in uploader.remote_manifest
+
+    def test_print_delta_counts_bytes(self, ssh_standin, standin_target, project, tmp_path):
+        remote = tmp_path / 'remote'
+        assert self.make_uploader(ssh_standin, standin_target, project, remote).upload_all()
+
+        root = project['local_project_root']
+        (root / 'config.py').write_text('x' * 100)
+        uploader = self.make_uploader(ssh_standin, standin_target, project, remote)
+        uploader.connect()
+        try:
+            uploader.load_remote_manifest()
+        finally:
+            uploader.disconnect()
+
+        assert uploader.print_delta() == 100
+
+    def test_build_manifest_reuses_cached_hash(self, project):
+        root = project['local_project_root']
+        manifest = build_manifest(root, ['config.py'])
+        manifest['config.py']['sha256'] = 'cached'
+
+        assert build_manifest(root, ['config.py'], manifest)['config.py']['sha256'] == 'cached'
+
+
+class TestTarStreaming:
+    """目录tar流式上传测试"""
+
+    @pytest.mark.parametrize('codec', TAR_CODECS)
+    def test_directory_streamed(self, codec, ssh_standin, standin_target, project, tmp_path):
+        if codec == 'zstd' and zstandard is None:
+            pytest.skip("未安装zstandard")
+
+        remote = tmp_path / 'remote'
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, remote),
+            project_config=project,
+            dir_transfer='tar',
+            tar_codec=codec,
+            compression_level=1
+        )
+
+        assert uploader.upload_all()
+        assert (remote / 'tests' / 'test_sample.py').read_text() == 'def test_ok():\n    pass\n'
+        assert [c for c in ssh_standin.commands if 'tar -x' in c]
+
+    def test_only_changed_files_streamed(self, ssh_standin, standin_target, project, tmp_path):
+        remote = tmp_path / 'remote'
+        root = project['local_project_root']
+        (root / 'tests' / 'test_other.py').write_text('def test_other():\n    pass\n')
+
+        def upload():
+            return ProjectUploader(
+                'standin',
+                target_config=standin_target(ssh_standin, remote),
+                project_config=project,
+                dir_transfer='tar'
+            )
+
+        assert upload().upload_all()
+        (root / 'tests' / 'test_other.py').write_text('def test_changed():\n    pass\n')
+
+        uploader = upload()
+        uploader.connect()
+        try:
+            uploader.load_remote_manifest()
+            _, changed = uploader.changed_files('tests')
+        finally:
+            uploader.disconnect()
+        assert changed == ['tests/test_other.py']
+
+        assert upload().upload_all()
+        assert 'test_changed' in (remote / 'tests' / 'test_other.py').read_text()
+
+    def test_remote_extract_failure_reported(self, ssh_standin, standin_target, project, tmp_path):
+        # 远程目录是普通文件，tar无法解压
+        remote = tmp_path / 'remote'
+        remote.write_text('not a directory')
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, remote),
+            project_config=project,
+            dir_transfer='tar'
+        )
+
+        assert not uploader.upload_all()
+
+    def test_remote_warnings_drained_while_sending(self, ssh_standin, standin_target, project,
+                                                   tmp_path, monkeypatch):
+        """远程解压命令的stderr输出超过通道窗口时上传不会停住"""
+        extract = upload_project.remote_extract_command
+
+        def noisy_extract(codec, target_dir):
+            warnings = "import sys; sys.stderr.write('w' * 8000000)"
+            return f'python3 -c "{warnings}" && {extract(codec, target_dir)}'
+
+        monkeypatch.setattr(upload_project, 'remote_extract_command', noisy_extract)
+        remote = tmp_path / 'remote'
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, remote),
+            project_config=project,
+            dir_transfer='tar'
+        )
+
+        assert uploader.upload_all()
+        assert (remote / 'tests' / 'test_sample.py').exists()
+
+    def test_channel_closed_when_compression_fails(self, ssh_standin, standin_target, project,
+                                                   tmp_path, monkeypatch):
+        class BrokenCompressor:
+            def compress(self, data):
+                raise OSError('压缩失败')
+
+        channels = []
+        open_session = paramiko.Transport.open_session
+
+        def recording_open_session(transport, *args, **kwargs):
+            channels.append(open_session(transport, *args, **kwargs))
+            return channels[-1]
+
+        monkeypatch.setattr(upload_project, 'make_compressor', lambda codec, level: BrokenCompressor())
+        monkeypatch.setattr(paramiko.Transport, 'open_session', recording_open_session)
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(ssh_standin, tmp_path / 'remote'),
+            project_config=project,
+            dir_transfer='tar'
+        )
+        uploader.connect()
+        try:
+            channels.clear()
+            with pytest.raises(OSError):
+                uploader.stream_tar(['tests/test_sample.py'])
+        finally:
+            uploader.disconnect()
+
+        assert len(channels) == 1 and channels[0].closed
+
+
+class TestChunkedUpload:
+    """大文件分块并行上传与断点续传测试"""
+
+    CHUNK_SIZE = 64 * 1024
+    CHUNK_COUNT = 5
+
+    @pytest.fixture
+    def env_project(self, project):
+        root = project['local_project_root']
+        data = os.urandom(self.CHUNK_SIZE * (self.CHUNK_COUNT - 1) + 1000)
+        (root / 'test_env.tar.gz').write_bytes(data)
+        project['batches'] = {
+            'env_package': {
+                'name': '环境包',
+                'files': ['test_env.tar.gz'],
+                'description': 'Python虚拟环境压缩包'
+            }
+        }
+        return project
+
+    def make_uploader(self, server, standin_target, project, remote, **options):
+        return ProjectUploader(
+            'standin',
+            target_config=standin_target(server, remote),
+            project_config=project,
+            chunked_threshold=100 * 1024,
+            chunk_size=self.CHUNK_SIZE,
+            streams=3,
+            **options
+        )
+
+    @staticmethod
+    def count_chunks(monkeypatch, fail_on=()):
+        """统计发送的块数，fail_on中的调用序号抛出连接中断"""
+        original = ProjectUploader._send_chunk
+        calls = []
+        lock = threading.Lock()
+
+        def send_chunk(self, *args):
+            with lock:
+                calls.append(args[-1])
+                call_number = len(calls)
+            if call_number in fail_on or 'all' in fail_on and call_number > 2:
+                raise EOFError("模拟连接中断")
+            return original(self, *args)
+
+        monkeypatch.setattr(ProjectUploader, '_send_chunk', send_chunk)
+        return calls
+
+    def test_large_file_reassembled(self, ssh_standin, standin_target, env_project, tmp_path,
+                                    monkeypatch):
+        remote = tmp_path / 'remote'
+        calls = self.count_chunks(monkeypatch)
+
+        assert self.make_uploader(ssh_standin, standin_target, env_project, remote).upload_all()
+
+        local = env_project['local_project_root'] / 'test_env.tar.gz'
+        assert (remote / 'test_env.tar.gz').read_bytes() == local.read_bytes()
+        assert sorted(calls) == list(range(self.CHUNK_COUNT))
+        assert not list(remote.glob('*.part*'))
+
+    def test_inflight_limit_below_chunk_size(self, ssh_standin, standin_target, env_project,
+                                             tmp_path):
+        """在途上限小于块大小时，每个块分窗口写入，三条通道合计不超过上限"""
+        remote = tmp_path / 'remote'
+        uploader = self.make_uploader(ssh_standin, standin_target, env_project, remote,
+                                      max_inflight_bytes=self.CHUNK_SIZE // 4)
+
+        assert uploader.upload_all()
+
+        local = env_project['local_project_root'] / 'test_env.tar.gz'
+        assert (remote / 'test_env.tar.gz').read_bytes() == local.read_bytes()
+
+    def test_reconnect_resumes_in_same_run(self, ssh_standin, standin_target, env_project,
+                                           tmp_path, monkeypatch):
+        remote = tmp_path / 'remote'
+        calls = self.count_chunks(monkeypatch, fail_on=(3,))
+
+        assert self.make_uploader(ssh_standin, standin_target, env_project, remote).upload_all()
+
+        # 只有中断的那一块被重传
+        assert len(calls) == self.CHUNK_COUNT + 1
+
+    def test_resume_after_failed_run(self, ssh_standin, standin_target, env_project, tmp_path,
+                                     monkeypatch):
+        remote = tmp_path / 'remote'
+        self.count_chunks(monkeypatch, fail_on=('all',))
+        assert not self.make_uploader(ssh_standin, standin_target, env_project, remote).upload_all()
+        assert (remote / 'test_env.tar.gz.part.bitmap').read_bytes().count(b'1') == 2
+
+        monkeypatch.undo()
+        calls = self.count_chunks(monkeypatch)
+        assert self.make_uploader(ssh_standin, standin_target, env_project, remote).upload_all()
+
+        assert len(calls) == self.CHUNK_COUNT - 2
+        local = env_project['local_project_root'] / 'test_env.tar.gz'
+        assert (remote / 'test_env.tar.gz').read_bytes() == local.read_bytes()
+
+
+class TestContentAddressedStore:
+    """靶机内容寻址存储测试"""
+
+    @pytest.fixture
+    def store_project(self, project):
+        root = project['local_project_root']
+        (root / 'test_env.tar.gz').write_bytes(b'venv v1')
+        project['batches'] = {
+            'env_package': {
+                'name': '环境包',
+                'files': ['test_env.tar.gz'],
+                'description': 'Python虚拟环境压缩包',
+                'content_addressed': True
+            }
+        }
+        return project
+
+    def upload(self, server, standin_target, project, remote):
+        uploader = ProjectUploader(
+            'standin',
+            target_config=standin_target(server, remote),
+            project_config=project
+        )
+        assert uploader.upload_all()
+        return uploader
+
+    def test_artifact_linked_into_store(self, ssh_standin, standin_target, store_project,
+                                        tmp_path):
+        remote = tmp_path / 'remote'
+        uploader = self.upload(ssh_standin, standin_target, store_project, remote)
+
+        sha256 = uploader.local_manifest['test_env.tar.gz']['sha256']
+        artifact = remote / 'test_env.tar.gz'
+        assert artifact.is_symlink()
+        assert os.readlink(str(artifact)) == f'.store/{sha256}/test_env.tar.gz'
+        assert artifact.read_bytes() == b'venv v1'
+
+    def test_rollback_reuses_stored_artifact(self, ssh_standin, standin_target, store_project,
+                                             tmp_path):
+        remote = tmp_path / 'remote'
+        artifact = store_project['local_project_root'] / 'test_env.tar.gz'
+        self.upload(ssh_standin, standin_target, store_project, remote)
+        artifact.write_bytes(b'venv v2')
+        self.upload(ssh_standin, standin_target, store_project, remote)
+
+        # 回滚到v1: 存储中已有，不再传输
+        artifact.write_bytes(b'venv v1')
+        ssh_standin.commands.clear()
+        self.upload(ssh_standin, standin_target, store_project, remote)
+
+        transfers = [c for c in ssh_standin.commands if c.startswith('scp ')]
+        assert len(transfers) == 1  # 只有远程清单
+        assert (remote / 'test_env.tar.gz').read_bytes() == b'venv v1'
+
+    def test_corrupt_stored_artifact_retransferred(self, ssh_standin, standin_target,
+                                                   store_project, tmp_path):
+        """存储中大小相同但内容损坏的制品不被复用"""
+        remote = tmp_path / 'remote'
+        artifact = store_project['local_project_root'] / 'test_env.tar.gz'
+        uploader = self.upload(ssh_standin, standin_target, store_project, remote)
+        sha256 = uploader.local_manifest['test_env.tar.gz']['sha256']
+        artifact.write_bytes(b'venv v2')
+        self.upload(ssh_standin, standin_target, store_project, remote)
+
+        (remote / '.store' / sha256 / 'test_env.tar.gz').write_bytes(b'venv x1')
+        artifact.write_bytes(b'venv v1')
+        ssh_standin.commands.clear()
+        self.upload(ssh_standin, standin_target, store_project, remote)
+
+        transfers = [c for c in ssh_standin.commands if c.startswith('scp ')]
+        assert len(transfers) == 2  # 制品与远程清单
+        assert (remote / 'test_env.tar.gz').read_bytes() == b'venv v1'
+
+    def test_prunes_old_versions(self, ssh_standin, standin_target, store_project, tmp_path):
+        """存储只保留当前版本和最近使用的STORE_KEEP_PREVIOUS个旧版本"""
+        remote = tmp_path / 'remote'
+        artifact = store_project['local_project_root'] / 'test_env.tar.gz'
+        versions = []
+        for version in range(STORE_KEEP_PREVIOUS + 3):
+            artifact.write_bytes(f'venv v{version}'.encode())
+            uploader = self.upload(ssh_standin, standin_target, store_project, remote)
+            versions.append(uploader.local_manifest['test_env.tar.gz']['sha256'])
+            # 保证各版本目录的使用时间可区分
+            os.utime(str(remote / '.store' / versions[-1]), (1000 + version, 1000 + version))
+
+        kept = sorted(path.name for path in (remote / '.store').iterdir())
+        assert kept == sorted(versions[-(STORE_KEEP_PREVIOUS + 1):])
+        assert (remote / 'test_env.tar.gz').read_bytes() == f'venv v{len(versions) - 1}'.encode()
+
+
+class TestEnvPackage:
+    """环境包格式选择测试"""
+
+    def test_prefers_zstd(self, tmp_path):
+        (tmp_path / 'test_env.tar.gz').write_bytes(b'gz')
+        (tmp_path / 'test_env.tar.zst').write_bytes(b'zst')
+        os.utime(str(tmp_path / 'test_env.tar.gz'), (1000, 1000))
+
+        assert find_env_package(tmp_path) == 'test_env.tar.zst'
+
+    def test_newer_gzip_wins_over_stale_zstd(self, tmp_path):
+        (tmp_path / 'test_env.tar.zst').write_bytes(b'zst')
+        (tmp_path / 'test_env.tar.gz').write_bytes(b'gz')
+        os.utime(str(tmp_path / 'test_env.tar.zst'), (1000, 1000))
+
+        assert find_env_package(tmp_path) == 'test_env.tar.gz'
+
+    def test_defaults_to_gzip_name(self, tmp_path):
+        assert find_env_package(tmp_path) == 'test_env.tar.gz'
+
+
+class TestByteBudget:
+    """在途字节额度测试"""
+
+    def test_reserve_rejects_more_than_capacity(self):
+        budget = ByteBudget(100)
+        with pytest.raises(ValueError):
+            with budget.reserve(101):
+                pass
+
+    def test_reserve_releases(self):
+        budget = ByteBudget(100)
+        with budget.reserve(60):
+            pass
+        with budget.reserve(100) as amount:
+            assert amount == 100
+
+    def test_write_splits_into_windows(self):
+        budget = ByteBudget(100)
+        windows = []
+
+        budget.write(windows.append, b'x' * 250)
+
+        assert [len(window) for window in windows] == [100, 100, 50]
+
+    def test_concurrent_transfers_throttled(self):
+        """同一主机的两个并发传输合计在途字节不超过上限，写入被串行化"""
+        budget = ByteBudget(100)
+        lock = threading.Lock()
+        state = {'inflight': 0, 'peak': 0}
+
+        class SlowChannel:
+            def sendall(self, data):
+                with lock:
+                    state['inflight'] += len(data)
+                    state['peak'] = max(state['peak'], state['inflight'])
+                time.sleep(0.02)
+                with lock:
+                    state['inflight'] -= len(data)
+
+        def transfer():
+            BudgetedChannel(SlowChannel(), budget).sendall(b'x' * 400)
+
+        start = time.time()
+        threads = [threading.Thread(target=transfer) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert state['peak'] == 100
+        # 两个传输各4个窗口，额度只容纳一个窗口时共8次写入依次进行
+        assert time.time() - start >= 8 * 0.02
+
+
+class TestFleet:
+    """舰队模式测试"""
+
+    def test_load_inventory_fills_defaults(self, tmp_path):
+        inventory = tmp_path / 'hosts.json'
+        inventory.write_text(json.dumps({'vm1': {'hostname': '10.0.0.1'}}))
+
+        hosts = load_inventory(str(inventory))
+
+        assert hosts['vm1']['port'] == 22
+        assert hosts['vm1']['username'] == 'root'
+
+    def test_load_inventory_requires_hostname(self, tmp_path):
+        inventory = tmp_path / 'hosts.json'
+        inventory.write_text(json.dumps({'vm1': {'port': 2222}}))
+
+        with pytest.raises(ValueError):
+            load_inventory(str(inventory))
+
+    def test_resolve_targets(self):
+        hosts = {'a': {'hostname': 'a'}, 'b': {'hostname': 'b'}}
+
+        assert list(resolve_targets('all', hosts)) == ['a', 'b']
+        assert list(resolve_targets('b', hosts)) == ['b']
+        with pytest.raises(ValueError):
+            resolve_targets('a,c', hosts)
+
+    def test_failed_host_fails_fleet(self, ssh_standin, standin_target, project, tmp_path):
+        bad = standin_target(ssh_standin, tmp_path / 'bad')
+        bad['port'] = 1  # 无人监听的端口，连接失败
+        targets = {
+            'good': standin_target(ssh_standin, tmp_path / 'good'),
+            'bad': bad
+        }
+
+        fleet = FleetUploader(targets, workers=2, project_config=project)
+
+        assert not fleet.upload_all()
+        assert (tmp_path / 'good' / 'config.py').exists()
+
+    def test_dry_run_prints_delta_per_host(self, ssh_standin, standin_target, project,
+                                           tmp_path, capsys):
+        """干运行读取每台主机的远程清单，已是最新的主机不需要传输"""
+        targets = {
+            'synced': standin_target(ssh_standin, tmp_path / 'synced'),
+            'fresh': standin_target(ssh_standin, tmp_path / 'fresh')
+        }
+        assert FleetUploader({'synced': targets['synced']}, project_config=project).upload_all()
+        ssh_standin.commands.clear()
+
+        totals = FleetUploader(targets, workers=2, project_config=project).print_delta()
+
+        assert totals['synced'] == 0
+        assert totals['fresh'] > 0
+        assert '[fresh]   📤 config.py' in capsys.readouterr().out
+        assert not any(c.startswith('scp ') for c in ssh_standin.commands)
+
+    def test_wall_time_flat_with_host_count(self, standin_factory, standin_target,
+                                            project, tmp_path):
+        """每条远程命令注入固定延迟，主机数增加8倍时总耗时应基本不变"""
+        server = standin_factory(exec_latency=0.2)
+
+        def fleet_wall_time(host_count):
+            targets = {
+                f'vm{i}': standin_target(server, tmp_path / f'remote_{host_count}_{i}')
+                for i in range(host_count)
+            }
+            fleet = FleetUploader(targets, workers=host_count, project_config=project)
+            start = time.time()
+            assert fleet.upload_all()
+            return time.time() - start
+
+        single = fleet_wall_time(1)
+        many = fleet_wall_time(8)
+
+        # 串行执行约为单台的8倍，并发执行应远低于此
+        assert many < single * 2.5, f"1台: {single:.2f}秒, 8台: {many:.2f}秒"
@@ -8,18 +8,40 @@ Alibaba Cloud Linux 3.21.04 测试框架上传脚本
 存放位置均为 /opt/test_project/
 
 三次传输内容：
-1. 环境包：test_env.tar.gz (Python虚拟环境)
+1. 环境包：test_env.tar.zst 或 test_env.tar.gz (Python虚拟环境)
 2. 测试代码：tests/ 目录 (测试用例)
 3. 主脚本：run_tests.py, pytest.ini, config.py等 (核心脚本)
 """
 
+import io
 import os
+import bz2
 import sys
+import json
+import lzma
+import math
+import queue
+import zlib
+import shlex
+import hashlib
+import tarfile
 import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import paramiko
 from scp import SCPClient
 from pathlib import Path
 
+# 连接池 (ssh_pool.py) 位于项目根目录，与远程测试模式共用
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from ssh_pool import SSHConnectionPool, default_pool, drain_channel  # noqa: E402
+
+try:
+    import zstandard  # 可选依赖，仅 --compression zstd 需要
+except ImportError:
+    zstandard = None
+
 # 靶机连接信息 (Python字典形式记录)
 TARGET_HOSTS = {
     'primary': {
@@ -40,6 +62,22 @@ TARGET_HOSTS = {
     }
 }
 
+# 环境包候选 (按优先级，与deploy_and_test.sh一致): zstd解压速度远快于gzip
+ENV_PACKAGE_CANDIDATES = ['test_env.tar.zst', 'test_env.tar.gz']
+
+
+def find_env_package(local_root):
+    """选择要上传的环境包: 优先zstd；若低优先级的包更新，说明高优先级的是旧版本残留"""
+    selected = None
+    for candidate in ENV_PACKAGE_CANDIDATES:
+        path = Path(local_root) / candidate
+        if path.is_file() and (selected is None or
+                               path.stat().st_mtime > (Path(local_root) / selected).stat().st_mtime):
+            selected = candidate
+
+    return selected or ENV_PACKAGE_CANDIDATES[-1]
+
+
 # 项目配置
 PROJECT_CONFIG = {
     'remote_base_path': '/opt/test_project',
@@ -49,8 +87,9 @@ PROJECT_CONFIG = {
     'batches': {
         'env_package': {
             'name': '环境包',
-            'files': ['test_env.tar.gz'],
-            'description': 'Python虚拟环境压缩包'
+            'files': [find_env_package(Path(__file__).parent.parent.absolute())],
+            'description': 'Python虚拟环境压缩包 (.tar.zst 或 .tar.gz)',
+            'content_addressed': True  # 存入 .store/<sha256>/，相同内容只传输一次
         },
         'test_code': {
             'name': '测试代码',
@@ -63,6 +102,22 @@ PROJECT_CONFIG = {
                 'run_tests.py',
                 'pytest.ini',
                 'config.py',
+                'remote_exec.py',
+                'ssh_pool.py',
+                'host_facts.py',
+                'probes.py',
+                'net_probes.py',
+                'net_bench.py',
+                'baselines.py',
+                'cpu_bench.py',
+                'disk_bench.py',
+                'fs_scan.py',
+                'resource_monitor.py',
+                'result_cache.py',
+                'timing_store.py',
+                'deadline.py',
+                'stats.py',
+                'bench_probes.py',
                 'requirements.txt',
                 'README.md',
                 'DEPLOYMENT_README.txt',
@@ -73,36 +128,416 @@ PROJECT_CONFIG = {
     }
 }
 
+# 舰队模式配置
+DEFAULT_FLEET_WORKERS = 8  # 同时进行上传会话的主机数
+DEFAULT_MAX_INFLIGHT_BYTES = 64 * 1024 * 1024  # 单主机在途字节上限
+SCP_BUFF_SIZE = 16384  # SCP单次写入大小 (与scp库默认值一致)
+
+# 内容哈希清单配置
+MANIFEST_NAME = '.upload_manifest.json'  # 本地缓存与远程副本使用同一文件名
+MANIFEST_EXCLUDES = {'__pycache__'}  # 不参与上传的目录名
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 目录传输方式: scp递归上传，或tar流式上传 (打包、传输、解压同时进行)
+DIR_TRANSFER_MODES = ('scp', 'tar')
+TAR_CODECS = ('gzip', 'bzip2', 'xz', 'zstd', 'none')
+DEFAULT_TAR_CODEC = 'gzip'
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# 大文件分块并行上传: 超过阈值的文件拆成固定大小的块，经同一transport上的多条SFTP通道并行发送，
+# 远程保留块位图 (每块一个字节, b'1'表示已写入)，中断后从未完成的块继续
+CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_CHUNK_STREAMS = 4
+MAX_RESUME_ATTEMPTS = 3  # 单次运行内传输中断后自动重连续传的次数
+
+# 部署后检查中单条远程命令的超时 (秒)，并发执行时总耗时取决于最慢的一条
+DEPLOYMENT_CHECK_TIMEOUT = 30
+
+# 靶机上的内容寻址存储: <remote_base>/.store/<sha256>/ 存放该哈希对应的制品，
+# 部署脚本在同一目录下保存解压结果，相同内容的环境包只传输、解压一次
+STORE_DIR_NAME = '.store'
+# 存储中除当前引用的制品外，按最近使用时间保留的旧版本数 (用于回滚)，更早的目录被删除
+STORE_KEEP_PREVIOUS = 2
+
+# 远程批量操作脚本: 一次往返完成整批目录创建、符号链接和文件校验
+# 从stdin读取 {"mkdirs": [...], "links": {...}, "stat": [...], "hash": bool或路径列表, "prune": {...}}，
+# 向stdout输出JSON结果; hash为路径列表时只计算其中文件的SHA-256，其余文件只返回大小;
+# prune为 {"store": 存储目录, "keep": [当前哈希], "previous": N}: 刷新当前目录的使用时间，
+# 其余目录按使用时间保留最近N个，删除更早的
+REMOTE_BATCH_SCRIPT = r"""
+import hashlib, json, os, shutil, sys
+request = json.load(sys.stdin)
+result = {"dirs": {}, "links": {}, "files": {}}
+hash_paths = request.get("hash", True)
+if not isinstance(hash_paths, bool):
+    hash_paths = set(hash_paths)
+for path in request.get("mkdirs", []):
+    try:
+        os.makedirs(path, exist_ok=True)
+        result["dirs"][path] = None
+    except OSError as e:
+        result["dirs"][path] = str(e)
+for link, target in request.get("links", {}).items():
+    try:
+        tmp = link + ".link-tmp"
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        os.symlink(target, tmp)
+        os.replace(tmp, link)
+        result["links"][link] = None
+    except OSError as e:
+        result["links"][link] = str(e)
+for path in request.get("stat", []):
+    entry = {"exists": os.path.exists(path), "is_dir": os.path.isdir(path)}
+    if os.path.isfile(path):
+        entry["size"] = os.path.getsize(path)
+    if os.path.isfile(path) and (hash_paths is True or (hash_paths and path in hash_paths)):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1048576), b""):
+                digest.update(chunk)
+        entry["sha256"] = digest.hexdigest()
+    result["files"][path] = entry
+prune = request.get("prune")
+if prune and os.path.isdir(prune["store"]):
+    store = prune["store"]
+    keep = set(prune["keep"])
+    for name in keep:
+        if os.path.isdir(os.path.join(store, name)):
+            os.utime(os.path.join(store, name))
+    others = [name for name in os.listdir(store)
+              if name not in keep and os.path.isdir(os.path.join(store, name))]
+    others.sort(key=lambda name: os.path.getmtime(os.path.join(store, name)), reverse=True)
+    result["pruned"] = others[prune["previous"]:]
+    for name in result["pruned"]:
+        shutil.rmtree(os.path.join(store, name), ignore_errors=True)
+json.dump(result, sys.stdout)
+"""
+
+# 主机清单缺省字段 (清单条目只需给出hostname)
+INVENTORY_DEFAULTS = {
+    'port': 22,
+    'username': 'root',
+    'password': None,
+    'key_filename': '~/.ssh/id_rsa',
+    'description': '清单主机'
+}
+
+
+class ByteBudget:
+    """按字节计数的信号量，限制单台主机同时在途的传输字节数
+
+    额度在实际写入数据处按窗口占用: 每个窗口写入前占用、写入返回后归还，
+    同一主机的并发传输 (如分块上传的多条SFTP通道) 合计不超过上限。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._available = self.capacity
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes):
+        """占用nbytes字节的额度直到退出，nbytes不能超过上限 (大块数据用write()分窗口写入)"""
+        amount = max(1, int(nbytes))
+        if amount > self.capacity:
+            raise ValueError(f"单次占用 {amount} 字节超过在途上限 {self.capacity} 字节")
+        with self._cond:
+            while self._available < amount:
+                self._cond.wait()
+            self._available -= amount
+        try:
+            yield amount
+        finally:
+            with self._cond:
+                self._available += amount
+                self._cond.notify_all()
+
+    def write(self, write, data):
+        """把data按不超过上限的窗口交给write，每个窗口写入期间占用额度"""
+        for start in range(0, len(data), self.capacity):
+            window = data[start:start + self.capacity]
+            with self.reserve(len(window)):
+                write(window)
+
+
+class BudgetedChannel:
+    """SSH通道代理: sendall经主机的在途字节额度写入，其余属性透传给原通道"""
+
+    def __init__(self, channel, byte_budget):
+        self.channel = channel
+        self.byte_budget = byte_budget
+
+    def sendall(self, data):
+        self.byte_budget.write(self.channel.sendall, data)
+
+    def __getattr__(self, name):
+        return getattr(self.channel, name)
+
+
+class BudgetedSCPClient(SCPClient):
+    """SCP客户端: 文件内容的每次写入都占用主机的在途字节额度"""
+
+    def __init__(self, transport, byte_budget, **kwargs):
+        super().__init__(transport, **kwargs)
+        self.byte_budget = byte_budget
+
+    def _open(self):
+        channel = super()._open()
+        if not isinstance(channel, BudgetedChannel):
+            self.channel = channel = BudgetedChannel(channel, self.byte_budget)
+        return channel
+
+
+def make_compressor(codec, level):
+    """创建流式压缩器，codec为none时返回None"""
+    if codec == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if codec == 'bzip2':
+        return bz2.BZ2Compressor(level)
+    if codec == 'xz':
+        return lzma.LZMACompressor(preset=level)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd压缩需要安装zstandard包: pip install zstandard")
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    if codec == 'none':
+        return None
+    raise ValueError(f"不支持的压缩方式: {codec}")
+
+
+def remote_extract_command(codec, target_dir):
+    """生成远程边接收边解压的命令 (从stdin读取tar流，不落临时文件)"""
+    target = shlex.quote(target_dir)
+    if codec == 'zstd':
+        return f"mkdir -p {target} && zstd -dc | tar -xf - -C {target}"
+
+    flag = {'gzip': 'z', 'bzip2': 'j', 'xz': 'J', 'none': ''}[codec]
+    return f"mkdir -p {target} && tar -x{flag}f - -C {target}"
+
+
+class CompressedChannelWriter:
+    """只写文件对象: 写入的数据经压缩后直接发送到SSH通道"""
+
+    def __init__(self, channel, compressor):
+        self.channel = channel
+        self.compressor = compressor
+        self.sent_bytes = 0
+
+    def write(self, data):
+        payload = self.compressor.compress(data) if self.compressor else data
+        if payload:
+            self.channel.sendall(payload)
+            self.sent_bytes += len(payload)
+        return len(data)
+
+    def close(self):
+        """冲刷压缩器剩余数据并关闭通道写端 (远程tar因此读到EOF)"""
+        if self.compressor:
+            payload = self.compressor.flush()
+            if payload:
+                self.channel.sendall(payload)
+                self.sent_bytes += len(payload)
+        self.channel.shutdown_write()
+
+
+def load_inventory(inventory_path):
+    """读取JSON主机清单，格式与TARGET_HOSTS相同，缺省字段按INVENTORY_DEFAULTS补齐"""
+    with open(inventory_path, 'r', encoding='utf-8') as f:
+        raw_hosts = json.load(f)
+
+    hosts = {}
+    for name, config in raw_hosts.items():
+        if not config.get('hostname'):
+            raise ValueError(f"主机清单条目缺少hostname: {name}")
+        host = dict(INVENTORY_DEFAULTS)
+        host.update(config)
+        hosts[name] = host
+
+    return hosts
+
+
+def resolve_targets(spec, hosts):
+    """解析目标主机选择: 'all' 或逗号分隔的主机名列表"""
+    if not spec or spec == 'all':
+        return dict(hosts)
+
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in hosts]
+    if unknown:
+        raise ValueError(f"未找到目标主机配置: {', '.join(unknown)}")
+
+    return {name: hosts[name] for name in names}
+
+
+def file_sha256(path):
+    """分块计算文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_entry_files(local_root, file_path):
+    """列出批次条目 (文件或目录) 下的全部文件，返回相对项目根目录的posix路径"""
+    local_path = Path(local_root) / file_path
+    if local_path.is_file():
+        yield Path(file_path).as_posix()
+        return
+
+    for dirpath, dirnames, filenames in os.walk(str(local_path)):
+        dirnames[:] = sorted(d for d in dirnames if d not in MANIFEST_EXCLUDES)
+        for filename in sorted(filenames):
+            full_path = Path(dirpath) / filename
+            yield full_path.relative_to(local_root).as_posix()
+
+
+def load_manifest(path):
+    """读取清单文件，文件不存在或格式错误时返回空清单"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def build_manifest(local_root, file_paths, cache=None):
+    """计算批次条目下每个文件的大小和SHA-256
+
+    cache为上次的本地清单，大小和修改时间未变的文件直接复用其哈希，
+    避免每次都重新读取数百MB的环境包。
+    """
+    cache = cache or {}
+    manifest = {}
+
+    for file_path in file_paths:
+        if not (Path(local_root) / file_path).exists():
+            continue
+        for rel_path in iter_entry_files(local_root, file_path):
+            stat = (Path(local_root) / rel_path).stat()
+            cached = cache.get(rel_path)
+            if cached and cached.get('size') == stat.st_size \
+                    and cached.get('mtime_ns') == stat.st_mtime_ns:
+                sha256 = cached['sha256']
+            else:
+                sha256 = file_sha256(Path(local_root) / rel_path)
+            manifest[rel_path] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': sha256
+            }
+
+    return manifest
+
+
+def manifest_to_json(manifest):
+    """序列化清单 (远程副本不需要本地修改时间)"""
+    files = {
+        rel_path: {'size': entry['size'], 'sha256': entry['sha256']}
+        for rel_path, entry in sorted(manifest.items())
+    }
+    return json.dumps({'files': files}, indent=1, sort_keys=True)
+
+
+def refresh_local_manifest(project_config):
+    """计算全部批次文件的本地清单，并刷新项目根目录下的本地哈希缓存"""
+    local_root = Path(project_config['local_project_root'])
+    cache_path = local_root / MANIFEST_NAME
+    file_paths = [
+        file_path
+        for batch_config in project_config['batches'].values()
+        for file_path in batch_config['files']
+    ]
+    manifest = build_manifest(local_root, file_paths, load_manifest(cache_path))
+
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': manifest}, f, indent=1, sort_keys=True)
+    except OSError as e:
+        print(f"  [警告] 无法写入本地哈希缓存: {e}")
+
+    return manifest
+
 
 class ProjectUploader:
     """项目上传器"""
 
-    def __init__(self, target_name='primary'):
-        self.target_config = TARGET_HOSTS.get(target_name)
+    def __init__(self, target_name='primary', target_config=None, project_config=None,
+                 log_prefix=None, max_inflight_bytes=None, local_manifest=None,
+                 dir_transfer='scp', tar_codec=DEFAULT_TAR_CODEC,
+                 compression_level=DEFAULT_COMPRESSION_LEVEL,
+                 chunked_threshold=CHUNKED_UPLOAD_THRESHOLD, chunk_size=DEFAULT_CHUNK_SIZE,
+                 streams=DEFAULT_CHUNK_STREAMS, pool=None):
+        self.target_name = target_name
+        self.target_config = target_config or TARGET_HOSTS.get(target_name)
         if not self.target_config:
             raise ValueError(f"未找到目标主机配置: {target_name}")
 
-        self.project_config = PROJECT_CONFIG
-        self.local_root = self.project_config['local_project_root']
-        self.remote_base = self.project_config['remote_base_path']
-
-        # SSH客户端
-        self.ssh_client = None
+        # 舰队模式下每台主机一个上传器，日志行带主机前缀以免交错难读
+        self.log_prefix = log_prefix
+
+        self.project_config = project_config or PROJECT_CONFIG
+        self.local_root = Path(self.project_config['local_project_root'])
+        # 主机配置可覆盖远程路径 (清单文件中按主机指定)
+        self.remote_base = self.target_config.get(
+            'remote_base_path', self.project_config['remote_base_path'])
+
+        # 目录传输方式及tar流压缩参数
+        if dir_transfer not in DIR_TRANSFER_MODES:
+            raise ValueError(f"不支持的目录传输方式: {dir_transfer}")
+        self.dir_transfer = dir_transfer
+        self.tar_codec = tar_codec
+        self.compression_level = compression_level
+
+        # 大文件分块并行上传参数
+        self.chunked_threshold = chunked_threshold
+        self.chunk_size = max(1, chunk_size)
+        self.streams = max(1, streams)
+
+        # 单主机在途字节上限
+        self.byte_budget = ByteBudget(max_inflight_bytes or DEFAULT_MAX_INFLIGHT_BYTES)
+
+        # 内容哈希清单: 本地按需计算，远程副本在连接后读取
+        self.local_manifest = local_manifest
+        self.remote_manifest = {}
+        # 本次运行实际传输过的文件 (相对路径)，验证时只对这些文件计算远程SHA-256
+        self.transferred = set()
+
+        # SSH连接取自连接池: 同一进程内再次连接同一主机时复用已建立的transport
+        self.pool = pool or default_pool
+        self.connection = None
         self.scp_client = None
 
-        print("[初始化上传器]")
-        print(f"  目标主机: {self.target_config['hostname']}")
-        print(f"  描述: {self.target_config['description']}")
-        print(f"  本地路径: {self.local_root}")
-        print(f"  远程路径: {self.remote_base}")
+        self._log("[初始化上传器]")
+        self._log(f"  目标主机: {self.target_config['hostname']}")
+        self._log(f"  描述: {self.target_config.get('description', target_name)}")
+        self._log(f"  本地路径: {self.local_root}")
+        self._log(f"  远程路径: {self.remote_base}")
+
+    def _log(self, message=""):
+        """输出日志，舰队模式下为每一行加主机前缀"""
+        if not self.log_prefix:
+            print(message)
+            return
+
+        for line in str(message).split("\n"):
+            print(f"[{self.log_prefix}] {line}" if line else "")
+
+    @property
+    def ssh_client(self):
+        """当前连接的SSHClient，不会自动重连
+
+        SCP通道与并行SFTP通道都建立在连接时的transport上，传输途中悄悄换成新连接会让它们
+        与ssh_client指向不同的transport；重连只在操作开始时由ensure_connected()显式进行。
+        """
+        return self.connection.client if self.connection else None
 
     def connect(self):
-        """建立SSH连接"""
+        """从连接池取得SSH连接"""
         try:
-            print(f"\n🔗 连接到 {self.target_config['hostname']}...")
-
-            self.ssh_client = paramiko.SSHClient()
-            self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            self._log(f"\n🔗 连接到 {self.target_config['hostname']}...")
 
             # 连接参数
             connect_kwargs = {
@@ -116,139 +551,551 @@ class ProjectUploader:
                 key_path = os.path.expanduser(self.target_config['key_filename'])
                 if os.path.exists(key_path):
                     connect_kwargs['key_filename'] = key_path
-                    print(f"  使用SSH密钥: {key_path}")
+                    self._log(f"  使用SSH密钥: {key_path}")
                 else:
-                    print(f"  [警告] SSH密钥文件不存在: {key_path}")
+                    self._log(f"  [警告] SSH密钥文件不存在: {key_path}")
 
             # 密码认证（备选）
             if self.target_config.get('password'):
                 connect_kwargs['password'] = self.target_config['password']
-                print("  使用密码认证")
+                self._log("  使用密码认证")
 
-            self.ssh_client.connect(**connect_kwargs)
+            # 连接池负责keepalive与TCP_NODELAY (scp逐文件的小包确认否则会与延迟ACK叠加)
+            self.connection = self.pool.get(**connect_kwargs)
 
-            # 创建SCP客户端
-            self.scp_client = SCPClient(self.ssh_client.get_transport())
+            # 创建SCP客户端，写入的数据占用在途字节额度
+            self.scp_client = BudgetedSCPClient(
+                self.ssh_client.get_transport(), self.byte_budget, buff_size=SCP_BUFF_SIZE)
 
-            print("✅ SSH连接成功")
+            self._log("✅ SSH连接成功")
 
         except Exception as e:
-            print(f"❌ SSH连接失败: {e}")
+            self._log(f"❌ SSH连接失败: {e}")
             raise
 
-    def disconnect(self):
-        """断开连接"""
+    def reconnect(self):
+        """关闭当前transport并重新连接，SCP通道随之重建"""
+        self.disconnect(close=True)
+        self.connect()
+
+    def ensure_connected(self):
+        """在一项操作 (上传批次、验证、写回清单) 开始前确认连接可用，transport已断开时重新连接"""
+        if self.connection is None:
+            self.connect()
+        elif not self.connection.is_active():
+            self._log("  🔄 连接已断开，重新连接")
+            self.reconnect()
+
+    def disconnect(self, close=False):
+        """释放连接: 默认只关闭SCP通道，transport留在连接池中供再次连接复用；close为True时关闭transport"""
         if self.scp_client:
             self.scp_client.close()
-        if self.ssh_client:
-            self.ssh_client.close()
-        print("🔌 连接已断开")
+            self.scp_client = None
+        if self.connection:
+            if close:
+                self.connection.close()
+            self.connection = None
+        self._log("🔌 连接已断开")
+
+    def remote_batch(self, mkdirs=(), stat=(), links=None, hash_files=True, prune=None):
+        """通过一次远程调用创建全部目录和符号链接，并获取文件的存在性、大小和SHA-256
+
+        hash_files为True/False时对全部/不对stat中的文件计算哈希，为路径集合时只计算其中的文件。
+        prune为存储清理参数 (见REMOTE_BATCH_SCRIPT)。
+        """
+        request = json.dumps({
+            'mkdirs': sorted(set(mkdirs)),
+            'links': links or {},
+            'stat': list(stat),
+            'hash': hash_files if isinstance(hash_files, bool) else sorted(hash_files),
+            'prune': prune
+        })
+        command = f"python3 -c {shlex.quote(REMOTE_BATCH_SCRIPT)}"
+
+        stdin, stdout, stderr = self.ssh_client.exec_command(command)
+        stdin.write(request)
+        stdin.channel.shutdown_write()
+
+        output = stdout.read().decode()
+        exit_code = stdout.channel.recv_exit_status()
+        if exit_code != 0:
+            raise RuntimeError(stderr.read().decode().strip() or f"退出码 {exit_code}")
+
+        return json.loads(output)
+
+    def prepare_remote(self, remote_dirs, stat_paths=(), hash_paths=()):
+        """单次往返创建一组远程目录并查询文件状态 (只对hash_paths中的文件计算哈希)，失败时返回None"""
+        try:
+            result = self.remote_batch(mkdirs=remote_dirs, stat=stat_paths,
+                                       hash_files=set(hash_paths))
+        except Exception as e:
+            self._log(f"❌ 远程目录操作失败: {e}")
+            return None
+
+        errors = {path: error for path, error in result['dirs'].items() if error}
+        for path, error in errors.items():
+            self._log(f"❌ 创建远程目录失败 {path}: {error}")
+        if errors:
+            return None
+
+        self._log(f"✅ 远程目录已准备: {len(result['dirs'])} 个")
+        return result['files']
+
+    def ensure_remote_directories(self, remote_paths):
+        """确保一组远程目录存在 (单次往返)"""
+        return self.prepare_remote(remote_paths) is not None
 
     def ensure_remote_directory(self, remote_path):
         """确保远程目录存在"""
+        return self.ensure_remote_directories([remote_path])
+
+    def prepare_local_manifest(self):
+        """计算全部批次文件的本地清单 (舰队模式下由FleetUploader统一计算后传入)"""
+        if self.local_manifest is None:
+            self.local_manifest = refresh_local_manifest(self.project_config)
+        return self.local_manifest
+
+    def load_remote_manifest(self):
+        """读取远程清单副本，不存在或无法解析时按全量上传处理"""
+        remote_path = f"{self.remote_base}/{MANIFEST_NAME}"
+
         try:
-            stdin, stdout, stderr = self.ssh_client.exec_command(f'mkdir -p {remote_path}')
+            stdin, stdout, stderr = self.ssh_client.exec_command(f'cat "{remote_path}"')
+            output = stdout.read().decode()
             exit_code = stdout.channel.recv_exit_status()
+            self.remote_manifest = json.loads(output).get('files', {}) if exit_code == 0 else {}
+        except (ValueError, AttributeError):
+            self.remote_manifest = {}
 
-            if exit_code == 0:
-                print(f"✅ 远程目录已准备: {remote_path}")
-            else:
-                error_msg = stderr.read().decode().strip()
-                print(f"❌ 创建远程目录失败: {error_msg}")
-                return False
+        if self.remote_manifest:
+            self._log(f"📋 远程清单: {len(self.remote_manifest)} 个文件")
+        else:
+            self._log("📋 未找到远程清单，将全量上传")
 
+        return self.remote_manifest
+
+    def save_remote_manifest(self):
+        """把已上传文件的哈希写回远程清单副本"""
+        remote_path = f"{self.remote_base}/{MANIFEST_NAME}"
+
+        try:
+            self.ensure_connected()
+            data = manifest_to_json(self.remote_manifest).encode('utf-8')
+            self.scp_client.putfo(io.BytesIO(data), remote_path)
+            self._log(f"📋 远程清单已更新: {len(self.remote_manifest)} 个文件")
         except Exception as e:
-            print(f"❌ 远程目录操作失败: {e}")
-            return False
+            self._log(f"  [警告] 远程清单更新失败，下次将重新比对: {e}")
 
-        return True
+    def changed_files(self, file_path):
+        """返回批次条目下的全部文件，以及其中哈希与远程清单不一致的文件"""
+        manifest = self.prepare_local_manifest()
+        entry = Path(file_path).as_posix()
+
+        entry_files = [
+            rel_path for rel_path in manifest
+            if rel_path == entry or rel_path.startswith(entry + '/')
+        ]
+        changed = [
+            rel_path for rel_path in entry_files
+            if self.remote_manifest.get(rel_path, {}).get('sha256') != manifest[rel_path]['sha256']
+        ]
+
+        return entry_files, changed
 
     def upload_batch(self, batch_name, batch_config):
-        """上传一个批次的文件"""
-        print(f"\n📦 开始上传批次: {batch_config['name']}")
-        print(f"  描述: {batch_config['description']}")
+        """上传一个批次的文件，内容未变化的文件跳过"""
+        self._log(f"\n📦 开始上传批次: {batch_config['name']}")
+        self._log(f"  描述: {batch_config['description']}")
+        self.ensure_connected()
 
         success_count = 0
         total_files = len(batch_config['files'])
 
+        # 先规划整批传输，收集所需的全部远程目录
+        plan = []
+        remote_dirs = set()
         for file_path in batch_config['files']:
             local_path = self.local_root / file_path
 
             if not local_path.exists():
-                print(f"  ⚠️  本地文件不存在，跳过: {local_path}")
+                self._log(f"  ⚠️  本地文件不存在，跳过: {local_path}")
                 continue
 
-            # 远程路径
-            remote_path = f"{self.remote_base}/{file_path}"
+            entry_files, changed = self.changed_files(file_path)
+            if not changed:
+                self._log(f"  ⏭️  未变化，跳过: {file_path}")
+                success_count += 1
+                continue
 
-            # 确保远程目录存在
+            remote_dirs.add(os.path.dirname(f"{self.remote_base}/{file_path}"))
+            if local_path.is_dir() and len(changed) < len(entry_files):
+                remote_dirs.update(
+                    os.path.dirname(f"{self.remote_base}/{rel_path}") for rel_path in changed)
+
+            # 内容寻址的制品实际写入存储目录，原路径只放符号链接
+            store_path = None
+            if batch_config.get('content_addressed') and local_path.is_file():
+                store_path = self.store_path(self.local_manifest[changed[0]]['sha256'], file_path)
+                remote_dirs.add(os.path.dirname(store_path))
+            plan.append((file_path, local_path, entry_files, changed, store_path))
+
+        # 确保远程目录存在，并查询存储中是否已有对应制品 (整批一次往返)
+        # 存储中的制品可能是中断或损坏的残留，按SHA-256而不是大小判断是否可复用
+        store_files = {}
+        store_paths = [store_path for *_, store_path in plan if store_path]
+        if plan:
+            store_files = self.prepare_remote(remote_dirs, store_paths, hash_paths=store_paths)
+            if store_files is None:
+                plan = []
+
+        for file_path, local_path, entry_files, changed, store_path in plan:
+            # 远程路径 (内容寻址的制品先写入存储目录)
+            remote_path = f"{self.remote_base}/{file_path}"
             remote_dir = os.path.dirname(remote_path)
-            if not self.ensure_remote_directory(remote_dir):
-                continue
+            link_path = None
+            if store_path:
+                link_path, remote_path = remote_path, store_path
 
             try:
-                print(f"  📤 上传: {file_path}")
+                transfer_bytes = sum(self.local_manifest[rel]['size'] for rel in changed)
+
+                stored = store_files.get(store_path, {}) if store_path else {}
+                if stored.get('sha256') == self.local_manifest[changed[0]]['sha256']:
+                    # 存储中已有该内容 (例如回滚到旧版本)，只需重新指向
+                    self._log(f"  ♻️  存储中已有相同内容，跳过传输: {file_path}")
+                    self.link_to_store(link_path, store_path)
+                    for rel_path in changed:
+                        self.remote_manifest[rel_path] = self.local_manifest[rel_path]
+                    success_count += 1
+                    continue
+
+                self._log(f"  📤 上传: {file_path} ({len(changed)}/{len(entry_files)} 个文件有变化)")
 
                 # 记录开始时间
                 start_time = time.time()
 
-                # 上传文件/目录
-                if local_path.is_dir():
-                    # 上传目录
-                    self.scp_client.put(str(local_path), remote_path, recursive=True)
+                # 上传文件/目录 (各传输方式在写入数据时按窗口占用在途字节额度)
+                if local_path.is_dir() and self.dir_transfer == 'tar':
+                    # 只打包有变化的文件，单通道流式传输
+                    sent = self.stream_tar(changed)
+                    self._log(f"    tar流({self.tar_codec}): 压缩后 {sent / 1024 / 1024:.1f}MB")
+                elif local_path.is_dir() and len(changed) == len(entry_files):
+                    # 整个目录都有变化: 递归上传到父目录 (远程已有同名目录时合并而不是嵌套)
+                    self.scp_client.put(str(local_path), remote_dir, recursive=True)
+                elif local_path.is_dir():
+                    # 只上传目录中有变化的文件
+                    for rel_path in changed:
+                        self.scp_client.put(
+                            str(self.local_root / rel_path), f"{self.remote_base}/{rel_path}")
+                elif transfer_bytes >= self.chunked_threshold:
+                    # 大文件分块并行上传，支持断点续传
+                    self.upload_large_file(local_path, remote_path,
+                                           self.local_manifest[changed[0]]['sha256'])
                 else:
                     # 上传文件
                     self.scp_client.put(str(local_path), remote_path)
 
+                if store_path:
+                    self.link_to_store(link_path, store_path)
+
                 # 计算耗时
                 elapsed = time.time() - start_time
 
-                # 获取文件大小
-                if local_path.is_file():
-                    size_mb = local_path.stat().st_size / 1024 / 1024
-                    print(f"    耗时: {elapsed:.1f}秒, 大小: {size_mb:.1f}MB")
-                else:
-                    print(f"    耗时: {elapsed:.1f}秒 (目录)")
+                size_mb = transfer_bytes / 1024 / 1024
+                self._log(f"    耗时: {elapsed:.1f}秒, 传输: {size_mb:.1f}MB")
+
+                # 记录已上传文件的哈希，批次结束后写回远程清单
+                for rel_path in changed:
+                    self.remote_manifest[rel_path] = self.local_manifest[rel_path]
+                self.transferred.update(changed)
 
                 success_count += 1
 
             except Exception as e:
-                print(f"  ❌ 上传失败 {file_path}: {e}")
+                self._log(f"  ❌ 上传失败 {file_path}: {e}")
+
+        if store_paths:
+            self.prune_store()
 
-        print(f"  结果: {success_count}/{total_files} 个文件上传成功")
+        self._log(f"  结果: {success_count}/{total_files} 个文件上传成功")
         return success_count == total_files
 
+    def store_path(self, sha256, file_path):
+        """内容寻址存储中制品的远程路径: <remote_base>/.store/<sha256>/<文件名>"""
+        return f"{self.remote_base}/{STORE_DIR_NAME}/{sha256}/{os.path.basename(file_path)}"
+
+    def prune_store(self, previous=STORE_KEEP_PREVIOUS):
+        """清理存储: 保留各内容寻址制品当前指向的目录和最近使用的previous个旧版本"""
+        keep = [
+            self.remote_manifest[file_path]['sha256']
+            for batch_config in self.project_config['batches'].values()
+            if batch_config.get('content_addressed')
+            for file_path in batch_config['files']
+            if file_path in self.remote_manifest
+        ]
+        prune = {
+            'store': f"{self.remote_base}/{STORE_DIR_NAME}",
+            'keep': keep,
+            'previous': previous
+        }
+        try:
+            pruned = self.remote_batch(prune=prune).get('pruned', [])
+        except Exception as e:
+            self._log(f"  ⚠️  清理存储失败: {e}")
+            return
+        if pruned:
+            self._log(f"  🧹 已清理存储中的 {len(pruned)} 个旧版本")
+
+    def link_to_store(self, link_path, store_path):
+        """把制品原路径原子替换为指向存储的相对符号链接"""
+        target = os.path.relpath(store_path, os.path.dirname(link_path))
+        error = self.remote_batch(links={link_path: target})['links'].get(link_path)
+        if error:
+            raise RuntimeError(f"创建存储链接失败: {error}")
+
+    def stream_tar(self, rel_paths):
+        """把一组文件打包成压缩tar流，经单个通道发送，远程边收边解压
+
+        两端都不写临时文件，返回压缩后实际发送的字节数。
+        """
+        compressor = make_compressor(self.tar_codec, self.compression_level)
+        command = remote_extract_command(self.tar_codec, self.remote_base)
+
+        channel = self.ssh_client.get_transport().open_session()
+        # 远程tar的输出在发送期间由另一线程读取，大量警告不会写满通道窗口而使发送停住
+        reader = ThreadPoolExecutor(max_workers=1)
+        try:
+            channel.exec_command(command)
+            output = reader.submit(drain_channel, channel)
+            writer = CompressedChannelWriter(BudgetedChannel(channel, self.byte_budget), compressor)
+
+            with tarfile.open(fileobj=writer, mode='w|', format=tarfile.GNU_FORMAT) as tar:
+                for rel_path in rel_paths:
+                    tar.add(str(self.local_root / rel_path), arcname=rel_path, recursive=False)
+            writer.close()
+
+            _, err = output.result()
+            exit_code = channel.recv_exit_status()
+        finally:
+            # 出错时关闭通道也让读取线程结束
+            channel.close()
+            reader.shutdown()
+
+        if exit_code != 0:
+            raise RuntimeError(f"远程解压失败: {err.decode(errors='replace').strip()}")
+
+        return writer.sent_bytes
+
+    def upload_large_file(self, local_path, remote_path, sha256):
+        """分块上传大文件，传输中断时重连并从块位图记录的位置继续"""
+        for attempt in range(1, MAX_RESUME_ATTEMPTS + 1):
+            try:
+                return self.chunked_upload(local_path, remote_path, sha256)
+            except (paramiko.SSHException, EOFError, OSError) as e:
+                if attempt == MAX_RESUME_ATTEMPTS:
+                    raise
+                self._log(f"    ⚠️  传输中断 ({e})，重连后断点续传 ({attempt}/{MAX_RESUME_ATTEMPTS})")
+                self.reconnect()
+
+    def chunked_upload(self, local_path, remote_path, sha256):
+        """经多条并行SFTP通道分块写入 <remote_path>.part，校验SHA-256后原子改名
+
+        块位图保存在 <remote_path>.part.bitmap，元数据 (大小、哈希、块大小) 保存在
+        <remote_path>.part.meta；只有元数据完全一致时才沿用已有位图。返回本次发送的块数。
+        """
+        size = Path(local_path).stat().st_size
+        chunk_count = max(1, math.ceil(size / self.chunk_size))
+        part_path = f"{remote_path}.part"
+        meta_path = f"{part_path}.meta"
+        bitmap_path = f"{part_path}.bitmap"
+        meta = {'sha256': sha256, 'size': size, 'chunk_size': self.chunk_size}
+
+        transport = self.ssh_client.get_transport()
+        clients = [
+            paramiko.SFTPClient.from_transport(transport)
+            for _ in range(min(self.streams, chunk_count))
+        ]
+
+        try:
+            control = clients[0]
+            bitmap = self._load_chunk_bitmap(control, meta_path, bitmap_path, meta, chunk_count)
+            if bitmap is None:
+                # 全新传输: 预分配目标大小，位图清零，最后写元数据
+                with control.open(part_path, 'wb') as f:
+                    f.truncate(size)
+                with control.open(bitmap_path, 'wb') as f:
+                    f.write(b'0' * chunk_count)
+                with control.open(meta_path, 'wb') as f:
+                    f.write(json.dumps(meta).encode('utf-8'))
+                bitmap = bytearray(b'0' * chunk_count)
+
+            pending = [index for index in range(chunk_count) if bitmap[index:index + 1] != b'1']
+            if len(pending) < chunk_count:
+                self._log(f"    ↩️  断点续传: 已完成 {chunk_count - len(pending)}/{chunk_count} 块")
+            self._log(f"    分块并行上传: {len(pending)} 块, {len(clients)} 条SFTP通道")
+
+            # 通道池: 每个块借用一条空闲通道，同一时刻每条通道只承载一个块
+            channel_pool = queue.Queue()
+            for client in clients:
+                channel_pool.put(client)
+
+            with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+                futures = [
+                    executor.submit(self._send_chunk, channel_pool, local_path,
+                                    part_path, bitmap_path, index)
+                    for index in pending
+                ]
+                for future in as_completed(futures):
+                    future.result()
+
+            # 重组完成后在远程校验整文件哈希
+            remote = self.remote_batch(stat=[part_path])['files'][part_path]
+            if remote.get('size') != size or remote.get('sha256') != sha256:
+                # 位图不可信，删除后下次从头传输
+                control.remove(bitmap_path)
+                raise RuntimeError("分块重组后SHA-256不一致")
+
+            control.posix_rename(part_path, remote_path)
+            control.remove(meta_path)
+            control.remove(bitmap_path)
+        finally:
+            for client in clients:
+                client.close()
+
+        return len(pending)
+
+    @staticmethod
+    def _load_chunk_bitmap(sftp, meta_path, bitmap_path, meta, chunk_count):
+        """读取上次中断留下的块位图，元数据不一致或不存在时返回None"""
+        try:
+            with sftp.open(meta_path, 'rb') as f:
+                saved_meta = json.loads(f.read().decode('utf-8'))
+            with sftp.open(bitmap_path, 'rb') as f:
+                bitmap = bytearray(f.read())
+        except (IOError, ValueError):
+            return None
+
+        if saved_meta != meta or len(bitmap) != chunk_count:
+            return None
+        return bitmap
+
+    def _send_chunk(self, channel_pool, local_path, part_path, bitmap_path, index):
+        """发送单个数据块，写入完成后再在位图中标记 (中断时最多重传一个块)"""
+        offset = index * self.chunk_size
+        with open(local_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(self.chunk_size)
+
+        sftp = channel_pool.get()
+        try:
+            with sftp.open(part_path, 'r+b') as remote:
+                remote.set_pipelined(True)
+                remote.seek(offset)
+                # 并行的各条通道合计不超过主机的在途字节上限
+                self.byte_budget.write(remote.write, data)
+            with sftp.open(bitmap_path, 'r+b') as bitmap:
+                bitmap.seek(index)
+                bitmap.write(b'1')
+        finally:
+            channel_pool.put(sftp)
+
+    def print_delta(self, batch_keys=None):
+        """干运行: 打印每个批次将要传输的文件和字节数，返回总字节数"""
+        manifest = self.prepare_local_manifest()
+        total_files = 0
+        total_bytes = 0
+
+        for batch_key, batch_config in self.project_config['batches'].items():
+            if batch_keys and batch_key not in batch_keys:
+                continue
+
+            self._log(f"\n📦 {batch_config['name']} ({batch_config['description']}):")
+            for file_path in batch_config['files']:
+                if not (self.local_root / file_path).exists():
+                    self._log(f"  ❌ {file_path} (本地不存在)")
+                    continue
+
+                entry_files, changed = self.changed_files(file_path)
+                for rel_path in changed:
+                    size = manifest[rel_path]['size']
+                    total_files += 1
+                    total_bytes += size
+                    self._log(f"  📤 {rel_path} ({size} 字节)")
+
+                unchanged = len(entry_files) - len(changed)
+                if unchanged:
+                    self._log(f"  ⏭️  {file_path}: {unchanged} 个文件未变化")
+
+        self._log(f"\n将传输 {total_files} 个文件, 共 {total_bytes} 字节 "
+                  f"({total_bytes / 1024 / 1024:.1f}MB)")
+        return total_bytes
+
     def verify_upload(self, batch_name, batch_config):
-        """验证上传结果"""
-        print(f"\n🔍 验证批次: {batch_config['name']}")
+        """验证上传结果: 整批一次往返，逐个文件比对大小，本次传输过的文件再比对SHA-256
 
-        all_verified = True
+        未传输的文件在清单比对中已确认与远程一致，不再在远程读取全文计算哈希
+        (例如只改了配置时不必重新哈希数百MB的环境包)。
+        """
+        self._log(f"\n🔍 验证批次: {batch_config['name']}")
+        self.ensure_connected()
 
+        manifest = self.prepare_local_manifest()
+        entries = {}
         for file_path in batch_config['files']:
-            remote_path = f"{self.remote_base}/{file_path}"
+            entry_files, _ = self.changed_files(file_path)
+            # 本地不存在的条目只检查远程路径是否存在
+            entries[file_path] = entry_files or [Path(file_path).as_posix()]
 
-            try:
-                # 检查远程文件是否存在
-                stdin, stdout, stderr = self.ssh_client.exec_command(f'ls -la "{remote_path}"')
-                exit_code = stdout.channel.recv_exit_status()
-
-                if exit_code == 0:
-                    # 解析文件信息
-                    output = stdout.read().decode().strip()
-                    print(f"  ✅ 已验证: {file_path}")
+        stat_paths = [
+            f"{self.remote_base}/{rel_path}"
+            for entry_files in entries.values() for rel_path in entry_files
+        ]
+        hash_paths = {
+            f"{self.remote_base}/{rel_path}"
+            for entry_files in entries.values() for rel_path in entry_files
+            if rel_path in self.transferred
+        }
+        try:
+            remote_files = self.remote_batch(stat=stat_paths, hash_files=hash_paths)['files']
+        except Exception as e:
+            self._log(f"  ❌ 验证异常: {e}")
+            return False
+
+        all_verified = True
+
+        for file_path, entry_files in entries.items():
+            problems = []
+            for rel_path in entry_files:
+                remote = remote_files.get(f"{self.remote_base}/{rel_path}", {})
+                local = manifest.get(rel_path)
+
+                if not remote.get('exists'):
+                    problems.append(f"{rel_path} 不存在")
+                elif local and remote.get('size') != local['size']:
+                    problems.append(f"{rel_path} 大小不一致 ({remote.get('size')} != {local['size']})")
+                elif local and rel_path in self.transferred and remote.get('sha256') != local['sha256']:
+                    problems.append(f"{rel_path} SHA-256不一致")
                 else:
-                    print(f"  ❌ 验证失败: {file_path}")
-                    all_verified = False
+                    continue
 
-            except Exception as e:
-                print(f"  ❌ 验证异常 {file_path}: {e}")
+                # 远程内容与清单不符，下次上传时重新传输
+                self.remote_manifest.pop(rel_path, None)
+
+            if problems:
                 all_verified = False
+                self._log(f"  ❌ 验证失败: {file_path}")
+                for problem in problems:
+                    self._log(f"    - {problem}")
+            else:
+                hashed = sum(1 for rel_path in entry_files if rel_path in self.transferred)
+                self._log(f"  ✅ 已验证: {file_path} ({len(entry_files)} 个文件大小一致, "
+                          f"其中本次传输的 {hashed} 个SHA-256一致)")
 
         return all_verified
 
     def run_deployment_checks(self):
-        """运行部署后检查"""
-        print("\n🔧 运行部署后检查")
+        """运行部署后检查: 各项检查相互独立，作为同一连接上的并发通道同时执行，返回远程命令总耗时"""
+        self._log("\n🔧 运行部署后检查")
         checks = [
             ("检查Python环境", "python3 --version"),
             ("检查磁盘空间", "df -h /opt"),
@@ -256,35 +1103,45 @@ class ProjectUploader:
             ("验证项目目录", f"ls -la {self.remote_base}")
         ]
 
-        for check_name, command in checks:
-            try:
-                stdin, stdout, stderr = self.ssh_client.exec_command(command)
-                exit_code = stdout.channel.recv_exit_status()
-
-                if exit_code == 0:
-                    print(f"  ✅ {check_name}: 通过")
-                else:
-                    error_output = stderr.read().decode().strip()
-                    print(f"  ❌ {check_name}: 失败 - {error_output}")
+        start = time.time()
+        try:
+            results = self.connection.run_many(
+                [command for _, command in checks], timeout=DEPLOYMENT_CHECK_TIMEOUT)
+        except Exception as e:
+            results = [e] * len(checks)
+        elapsed = time.time() - start
+
+        for (check_name, _), result in zip(checks, results):
+            if isinstance(result, Exception):
+                self._log(f"  ❌ {check_name}: 异常 - {result}")
+            elif result.returncode == 0:
+                self._log(f"  ✅ {check_name}: 通过")
+            else:
+                error_output = result.stderr.decode(errors='replace').strip()
+                self._log(f"  ❌ {check_name}: 失败 - {error_output}")
 
-            except Exception as e:
-                print(f"  ❌ {check_name}: 异常 - {e}")
+        self._log(f"  远程命令总耗时: {elapsed * 1000:.0f}ms ({len(checks)} 项并发执行)")
+        return elapsed
 
-    def upload_all(self):
-        """执行完整上传流程"""
-        print("\n🚀 开始完整项目上传流程")
-        print("=" * 50)
+    def upload_all(self, batch_keys=None):
+        """执行完整上传流程，全部批次上传并验证成功时返回True"""
+        self._log("\n🚀 开始完整项目上传流程")
+        self._log("=" * 50)
 
         try:
             # 建立连接
             self.connect()
+            self.load_remote_manifest()
 
-            # 执行三次上传
-            batches = self.project_config['batches']
+            # 执行三次上传 (可只选其中部分批次)
+            batches = {
+                key: config for key, config in self.project_config['batches'].items()
+                if not batch_keys or key in batch_keys
+            }
             results = {}
 
             for batch_key, batch_config in batches.items():
-                print(f"\n{'='*20} 第{list(batches.keys()).index(batch_key) + 1}次传输 {'='*20}")
+                self._log(f"\n{'='*20} 第{list(batches.keys()).index(batch_key) + 1}次传输 {'='*20}")
 
                 # 上传批次
                 upload_success = self.upload_batch(batch_key, batch_config)
@@ -296,33 +1153,35 @@ class ProjectUploader:
                     results[batch_key]['verify'] = verify_success
 
                     if verify_success:
-                        print(f"🎉 批次 '{batch_config['name']}' 上传验证成功！")
+                        self._log(f"🎉 批次 '{batch_config['name']}' 上传验证成功！")
                     else:
-                        print(f"⚠️  批次 '{batch_config['name']}' 上传成功但验证失败")
+                        self._log(f"⚠️  批次 '{batch_config['name']}' 上传成功但验证失败")
                 else:
-                    print(f"❌ 批次 '{batch_config['name']}' 上传失败")
+                    self._log(f"❌ 批次 '{batch_config['name']}' 上传失败")
                     results[batch_key]['verify'] = False
 
+            self.save_remote_manifest()
+
             # 部署后检查
-            print(f"\n{'='*20} 部署后检查 {'='*20}")
+            self._log(f"\n{'='*20} 部署后检查 {'='*20}")
             self.run_deployment_checks()
 
             # 总结报告
-            self.print_summary(results)
+            success = self.print_summary(results)
 
         except Exception as e:
-            print(f"❌ 上传过程出现异常: {e}")
+            self._log(f"❌ 上传过程出现异常: {e}")
             return False
         finally:
             self.disconnect()
 
-        return True
+        return success
 
     def print_summary(self, results):
         """打印总结报告"""
-        print(f"\n{'='*50}")
-        print("📊 上传总结报告")
-        print("=" * 50)
+        self._log(f"\n{'='*50}")
+        self._log("📊 上传总结报告")
+        self._log("=" * 50)
 
         total_batches = len(results)
         successful_batches = 0
@@ -330,20 +1189,160 @@ class ProjectUploader:
         for batch_key, result in results.items():
             batch_config = self.project_config['batches'][batch_key]
             status = "✅ 成功" if result['upload'] and result.get('verify', False) else "❌ 失败"
-            print(f"  {batch_config['name']}: {status}")
+            self._log(f"  {batch_config['name']}: {status}")
 
             if result['upload'] and result.get('verify', False):
                 successful_batches += 1
 
-        print(f"\n总体结果: {successful_batches}/{total_batches} 个批次成功")
+        self._log(f"\n总体结果: {successful_batches}/{total_batches} 个批次成功")
 
         if successful_batches == total_batches:
-            print("🎉 项目上传完全成功！")
-            print(f"📁 远程项目路径: {self.remote_base}")
-            print("💡 接下来可以在靶机上运行测试框架")
+            self._log("🎉 项目上传完全成功！")
+            self._log(f"📁 远程项目路径: {self.remote_base}")
+            self._log("💡 接下来可以在靶机上运行测试框架")
         else:
-            print("⚠️  部分批次上传失败，请检查上述错误信息")
+            self._log("⚠️  部分批次上传失败，请检查上述错误信息")
+
+        self._log("=" * 50)
+
+        return successful_batches == total_batches
+
+
+class FleetUploader:
+    """舰队上传器：用有界线程池同时运行多台主机的ProjectUploader会话"""
+
+    def __init__(self, targets, workers=DEFAULT_FLEET_WORKERS, max_inflight_bytes=None,
+                 project_config=None, batch_keys=None, **uploader_options):
+        self.targets = targets
+        self.workers = max(1, workers)
+        self.max_inflight_bytes = max_inflight_bytes
+        self.project_config = project_config or PROJECT_CONFIG
+        self.batch_keys = batch_keys
+        # 透传给每个ProjectUploader的传输参数 (目录传输方式、压缩方式等)
+        self.uploader_options = uploader_options
+        self.local_manifest = None
+
+    def upload_host(self, name, target_config):
+        """上传到单台主机，返回该主机的状态记录 (不抛出异常)"""
+        status = {
+            'name': name,
+            'hostname': target_config['hostname'],
+            'success': False,
+            'error': None
+        }
+        start_time = time.time()
+        # 每台主机的会话使用独立的连接池，上传结束即关闭，不在进程内保留大量空闲连接
+        pool = SSHConnectionPool()
+
+        try:
+            uploader = ProjectUploader(
+                name,
+                target_config=target_config,
+                project_config=self.project_config,
+                log_prefix=name,
+                max_inflight_bytes=self.max_inflight_bytes,
+                local_manifest=self.local_manifest,
+                pool=pool,
+                **self.uploader_options
+            )
+            status['success'] = uploader.upload_all(self.batch_keys)
+            if not status['success']:
+                status['error'] = "部分批次上传或验证失败，详见该主机日志"
+        except Exception as e:
+            status['error'] = str(e)
+        finally:
+            pool.close_all()
+
+        status['elapsed'] = time.time() - start_time
+        return status
 
+    def delta_host(self, name, target_config):
+        """干运行: 读取一台主机的远程清单并打印差异，返回将传输的字节数 (读取失败时按全量计算)"""
+        pool = SSHConnectionPool()
+        try:
+            uploader = ProjectUploader(
+                name,
+                target_config=target_config,
+                project_config=self.project_config,
+                log_prefix=name,
+                local_manifest=self.local_manifest,
+                pool=pool,
+                **self.uploader_options
+            )
+            try:
+                uploader.connect()
+                uploader.load_remote_manifest()
+            except Exception:
+                uploader._log("⚠️  无法读取远程清单，按全量上传计算")
+            finally:
+                uploader.disconnect()
+            return uploader.print_delta(self.batch_keys)
+        finally:
+            pool.close_all()
+
+    def print_delta(self):
+        """干运行: 并发读取各主机的远程清单，逐台打印将要传输的文件，返回 主机名 -> 字节数"""
+        print(f"\n🔍 舰队干运行: {len(self.targets)} 台主机, 并发数 {self.workers}")
+        self.local_manifest = refresh_local_manifest(self.project_config)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                name: executor.submit(self.delta_host, name, config)
+                for name, config in self.targets.items()
+            }
+        totals = {name: future.result() for name, future in futures.items()}
+
+        print(f"\n{'='*50}")
+        for name, total_bytes in totals.items():
+            print(f"  {name} ({self.targets[name]['hostname']}): {total_bytes} 字节 "
+                  f"({total_bytes / 1024 / 1024:.1f}MB)")
+        total_bytes = sum(totals.values())
+        print(f"\n合计将传输 {total_bytes} 字节 ({total_bytes / 1024 / 1024:.1f}MB)")
+        return totals
+
+    def upload_all(self):
+        """并发上传到全部目标主机，全部成功时返回True"""
+        print(f"\n🚀 舰队上传: {len(self.targets)} 台主机, 并发数 {self.workers}")
+        print("=" * 50)
+
+        start_time = time.time()
+        results = {}
+
+        # 本地清单与主机无关，只计算一次供所有会话共享
+        self.local_manifest = refresh_local_manifest(self.project_config)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(self.upload_host, name, config)
+                for name, config in self.targets.items()
+            ]
+            for future in as_completed(futures):
+                status = future.result()
+                results[status['name']] = status
+                mark = "✅" if status['success'] else "❌"
+                print(f"{mark} [{status['name']}] 完成, 耗时 {status['elapsed']:.1f}秒 "
+                      f"({len(results)}/{len(self.targets)})")
+
+        self.print_report(results, time.time() - start_time)
+        return all(status['success'] for status in results.values())
+
+    def print_report(self, results, elapsed):
+        """按清单顺序打印每台主机的上传状态"""
+        print(f"\n{'='*50}")
+        print("📊 舰队上传报告")
+        print("=" * 50)
+
+        failed = 0
+        for name in self.targets:
+            status = results[name]
+            if status['success']:
+                print(f"  ✅ {name} ({status['hostname']}): 成功, {status['elapsed']:.1f}秒")
+            else:
+                failed += 1
+                print(f"  ❌ {name} ({status['hostname']}): 失败 - {status['error']}")
+
+        print(f"\n总体结果: {len(results) - failed}/{len(results)} 台主机成功, "
+              f"总耗时 {elapsed:.1f}秒")
         print("=" * 50)
 
 
@@ -359,6 +1358,9 @@ def main():
   python upload_project.py                    # 上传到主靶机
   python upload_project.py --target backup   # 上传到备用靶机
   python upload_project.py --dry-run         # 仅显示将要上传的文件
+  python upload_project.py --targets all     # 并发上传到全部靶机
+  python upload_project.py --inventory hosts.json --workers 32  # 按主机清单批量上传
+  python upload_project.py --dir-transfer tar --compression zstd  # 目录以tar流上传
 
 可用目标靶机:
 """ + "\n".join([f"  {name}: {config['description']} ({config['hostname']})"
@@ -384,28 +1386,109 @@ def main():
         help='只上传指定的批次'
     )
 
+    parser.add_argument(
+        '--targets',
+        help='舰队模式: all 或逗号分隔的靶机名称，并发上传到多台靶机'
+    )
+
+    parser.add_argument(
+        '--inventory',
+        help='JSON主机清单文件 (格式同TARGET_HOSTS)，指定后默认上传到清单中全部主机'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_FLEET_WORKERS,
+        help=f'舰队模式同时上传的主机数 (默认: {DEFAULT_FLEET_WORKERS})'
+    )
+
+    parser.add_argument(
+        '--max-inflight-mb',
+        type=int,
+        default=DEFAULT_MAX_INFLIGHT_BYTES // 1024 // 1024,
+        help='单台主机在途传输字节上限, 单位MB (默认: %(default)s)'
+    )
+
+    parser.add_argument(
+        '--dir-transfer',
+        choices=DIR_TRANSFER_MODES,
+        default='scp',
+        help='目录传输方式: scp递归上传，或tar流式打包上传 (默认: scp)'
+    )
+
+    parser.add_argument(
+        '--compression',
+        choices=TAR_CODECS,
+        default=DEFAULT_TAR_CODEC,
+        help=f'tar流压缩方式 (默认: {DEFAULT_TAR_CODEC})'
+    )
+
+    parser.add_argument(
+        '--compression-level',
+        type=int,
+        default=DEFAULT_COMPRESSION_LEVEL,
+        help=f'tar流压缩级别 (默认: {DEFAULT_COMPRESSION_LEVEL})'
+    )
+
+    parser.add_argument(
+        '--chunked-threshold-mb',
+        type=int,
+        default=CHUNKED_UPLOAD_THRESHOLD // 1024 // 1024,
+        help='超过该大小的文件分块并行上传并支持断点续传, 单位MB (默认: %(default)s)'
+    )
+
+    parser.add_argument(
+        '--chunk-mb',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // 1024 // 1024,
+        help='分块大小, 单位MB (默认: %(default)s)'
+    )
+
+    parser.add_argument(
+        '--streams',
+        type=int,
+        default=DEFAULT_CHUNK_STREAMS,
+        help=f'分块上传的并行SFTP通道数 (默认: {DEFAULT_CHUNK_STREAMS})'
+    )
+
     args = parser.parse_args()
+    max_inflight_bytes = args.max_inflight_mb * 1024 * 1024
+    transfer_options = {
+        'dir_transfer': args.dir_transfer,
+        'tar_codec': args.compression,
+        'compression_level': args.compression_level,
+        'chunked_threshold': args.chunked_threshold_mb * 1024 * 1024,
+        'chunk_size': args.chunk_mb * 1024 * 1024,
+        'streams': args.streams
+    }
+
+    if args.targets or args.inventory:
+        return run_fleet(args, max_inflight_bytes, transfer_options)
 
     # 创建上传器
     try:
-        uploader = ProjectUploader(args.target)
+        uploader = ProjectUploader(args.target, max_inflight_bytes=max_inflight_bytes,
+                                   **transfer_options)
     except ValueError as e:
         print(f"❌ 配置错误: {e}")
         return 1
 
     if args.dry_run:
-        print("🔍 干运行模式 - 显示将要上传的文件:")
+        print("🔍 干运行模式 - 显示将要传输的文件差异:")
         print(f"目标主机: {uploader.target_config['hostname']}")
         print(f"远程路径: {uploader.remote_base}")
-        print("\n将要上传的批次:")
 
-        for batch_key, batch_config in PROJECT_CONFIG['batches'].items():
-            print(f"\n📦 {batch_config['name']} ({batch_config['description']}):")
-            for file_path in batch_config['files']:
-                local_path = uploader.local_root / file_path
-                exists = "✅" if local_path.exists() else "❌"
-                print(f"  {exists} {file_path}")
+        # 读取远程清单以计算差异，连接失败时按全量计算
+        try:
+            uploader.connect()
+            uploader.load_remote_manifest()
+        except Exception:
+            print("⚠️  无法读取远程清单，按全量上传计算")
+        finally:
+            uploader.disconnect()
 
+        uploader.print_delta([args.batch] if args.batch else None)
         return 0
 
     if args.batch:
@@ -415,9 +1498,11 @@ def main():
 
         uploader.connect()
         try:
+            uploader.load_remote_manifest()
             success = uploader.upload_batch(args.batch, batch_config)
             if success:
                 uploader.verify_upload(args.batch, batch_config)
+            uploader.save_remote_manifest()
         finally:
             uploader.disconnect()
 
@@ -428,5 +1513,44 @@ def main():
     return 0 if success else 1
 
 
+def run_fleet(args, max_inflight_bytes, transfer_options):
+    """舰队模式入口，任一主机失败时返回非零退出码"""
+    try:
+        hosts = load_inventory(args.inventory) if args.inventory else TARGET_HOSTS
+        targets = resolve_targets(args.targets, hosts)
+    except (OSError, ValueError) as e:
+        print(f"❌ 配置错误: {e}")
+        return 1
+
+    if not targets:
+        print("❌ 配置错误: 没有可上传的目标主机")
+        return 1
+
+    fleet = FleetUploader(
+        targets,
+        workers=args.workers,
+        max_inflight_bytes=max_inflight_bytes,
+        batch_keys=[args.batch] if args.batch else None,
+        **transfer_options
+    )
+
+    if args.dry_run:
+        print("🔍 干运行模式 - 舰队目标主机:")
+        for name, config in targets.items():
+            print(f"  {name}: {config['hostname']}:{config.get('port', 22)}")
+        print(f"\n并发数: {args.workers}, 单主机在途上限: {args.max_inflight_mb}MB")
+        try:
+            fleet.print_delta()
+        except ValueError as e:
+            print(f"❌ 配置错误: {e}")
+            return 1
+        return 0
+
+    return 0 if fleet.upload_all() else 1
+
+
 if __name__ == '__main__':
-    sys.exit(main())
+    try:
+        sys.exit(main())
+    finally:
+        default_pool.close_all()